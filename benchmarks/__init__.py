@@ -0,0 +1,13 @@
+"""
+Benchmarks for document_creation_task2.
+
+Benchmarks need a running Postgres, configured the same way as for the tests.
+They work on their own database, so they never touch the development one.
+"""
+import os
+
+BENCH_DB = "document_creation_task2_bench"
+
+os.environ.setdefault("DOCUMENT_CREATION_TASK2_DB_BASE", BENCH_DB)
+os.environ.setdefault("DOCUMENT_CREATION_TASK2_SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("DOCUMENT_CREATION_TASK2_RATE_LIMIT_RATE", "0")
@@ -0,0 +1,152 @@
+"""
+Benchmark of request throughput under several logging setups.
+
+Serves the application with uvicorn on a local port and fires ``--requests``
+task listings for each setup, from logging disabled to access logs at INFO
+written synchronously, from a background thread, as JSON and sampled. Logs
+are written to a temporary file.
+
+Usage::
+
+    python -m benchmarks.access_logging --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import socket
+import tempfile
+import time
+from contextlib import redirect_stdout
+from typing import Any, Dict, List
+
+import uvicorn
+from fastapi import FastAPI
+from httpx import AsyncClient
+from loguru import logger
+
+from benchmarks.utils import login, running_app, seed_tasks, summarize
+from document_creation_task2.logging import configure_logging
+from document_creation_task2.settings import settings
+
+URL = "/api/document/task/sorting"
+
+SETUPS: Dict[str, Dict[str, Any]] = {
+    "disabled": {"access_log": False},
+    "info_sync": {},
+    "info_enqueued": {"log_enqueue": True},
+    "info_json_enqueued": {"log_enqueue": True, "log_json": True},
+    "info_sampled_enqueued": {"log_enqueue": True, "log_access_sample_rate": 0.1},
+}
+
+
+def free_port() -> int:
+    """
+    Find a free local port.
+
+    :return: the port.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+async def run_setup(
+    app: FastAPI,
+    headers: Dict[str, str],
+    setup: Dict[str, Any],
+    args: argparse.Namespace,
+) -> Dict[str, float]:
+    """
+    Serve the application with a logging setup and load it.
+
+    :param app: started application.
+    :param headers: authorization headers.
+    :param setup: settings of the setup, ``access_log`` turns access logs off.
+    :param args: command line arguments.
+    :return: summary of the run.
+    """
+    access_log = setup.pop("access_log", True)
+    previous = {name: getattr(settings, name) for name in setup}
+    for name, setting in setup.items():
+        setattr(settings, name, setting)
+    configure_logging()
+    port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(
+            app,
+            port=port,
+            lifespan="off",
+            log_config=None,
+            log_level="info",
+            access_log=access_log,
+        ),
+    )
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:  # noqa: WPS501
+        async with AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+            summary = await load(client, headers, args.requests, args.concurrency)
+    finally:
+        server.should_exit = True
+        await serving
+        await logger.complete()
+        for field, default in previous.items():
+            setattr(settings, field, default)
+    return summary
+
+
+async def load(
+    client: AsyncClient,
+    headers: Dict[str, str],
+    requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    """
+    Run requests with a fixed number of them in flight.
+
+    :param client: client for the server.
+    :param headers: authorization headers.
+    :param requests: total number of requests.
+    :param concurrency: number of requests in flight.
+    :return: summary of the run.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one() -> None:  # noqa: WPS430
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(URL, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Run the benchmark.
+
+    :param args: command line arguments.
+    """
+    report = {}
+    with tempfile.TemporaryFile("w") as log_file:
+        with redirect_stdout(log_file):
+            async with running_app() as (app, client):
+                headers = await login(client, "bench")
+                await seed_tasks(app, "bench", args.tasks)
+                for name, setup in SETUPS.items():
+                    report[name] = await run_setup(app, headers, dict(setup), args)
+            logger.remove()
+    print(json.dumps(report, indent=2))  # noqa: WPS421
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,91 @@
+"""
+Benchmark of clearing the tasks of a user.
+
+Seeds ``--rows`` tasks for one user and a few for another, clears the first
+user through ``/tasks/clear`` and reports the wall time, the number of
+chunks and the longest chunk, which bounds how long row locks are held.
+
+Usage::
+
+    python -m benchmarks.clear_tasks --rows 1000000 --chunk 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+
+from benchmarks.utils import login, percentile, running_app, seed_tasks
+from document_creation_task2.settings import settings
+
+URL = "/api/document/tasks/clear"
+OTHER_TASKS = 1000
+
+
+class DeleteTimer:
+    """Times the DELETE statements run by the engine."""
+
+    def __init__(self) -> None:
+        self.durations: List[float] = []
+        self._started = float(0)
+
+    def before(self, *args: Any) -> None:
+        """
+        Start timing a statement.
+
+        :param args: arguments of the event.
+        """
+        self._started = time.perf_counter()
+
+    def after(self, conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+        """
+        Record the duration of a DELETE.
+
+        :param conn: connection of the statement.
+        :param cursor: cursor of the statement.
+        :param statement: the SQL statement.
+        :param args: other arguments of the event.
+        """
+        if statement.startswith("DELETE"):
+            self.durations.append(time.perf_counter() - self._started)
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Run the benchmark.
+
+    :param args: command line arguments.
+    """
+    settings.task_clear_chunk = args.chunk
+    async with running_app() as (app, client):
+        headers = await login(client, "bench")
+        await login(client, "other")
+        await seed_tasks(app, "bench", args.rows)
+        await seed_tasks(app, "other", OTHER_TASKS)
+        timer = DeleteTimer()
+        engine = app.state.db_engine.sync_engine
+        event.listen(engine, "before_cursor_execute", timer.before)
+        event.listen(engine, "after_cursor_execute", timer.after)
+        start = time.perf_counter()
+        response = await client.delete(URL, headers=headers, timeout=None)
+        elapsed = time.perf_counter() - start
+    report: Dict[str, Any] = {
+        "rows": args.rows,
+        "chunk": args.chunk,
+        "deleted": response.json()["deleted"],
+        "elapsed_s": round(elapsed, 2),
+        "rows_per_s": round(args.rows / elapsed),
+        "chunks": len(timer.durations),
+        "chunk_p50_ms": round(percentile(timer.durations, 0.5) * 1000, 2),
+        "chunk_max_ms": round(max(timer.durations) * 1000, 2),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--chunk", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,114 @@
+"""
+Concurrency benchmark of DB-bound requests on a single worker.
+
+Fires ``--requests`` task listings at several concurrency levels and reports
+throughput, latency and the peak number of pooled connections checked out at
+the same time. A peak above one means that DB waits of in-flight requests
+overlap instead of being served one after another. Admission control, the
+token and listing caches and read coalescing are turned off so that every
+request queries the database and waits for a connection.
+
+Usage::
+
+    python -m benchmarks.concurrency --requests 500 --concurrency 1 10 50
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from benchmarks.utils import login, running_app, seed_tasks, summarize
+from document_creation_task2.services.write_behind import write_behind
+from document_creation_task2.settings import settings
+
+URL = "/api/document/task/sorting"
+
+
+class PoolWatcher:
+    """Tracks how many pooled connections are checked out at once."""
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self.current = 0
+        self.peak = 0
+        pool = engine.sync_engine.pool
+        event.listen(pool, "checkout", self._checkout)
+        event.listen(pool, "checkin", self._checkin)
+
+    def reset(self) -> None:
+        """Forget the peak of a previous run."""
+        self.peak = self.current
+
+    def _checkout(self, *args: Any) -> None:
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+
+    def _checkin(self, *args: Any) -> None:
+        self.current -= 1
+
+
+async def run_level(
+    client: AsyncClient,
+    headers: Dict[str, str],
+    requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    """
+    Run requests with a fixed number of them in flight.
+
+    :param client: client for the app.
+    :param headers: authorization headers.
+    :param requests: total number of requests.
+    :param concurrency: number of requests in flight.
+    :return: summary of the run.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one() -> None:  # noqa: WPS430
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(URL, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Run the benchmark.
+
+    :param args: command line arguments.
+    """
+    settings.admission_enabled = False
+    settings.token_cache_ttl = 0
+    settings.cache_tasks_ttl = 0
+    settings.coalescing_enabled = False
+    async with running_app() as (app, client):
+        headers = await login(client, "bench")
+        await seed_tasks(app, "bench", args.tasks)
+        await write_behind.flush()
+        watcher = PoolWatcher(app.state.db_engine)
+        report = []
+        for concurrency in args.concurrency:
+            watcher.reset()
+            summary = await run_level(client, headers, args.requests, concurrency)
+            summary["concurrency"] = concurrency
+            summary["peak_checked_out_connections"] = watcher.peak
+            report.append(summary)
+    print(json.dumps(report, indent=2))  # noqa: WPS421
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    asyncio.run(main(parser.parse_args()))
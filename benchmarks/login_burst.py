@@ -0,0 +1,117 @@
+"""
+Login burst benchmark.
+
+Fires ``--logins`` concurrent logins while ``--readers`` clients keep listing
+tasks, and reports login throughput, rejected logins and the latency of the
+task reads with and without the burst.
+
+Usage::
+
+    python -m benchmarks.login_burst --logins 200 --readers 4
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+from httpx import AsyncClient
+from starlette import status
+
+from benchmarks.utils import login, running_app, seed_tasks, summarize
+
+READ_URL = "/api/document/task/sorting"
+LOGIN_URL = "/api/User/user_login"
+
+
+async def read_until(
+    client: AsyncClient,
+    headers: Dict[str, str],
+    readers: int,
+    done: asyncio.Event,
+) -> Dict[str, float]:
+    """
+    Keep listing tasks until the event is set.
+
+    :param client: client for the app.
+    :param headers: authorization headers of the reader.
+    :param readers: number of concurrent readers.
+    :param done: event that stops the readers.
+    :return: summary of the reads.
+    """
+    latencies: List[float] = []
+
+    async def reader() -> None:  # noqa: WPS430
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get(READ_URL, headers=headers)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[reader() for _ in range(readers)])
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def login_burst(client: AsyncClient, logins: int) -> Dict[str, Any]:
+    """
+    Log in many times at once.
+
+    :param client: client for the app.
+    :param logins: number of concurrent logins.
+    :return: summary of the logins.
+    """
+    credentials = {"name": "burst", "password": "burst-password"}
+    start = time.perf_counter()
+    responses = await asyncio.gather(
+        *[client.post(LOGIN_URL, json=credentials) for _ in range(logins)],
+    )
+    elapsed = time.perf_counter() - start
+    codes = [response.status_code for response in responses]
+    accepted = codes.count(status.HTTP_200_OK)
+    return {
+        "logins": logins,
+        "accepted": accepted,
+        "rejected_503": codes.count(status.HTTP_503_SERVICE_UNAVAILABLE),
+        "elapsed_s": round(elapsed, 3),
+        "logins_per_s": round(accepted / elapsed, 2),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Run the benchmark.
+
+    :param args: command line arguments.
+    """
+    async with running_app() as (app, client):
+        headers = await login(client, "reader")
+        await login(client, "burst")
+        await seed_tasks(app, "reader", args.tasks)
+
+        done = asyncio.Event()
+        idle_reads = asyncio.create_task(
+            read_until(client, headers, args.readers, done),
+        )
+        await asyncio.sleep(args.idle_seconds)
+        done.set()
+        idle = await idle_reads
+
+        done = asyncio.Event()
+        burst_reads = asyncio.create_task(
+            read_until(client, headers, args.readers, done),
+        )
+        burst = await login_burst(client, args.logins)
+        done.set()
+        during_burst = await burst_reads
+
+    report = {"login": burst, "reads_idle": idle, "reads_during_burst": during_burst}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--idle-seconds", type=float, default=2)
+    asyncio.run(main(parser.parse_args()))
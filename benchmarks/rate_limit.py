@@ -0,0 +1,87 @@
+"""
+Microbenchmark of the per-user rate limiter.
+
+Measures the cost ``enforce_rate_limit`` adds to a request, with buckets in
+memory and, given ``--redis-url``, shared through a Redis server. Requests
+are spread over ``--users`` users so that buckets are created and refilled.
+
+Usage::
+
+    python -m benchmarks.rate_limit --iterations 100000 --users 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict
+
+from starlette.requests import Request
+from starlette.routing import Route
+
+from document_creation_task2.services.rate_limit import (
+    create_buckets,
+    enforce_rate_limit,
+    rate_limiter,
+)
+from document_creation_task2.settings import settings
+
+ROUTE = "/api/document/task/sorting"
+
+
+def make_request() -> Request:
+    """
+    Build a request matched to the task listing route.
+
+    :return: the request.
+    """
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": ROUTE,
+            "query_string": b"",
+            "headers": [],
+            "route": Route(ROUTE, endpoint=lambda request: None),
+        },
+    )
+
+
+async def measure(url: str, iterations: int, users: int) -> Dict[str, float]:
+    """
+    Rate limit many requests.
+
+    :param url: URL of the buckets.
+    :param iterations: number of requests.
+    :param users: number of users sending them.
+    :return: mean cost of one request in microseconds.
+    """
+    rate_limiter.use(create_buckets(url))
+    request = make_request()
+    start = time.perf_counter()
+    for index in range(iterations):
+        await enforce_rate_limit(request, index % users)
+    elapsed = time.perf_counter() - start
+    await rate_limiter.close()
+    return {"per_request_us": round(elapsed / iterations * 1e6, 2)}
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Run the benchmark.
+
+    :param args: command line arguments.
+    """
+    settings.rate_limit_rate = 1e9
+    settings.rate_limit_burst = 1000000000
+    report = {"memory": await measure("memory://", args.iterations, args.users)}
+    if args.redis_url:
+        report["redis"] = await measure(args.redis_url, args.iterations, args.users)
+    print(json.dumps(report, indent=2))  # noqa: WPS421
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--redis-url", default=None)
+    asyncio.run(main(parser.parse_args()))
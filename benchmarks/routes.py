@@ -0,0 +1,237 @@
+"""
+HTTP load test of the API routes.
+
+Drives signup, login, refresh, create, sort, update and delete through the
+application with ``--concurrency`` requests in flight, on a user that owns
+``--tasks`` tasks, and reports throughput and p50/p95/p99 latency per route.
+The JSON report can be saved and compared between commits.
+
+Usage::
+
+    python -m benchmarks.routes --requests 200 --concurrency 10 --tasks 1000
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple
+
+from httpx import AsyncClient, Response
+from sqlalchemy import text
+
+from benchmarks.utils import running_app, seed_tasks, summarize
+
+PASSWORD = "bench-password"
+TASK = {
+    "task_name": "bench task",
+    "task_date": "2023-01-02",
+    "task_time": "10:00:00+00:00",
+    "priority": "high",
+}
+
+
+class Session(NamedTuple):
+    """Credentials and tasks of the benchmark user."""
+
+    headers: Dict[str, str]
+    refresh_token: str
+    task_ids: List[int]
+
+
+Route = Callable[[AsyncClient, Session, int], Awaitable[Response]]
+
+
+async def signup(client: AsyncClient, session: Session, index: int) -> Response:
+    """
+    Create a new user.
+
+    :param client: client for the app.
+    :param session: the benchmark user.
+    :param index: number of the request.
+    :return: the response.
+    """
+    credentials = {"name": f"signup-{index}", "password": PASSWORD}
+    return await client.post("/api/User/create_user", json=credentials)
+
+
+async def login(client: AsyncClient, session: Session, index: int) -> Response:
+    """
+    Log the benchmark user in.
+
+    :param client: client for the app.
+    :param session: the benchmark user.
+    :param index: number of the request.
+    :return: the response.
+    """
+    credentials = {"name": "bench", "password": PASSWORD}
+    return await client.post("/api/User/user_login", json=credentials)
+
+
+async def refresh(client: AsyncClient, session: Session, index: int) -> Response:
+    """
+    Issue an access token from the refresh token.
+
+    :param client: client for the app.
+    :param session: the benchmark user.
+    :param index: number of the request.
+    :return: the response.
+    """
+    headers = {"refresh-token": session.refresh_token}
+    return await client.post("/api/User/token/refresh", headers=headers)
+
+
+async def create(client: AsyncClient, session: Session, index: int) -> Response:
+    """
+    Create a task.
+
+    :param client: client for the app.
+    :param session: the benchmark user.
+    :param index: number of the request.
+    :return: the response.
+    """
+    return await client.put(
+        "/api/document/task/create_task",
+        json=TASK,
+        headers=session.headers,
+    )
+
+
+async def sort(client: AsyncClient, session: Session, index: int) -> Response:
+    """
+    List the first page of sorted tasks.
+
+    :param client: client for the app.
+    :param session: the benchmark user.
+    :param index: number of the request.
+    :return: the response.
+    """
+    return await client.get(
+        "/api/document/task/sorting",
+        params={"limit": 50},
+        headers=session.headers,
+    )
+
+
+async def update(client: AsyncClient, session: Session, index: int) -> Response:
+    """
+    Edit a task.
+
+    :param client: client for the app.
+    :param session: the benchmark user.
+    :param index: number of the request.
+    :return: the response.
+    """
+    task_id = session.task_ids[index % len(session.task_ids)]
+    return await client.put(
+        f"/api/document/tasks/update/{task_id}",
+        json={"task_name": "edited", "task_date": "2023-01-01", "priority": "low"},
+        headers=session.headers,
+    )
+
+
+async def delete(client: AsyncClient, session: Session, index: int) -> Response:
+    """
+    Delete a task, each request a different one.
+
+    :param client: client for the app.
+    :param session: the benchmark user.
+    :param index: number of the request.
+    :return: the response.
+    """
+    task_id = session.task_ids[-1 - index]
+    return await client.delete(
+        f"/api/document/Documents/delete/{task_id}",
+        params={"id_value": task_id},
+        headers=session.headers,
+    )
+
+
+ROUTES: Dict[str, Route] = {
+    "signup": signup,
+    "login": login,
+    "refresh": refresh,
+    "create": create,
+    "sort": sort,
+    "update": update,
+    "delete": delete,
+}
+
+
+async def run_route(
+    client: AsyncClient,
+    session: Session,
+    route: Route,
+    args: argparse.Namespace,
+) -> Dict[str, Any]:
+    """
+    Send requests to one route with a fixed number of them in flight.
+
+    :param client: client for the app.
+    :param session: the benchmark user.
+    :param route: sends one request.
+    :param args: command line arguments.
+    :return: summary of the run with the number of failed requests.
+    """
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    failures: List[int] = []
+
+    async def one(index: int) -> None:  # noqa: WPS430
+        async with semaphore:
+            start = time.perf_counter()
+            response = await route(client, session, index)
+            latencies.append(time.perf_counter() - start)
+            if response.is_error:
+                failures.append(response.status_code)
+
+    requests = [one(index) for index in range(args.requests)]
+    start = time.perf_counter()
+    await asyncio.gather(*requests)
+    elapsed = time.perf_counter() - start
+    return {**summarize(latencies, elapsed), "errors": len(failures)}
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Run the benchmark.
+
+    :param args: command line arguments.
+    """
+    async with running_app() as (app, client):
+        credentials = {"name": "bench", "password": PASSWORD}
+        await client.post("/api/User/create_user", json=credentials)
+        tokens = (await client.post("/api/User/user_login", json=credentials)).json()
+        user_id = await seed_tasks(app, "bench", max(args.tasks, args.requests))
+        async with app.state.db_engine.connect() as conn:
+            task_ids = await conn.scalars(
+                text("SELECT id FROM tasks WHERE user_id = :user_id ORDER BY id"),
+                {"user_id": user_id},
+            )
+        session = Session(
+            {"Authorization": tokens["access_token"]},
+            tokens["refresh_token"],
+            list(task_ids),
+        )
+        report: Dict[str, Any] = {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "tasks": len(session.task_ids),
+            "routes": {},
+        }
+        for name in args.routes:
+            report["routes"][name] = await run_route(
+                client,
+                session,
+                ROUTES[name],
+                args,
+            )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=list(ROUTES))
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,97 @@
+"""
+Cold start of a worker.
+
+Starts ``--repeats`` fresh interpreters and times each phase of bringing a
+worker up: importing the application, building it, running the startup
+events and serving a first request. The modules imported on the first
+login, jose and passlib, are timed apart as they are no longer loaded at
+startup.
+
+Usage::
+
+    python -m benchmarks.startup --repeats 10
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+from typing import Dict, List
+
+from benchmarks.utils import running_app
+
+PROBE = """
+import asyncio, json, time
+
+start = time.perf_counter()
+from document_creation_task2.web.application import get_app
+imported = time.perf_counter()
+app = get_app()
+built = time.perf_counter()
+
+async def serve():
+    from httpx import AsyncClient
+
+    await app.router.startup()
+    started = time.perf_counter()
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+        await client.get("/api/health")
+    served = time.perf_counter()
+    from document_creation_task2.authentication.password import hashing
+    from document_creation_task2.services.user_service import _jwt
+    hashing()
+    _jwt()
+    loaded = time.perf_counter()
+    await app.router.shutdown()
+    return started, served, loaded
+
+started, served, loaded = asyncio.run(serve())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "build_ms": (built - imported) * 1000,
+    "startup_ms": (started - built) * 1000,
+    "first_request_ms": (served - started) * 1000,
+    "total_ms": (served - start) * 1000,
+    "auth_modules_ms": (loaded - served) * 1000,
+}))
+"""
+
+
+async def probe() -> Dict[str, float]:
+    """
+    Time the start of a worker in a fresh interpreter.
+
+    :return: duration of each phase in milliseconds.
+    """
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-c",
+        PROBE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    stdout, _ = await process.communicate()
+    return json.loads(stdout.decode().splitlines()[-1])
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Run the benchmark.
+
+    :param args: command line arguments.
+    """
+    runs: List[Dict[str, float]] = []
+    async with running_app():
+        for _ in range(args.repeats):
+            runs.append(await probe())
+    report = {
+        phase: round(statistics.median(run[phase] for run in runs), 1)
+        for phase in runs[0]
+    }
+    print(json.dumps(report, indent=2))  # noqa: WPS421
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,122 @@
+"""
+Memory and latency of listing the tasks of one user.
+
+Lists ``--tasks`` tasks, loading them as ORM entities encoded by FastAPI as
+before, and as plain rows of the listed columns encoded straight into the
+response. Latency is the median of ``--repeats`` runs and memory the peak
+allocated by one run, measured apart with tracemalloc.
+
+Usage::
+
+    python -m benchmarks.task_listing --tasks 100000 --repeats 5
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import UJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.utils import login, running_app, seed_tasks
+from document_creation_task2.db.DAO.dao_documents import DocumentDb
+from document_creation_task2.db.models.users import Task
+from document_creation_task2.services.document_service import LISTING_FIELDS, task_dicts
+
+Listing = Callable[[AsyncSession, int], Awaitable[bytes]]
+
+
+async def orm_listing(session: AsyncSession, user_id: int) -> bytes:
+    """
+    List tasks through ORM entities and FastAPI encoding.
+
+    :param session: database session.
+    :param user_id: owner of the tasks.
+    :return: body of the response.
+    """
+    tasks = await session.scalars(
+        select(Task)
+        .where(Task.user_id == user_id)
+        .order_by(Task.task_date, Task.task_time, Task.id),
+    )
+    documents = [
+        {field: getattr(task, field) for field in LISTING_FIELDS}
+        for task in tasks.all()
+    ]
+    return UJSONResponse(jsonable_encoder(documents)).body
+
+
+async def row_listing(session: AsyncSession, user_id: int) -> bytes:
+    """
+    List tasks through rows of the listed columns.
+
+    :param session: database session.
+    :param user_id: owner of the tasks.
+    :return: body of the response.
+    """
+    rows = await DocumentDb().tasks_db(session, user_id)
+    return UJSONResponse(task_dicts(rows, LISTING_FIELDS)).body
+
+
+async def measure(
+    session: AsyncSession,
+    user_id: int,
+    listing: Listing,
+    repeats: int,
+) -> Dict[str, Any]:
+    """
+    Measure a listing.
+
+    :param session: database session.
+    :param user_id: owner of the tasks.
+    :param listing: the listing.
+    :param repeats: number of timed runs.
+    :return: median latency, peak memory and size of the body.
+    """
+    durations = []
+    for _ in range(repeats):
+        session.expunge_all()
+        start = time.perf_counter()
+        body = await listing(session, user_id)
+        durations.append(time.perf_counter() - start)
+    session.expunge_all()
+    tracemalloc.start()
+    await listing(session, user_id)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    session.expunge_all()
+    return {
+        "median_ms": round(statistics.median(durations) * 1000, 1),
+        "peak_mb": round(peak / 2**20, 1),
+        "body_bytes": len(body),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Run the benchmark.
+
+    :param args: command line arguments.
+    """
+    async with running_app() as (app, client):
+        await login(client, "bench")
+        user_id = await seed_tasks(app, "bench", args.tasks)
+        async with app.state.db_session_factory() as session:
+            report = {
+                "tasks": args.tasks,
+                "orm": await measure(session, user_id, orm_listing, args.repeats),
+                "rows": await measure(session, user_id, row_listing, args.repeats),
+            }
+    print(json.dumps(report, indent=2))  # noqa: WPS421
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,67 @@
+"""
+Microbenchmark of token authentication.
+
+Measures the cost of ``get_current_user`` per request with a cold token
+cache, where every call checks revocations and decodes the token, and with
+a warm cache.
+
+Usage::
+
+    python -m benchmarks.token_auth --iterations 2000
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict
+
+from benchmarks.utils import login, running_app
+from document_creation_task2.services.cache import auth_key, cache
+from document_creation_task2.services.user_service import get_current_user
+
+
+async def measure(session: Any, token: str, iterations: int, cached: bool) -> float:
+    """
+    Authenticate the same token many times.
+
+    :param session: database session.
+    :param token: access token.
+    :param iterations: number of authentications.
+    :param cached: whether the token cache is kept between calls.
+    :return: mean cost of one authentication in microseconds.
+    """
+    await cache.delete(auth_key(token))
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if not cached:
+            await cache.delete(auth_key(token))
+        await get_current_user(token, session)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Run the benchmark.
+
+    :param args: command line arguments.
+    """
+    async with running_app() as (app, client):
+        token = (await login(client, "bench"))["Authorization"]
+        async with app.state.db_session_factory() as session:
+            uncached = await measure(session, token, args.iterations, cached=False)
+            cached = await measure(session, token, args.iterations, cached=True)
+            stats = cache.stats()
+    report: Dict[str, Any] = {
+        "iterations": args.iterations,
+        "uncached_us": round(uncached, 2),
+        "cached_us": round(cached, 2),
+        "speedup": round(uncached / cached, 1),
+        "cache": stats,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
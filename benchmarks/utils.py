@@ -0,0 +1,112 @@
+import math
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Tuple
+
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from document_creation_task2.db.meta import meta
+from document_creation_task2.db.models import load_all_models
+from document_creation_task2.db.utils import create_database, drop_database
+from document_creation_task2.settings import settings
+from document_creation_task2.web.application import get_app
+
+SEED_TASKS = text(
+    "INSERT INTO tasks "
+    "(task_name, task_date, task_time, priority, created_time, is_complete, user_id) "
+    "SELECT 'task ' || n, DATE '2023-01-01' + n % 365, "
+    "TIME WITH TIME ZONE '00:00+00' + (n % 1440) * INTERVAL '1 minute', "
+    "'medium', now(), 'Not Completed', :user_id "
+    "FROM generate_series(1, :count) AS n",
+)
+
+
+@asynccontextmanager
+async def running_app() -> AsyncIterator[Tuple[FastAPI, AsyncClient]]:
+    """
+    Start the application on a fresh benchmark database.
+
+    :yield: started application and a client for it.
+    """
+    load_all_models()
+    await create_database()
+    engine = create_async_engine(str(settings.db_url))
+    async with engine.begin() as conn:
+        await conn.run_sync(meta.create_all)
+    await engine.dispose()
+
+    app = get_app()
+    await app.router.startup()
+    try:
+        async with AsyncClient(app=app, base_url="http://bench") as client:
+            yield app, client
+    finally:
+        await app.router.shutdown()
+        await drop_database()
+
+
+async def login(client: AsyncClient, name: str) -> Dict[str, str]:
+    """
+    Create a user and log it in.
+
+    :param client: client for the app.
+    :param name: name of the user.
+    :return: authorization headers of the user.
+    """
+    credentials = {"name": name, "password": f"{name}-password"}
+    await client.post("/api/User/create_user", json=credentials)
+    response = await client.post("/api/User/user_login", json=credentials)
+    return {"Authorization": response.json()["access_token"]}
+
+
+async def seed_tasks(app: FastAPI, name: str, count: int) -> int:
+    """
+    Insert tasks for a user straight into the database.
+
+    :param app: started application.
+    :param name: name of the owner.
+    :param count: number of tasks to insert.
+    :return: id of the owner.
+    """
+    async with app.state.db_engine.begin() as conn:
+        user_id = await conn.scalar(
+            text("SELECT id FROM user_det WHERE name = :name"),
+            {"name": name},
+        )
+        await conn.execute(SEED_TASKS, {"user_id": user_id, "count": count})
+    return int(user_id)
+
+
+def percentile(samples: List[float], quantile: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    :param samples: measured values.
+    :param quantile: wanted quantile between 0 and 1.
+    :return: the percentile, 0 for no samples.
+    """
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    rank = math.ceil(quantile * len(ordered)) - 1
+    return ordered[max(rank, 0)]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """
+    Summarize latencies of a benchmark run.
+
+    :param latencies: latencies in seconds.
+    :param elapsed: wall time of the run in seconds.
+    :return: request count, throughput and latency percentiles in ms.
+    """
+    throughput = len(latencies) / elapsed if elapsed else 0
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(throughput, 2),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
@@ -1,10 +1,17 @@
 import uvicorn
 
-from document_creation_task2.settings import settings
+from document_creation_task2.settings import ServerMode, settings
 
 
 def main() -> None:
     """Entrypoint of the application."""
+    if settings.server_mode == ServerMode.PRODUCTION:
+        from document_creation_task2.gunicorn_runner import (  # noqa: WPS433
+            run_production,
+        )
+
+        run_production()
+        return
     uvicorn.run(
         "document_creation_task2.web.application:get_app",
         workers=settings.workers_count,
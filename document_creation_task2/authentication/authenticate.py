@@ -1,22 +1,24 @@
-from typing import Any, Union
+from typing import Union
 
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import APIKeyHeader
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from document_creation_task2.authentication.password import password_hasher
+from document_creation_task2.db.DAO.dao_user import UserDb
 from document_creation_task2.db.dependencies import get_db_session as get_db
+from document_creation_task2.db.dependencies import pin_to_primary
 from document_creation_task2.db.models.users import UserDet
+from document_creation_task2.services.rate_limit import enforce_rate_limit
 from document_creation_task2.services.user_service import get_current_user
 
-hashing = CryptContext(schemes=["bcrypt"])
 api_key = APIKeyHeader(name="Authorization", auto_error=True)
 
 
-def authentic(
+async def authentic(
     name: str,
     password: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Union[UserDet, bool]:
     """
     Validate username and password.
@@ -27,11 +29,13 @@ def authentic(
 
     :returns:details of the valid user.
     """
-    username = db.query(UserDet).filter(UserDet.name == name).first()
+    username = await UserDb().get_user(name, db)
 
     if not username:
         return False
-    data = hashing.verify(
+    # Give the connection back to the pool while bcrypt runs.
+    await db.commit()
+    data = await password_hasher.verify_password(
         password,
         str(username.password),
     )
@@ -40,14 +44,17 @@ def authentic(
     return username
 
 
-def token_authenticate(
+async def token_authenticate(
     request: Request,
-    token: Any = api_key,
-    db: Session = Depends(get_db),
+    token: str = Depends(api_key),
+    db: AsyncSession = Depends(get_db),
 ) -> str:
     """
     Authenticate the API key token and return the ID of the current user.
 
+    The request is then counted against the rate limit of the user, and
+    pins the reads of the user to the primary when it may write.
+
     :param request: FastAPI request object.
     :param token: Authorization token. Defaults to API key from headers.
     :param db: Database session. Defaults to Depends(get_db).
@@ -59,4 +66,7 @@ def token_authenticate(
     token_value = token
     if not token_value:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-    return get_current_user(token_value, db)
+    user_id = await get_current_user(token_value, db)
+    await enforce_rate_limit(request, user_id)
+    await pin_to_primary(request, user_id)
+    return user_id
@@ -0,0 +1,108 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+from document_creation_task2.settings import settings
+
+ResultType = TypeVar("ResultType")
+
+
+@lru_cache(maxsize=None)
+def hashing() -> Any:
+    """
+    Context hashing passwords, built on first use.
+
+    passlib is imported here so that starting a worker does not load it.
+
+    :returns: the CryptContext.
+    """
+    from passlib import context  # noqa: WPS433
+
+    return context.CryptContext(schemes=["bcrypt"])
+
+
+def _hash(password: str) -> str:
+    return hashing().hash(password)
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return hashing().verify(password, hashed)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop.
+
+    Hashing happens in a bounded pool of ``password_hash_workers`` workers.
+    At most ``password_hash_queue`` more calls may wait for a worker,
+    any call above that is rejected with 503.
+    """
+
+    def __init__(self) -> None:
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+
+    async def run(self, func: Callable[..., ResultType], *args: Any) -> ResultType:
+        """
+        Run a function in the pool.
+
+        :param func: function to run.
+        :param args: arguments of the function.
+        :returns: result of the function.
+        :raises HTTPException: the queue of the pool is full.
+        """
+        limit = settings.password_hash_workers + settings.password_hash_queue
+        if self.pending >= limit:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many password checks in progress",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:  # noqa: WPS501
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash_password(self, password: str) -> str:
+        """
+        Hash a password.
+
+        :param password: plain password.
+        :returns: bcrypt hash.
+        """
+        return await self.run(_hash, password)
+
+    async def verify_password(self, password: str, hashed: str) -> bool:
+        """
+        Check a password against its hash.
+
+        :param password: plain password.
+        :param hashed: stored bcrypt hash.
+        :returns: whether the password matches.
+        """
+        return await self.run(_verify, password, hashed)
+
+    def shutdown(self) -> None:
+        """Stop the pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if settings.password_hash_processes:
+                self._executor = ProcessPoolExecutor(settings.password_hash_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    settings.password_hash_workers,
+                    thread_name_prefix="password-hash",
+                )
+        return self._executor
+
+
+password_hasher = PasswordHasher()
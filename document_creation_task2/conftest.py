@@ -1,4 +1,14 @@
-from typing import Any, AsyncGenerator
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial
+from typing import (  # noqa: WPS235
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+)
 
 import pytest
 from fastapi import FastAPI
@@ -10,8 +20,15 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
-from document_creation_task2.db.dependencies import get_db_session
+from document_creation_task2.db.dependencies import get_db_session, get_read_sessions
+from document_creation_task2.db.recorder import (
+    QueryRecorder,
+    record_queries,
+    watch_engine,
+)
 from document_creation_task2.db.utils import create_database, drop_database
+from document_creation_task2.services.cache import MemoryBackend, cache
+from document_creation_task2.services.rate_limit import MemoryBuckets, rate_limiter
 from document_creation_task2.settings import settings
 from document_creation_task2.web.application import get_app
 
@@ -41,6 +58,7 @@ async def _engine() -> AsyncGenerator[AsyncEngine, None]:
     await create_database()
 
     engine = create_async_engine(str(settings.db_url))
+    watch_engine(engine)
     async with engine.begin() as conn:
         await conn.run_sync(meta.create_all)
 
@@ -77,10 +95,16 @@ async def dbsession(
         yield session
     finally:
         await session.close()
-        await trans.rollback()
+        if trans.is_active:
+            await trans.rollback()
         await connection.close()
 
 
+@asynccontextmanager
+async def _test_session(session: AsyncSession) -> AsyncIterator[AsyncSession]:
+    yield session
+
+
 @pytest.fixture
 def fastapi_app(
     dbsession: AsyncSession,
@@ -90,8 +114,14 @@ def fastapi_app(
 
     :return: fastapi app with mocked dependencies.
     """
+    cache.use(MemoryBackend())
+    rate_limiter.use(MemoryBuckets())
     application = get_app()
     application.dependency_overrides[get_db_session] = lambda: dbsession
+    application.dependency_overrides[get_read_sessions] = lambda: partial(
+        _test_session,
+        dbsession,
+    )
     return application  # noqa: WPS331
 
 
@@ -108,3 +138,40 @@ async def client(
     """
     async with AsyncClient(app=fastapi_app, base_url="http://test") as ac:
         yield ac
+
+
+@pytest.fixture
+async def auth_headers(client: AsyncClient) -> Dict[str, str]:
+    """
+    Create a user and log it in.
+
+    :param client: client for the app.
+    :return: headers with the access token of the new user.
+    """
+    credentials = {"name": "pytest-user", "password": "pytest-password"}
+    await client.post("/api/User/create_user", json=credentials)
+    response = await client.post("/api/User/user_login", json=credentials)
+    return {"Authorization": response.json()["access_token"]}
+
+
+@pytest.fixture
+def max_queries() -> Callable[[int], ContextManager[QueryRecorder]]:
+    """
+    Check how many statements a block runs.
+
+    Usage::
+
+        with max_queries(2):
+            await client.get(url)
+
+    :return: context manager failing when the block runs more statements.
+    """
+
+    @contextmanager
+    def check(limit: int) -> Iterator[QueryRecorder]:  # noqa: WPS430
+        with record_queries() as recorder:
+            yield recorder
+            statements = [statement for statement, _, _ in recorder.statements]
+            assert recorder.count <= limit, statements
+
+    return check
@@ -1,17 +1,49 @@
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
 from fastapi import HTTPException, status
+from sqlalchemy import (  # noqa: WPS235
+    ARRAY,
+    Integer,
+    Row,
+    any_,
+    bindparam,
+    delete,
+    insert,
+    select,
+    text,
+    tuple_,
+    update,
+)
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from document_creation_task2.db.models.users import Task
+from document_creation_task2.db.models.users import Task, UserDet
 from document_creation_task2.documents.document_schema import TaskDetail
+from document_creation_task2.services.coalescing import coalescer
+from document_creation_task2.settings import settings
+
+LISTING_COLUMNS: Tuple[Any, ...] = (
+    Task.task_name,
+    Task.task_date,
+    Task.task_time,
+    Task.priority,
+    Task.created_time,
+    Task.is_complete,
+)
+EXPORT_COLUMNS: Tuple[Any, ...] = (Task.id, *LISTING_COLUMNS)
+TASK_COLUMNS: Tuple[Any, ...] = (*EXPORT_COLUMNS, Task.user_id)
 
 
 class DocumentDb:
     """Class for documents db methods."""
 
-    def create_task(self, task_data: Any, db: Any, ids: int) -> Dict[str, Any]:
+    async def create_task(
+        self,
+        task_data: Any,
+        db: AsyncSession,
+        ids: int,
+    ) -> Dict[str, Any]:
         """
         To create a task.
 
@@ -34,7 +66,7 @@ class DocumentDb:
                 is_complete="Not Completed",
             )
             db.add(new_task)
-            db.commit()
+            await self._commit_write(db, ids)
             return {
                 "status": "success",
                 "message": "successfully created a document",
@@ -52,7 +84,54 @@ class DocumentDb:
                 detail=f"Database Exception: {SQLAlchemyError}",
             )
 
-    def update_func(self, ids: int, db: Any) -> Dict[str, Any]:
+    async def bulk_create_tasks(
+        self,
+        tasks: Sequence[Any],
+        db: AsyncSession,
+        ids: int,
+    ) -> List[int]:
+        """
+        Create many tasks in one transaction.
+
+        Small batches are inserted with a single multi-row
+        INSERT ... RETURNING id, batches of ``task_bulk_copy_threshold``
+        tasks or more are loaded with COPY.
+
+        :param tasks:Validated details of the tasks.
+        :param db:The session.
+        :param ids:The user id.
+
+        :returns:ids of the new tasks, in the order of the input.
+
+        :raises HTTPException:Server error.
+        """
+        if not tasks:
+            return []
+        created_time = datetime.utcnow()
+        rows = [
+            {
+                "task_name": task.task_name,
+                "task_date": task.task_date,
+                "task_time": task.task_time,
+                "priority": task.priority,
+                "created_time": created_time,
+                "user_id": ids,
+                "is_complete": "Not Completed",
+            }
+            for task in tasks
+        ]
+        try:
+            new_ids = await self._insert_tasks(rows, db)
+            await self._commit_write(db, ids)
+        except Exception:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to create tasks",
+            )
+        return new_ids
+
+    async def update_func(self, ids: int, db: AsyncSession) -> Dict[str, Any]:
         """
         For changing to status completed the task.
 
@@ -61,11 +140,14 @@ class DocumentDb:
 
         :returns:The status of the operation.
         """
-        db.query(Task).filter(Task.id == ids).update(
-            {Task.is_complete: "Completed"},
-            synchronize_session=False,
+        owner = await db.scalar(
+            update(Task)
+            .where(Task.id == ids)
+            .values(is_complete="Completed")
+            .returning(Task.user_id)
+            .execution_options(synchronize_session=False),
         )
-        db.commit()
+        await self._commit_write(db, owner)
         return {
             "status": "success",
             "message": "successfully updated task completion.",
@@ -73,28 +155,142 @@ class DocumentDb:
             "error": False,
         }
 
-    def tasks_db(self, db: Any, ids: int) -> List[Task]:
+    async def update_tasks(
+        self,
+        db: AsyncSession,
+        ids: int,
+        task_ids: List[int],
+        changes: Dict[str, Any],
+    ) -> List[int]:
+        """
+        Update many tasks of a user in one statement.
+
+        :param db:The session.
+        :param ids:User id.
+        :param task_ids:The document ids.
+        :param changes:New values of the columns.
+
+        :returns:ids of the updated documents.
+        """
+        updated = await db.scalars(
+            update(Task)
+            .where(
+                Task.id == any_(bindparam("task_ids", task_ids, ARRAY(Integer))),
+                Task.user_id == ids,
+            )
+            .values(**changes)
+            .returning(Task.id)
+            .execution_options(synchronize_session=False),
+        )
+        updated_ids = list(updated.all())
+        if updated_ids:
+            await self._commit_write(db, ids)
+        return updated_ids
+
+    async def tasks_db(  # noqa: WPS211
+        self,
+        db: AsyncSession,
+        ids: int,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[Any, ...]] = None,
+        pending: bool = False,
+    ) -> Sequence[Row]:  # type: ignore
         """
         Order the document list.
 
+        Tasks are ordered by (task_date, task_time, id), so a page starts
+        right after the sort key of the last task of the previous page.
+        Only LISTING_COLUMNS and the id are loaded, as plain rows.
+
         :param db:The session.
         :param ids:User id.
+        :param limit:Maximum number of tasks, all of them if None.
+        :param after:Sort key of the last task of the previous page.
+        :param pending:Only return tasks that are not completed.
 
         :returns:sorted documents.
 
         :raises HTTPException:No Content.
         """
-        tasks = (
-            db.query(Task)
-            .filter(Task.user_id == ids)
-            .order_by(Task.task_date, Task.task_time)
-            .all()
+        query = (
+            select(*LISTING_COLUMNS, Task.id)
+            .where(Task.user_id == ids)
+            .order_by(Task.task_date, Task.task_time, Task.id)
+            .limit(limit)
         )
-        if not tasks:
+        if after is not None:
+            query = query.where(
+                tuple_(Task.task_date, Task.task_time, Task.id) > tuple_(*after),
+            )
+        if pending:
+            query = query.where(Task.is_complete != "Completed")
+        tasks = await db.execute(query)
+        task_list = tasks.all()
+        if not task_list and after is None:
             raise HTTPException(status_code=status.HTTP_204_NO_CONTENT)
-        return tasks
+        return task_list
 
-    def update_det(self, task: Any, task_data: Any, db: Any) -> TaskDetail:
+    async def stream_tasks(
+        self,
+        db: AsyncSession,
+        ids: int,
+        batch: int,
+    ) -> AsyncIterator[Sequence[Row]]:  # type: ignore
+        """
+        Stream the documents of a user through a server-side cursor.
+
+        :param db:The session.
+        :param ids:User id.
+        :param batch:Number of documents fetched at once.
+
+        :yields:batches of sorted documents.
+        """
+        result = await db.stream(
+            select(*EXPORT_COLUMNS)
+            .where(Task.user_id == ids)
+            .order_by(Task.task_date, Task.task_time, Task.id)
+            .execution_options(yield_per=batch),
+        )
+        async for partition in result.partitions():
+            yield partition
+
+    async def user_task(
+        self,
+        db: AsyncSession,
+        ids: int,
+        task_id: int,
+    ) -> List[Row]:  # type: ignore
+        """
+        Get a single task of a user.
+
+        :param db:The session.
+        :param ids:User id.
+        :param task_id:The document id.
+
+        :returns:the matching documents, as rows of TASK_COLUMNS.
+        """
+        tasks = await db.execute(
+            select(*TASK_COLUMNS).where(Task.user_id == ids, Task.id == task_id),
+        )
+        return list(tasks.all())
+
+    async def get_task(self, db: AsyncSession, task_id: int) -> Any:
+        """
+        Get a task by its id.
+
+        :param db:The session.
+        :param task_id:The document id.
+
+        :returns:the task or None.
+        """
+        return await db.scalar(select(Task).where(Task.id == task_id))
+
+    async def update_det(
+        self,
+        task: Any,
+        task_data: Any,
+        db: AsyncSession,
+    ) -> TaskDetail:
         """
         Update the documents.
 
@@ -108,7 +304,7 @@ class DocumentDb:
         task.task_name = task_data.task_name
         task.task_date = task_data.task_date
         task.priority = task_data.priority
-        db.commit()
+        await self._commit_write(db, task.user_id)
 
         return TaskDetail(
             task_name=task.task_name,
@@ -118,7 +314,7 @@ class DocumentDb:
             is_complete=task.is_complete,
         )
 
-    def delete_rows_db(self, ids: int, db: Any) -> None:
+    async def delete_rows_db(self, ids: int, db: AsyncSession) -> None:
         """
         Delete a row.
 
@@ -126,17 +322,127 @@ class DocumentDb:
         :param db:The session.
         :raises HTTPException:The unauthorized user.
         """
-        data = db.query(Task).filter(ids == Task.id).first()
-        if not data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No Content",
-            )
-        task_to_delete = db.query(Task).filter(Task.id == ids).first()
-        if not task_to_delete:
+        deleted = await db.execute(
+            delete(Task).where(Task.id == ids).returning(Task.user_id),
+        )
+        owner = deleted.first()
+        if owner is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No Content",
             )
-        db.delete(task_to_delete)
-        db.commit()
+        await self._commit_write(db, owner.user_id)
+
+    async def clear_tasks(self, db: AsyncSession, ids: int, chunk: int) -> int:
+        """
+        Delete every task of a user.
+
+        Tasks are deleted ``chunk`` at a time and every chunk is committed
+        on its own, so locks are held only briefly.
+
+        :param db:The session.
+        :param ids:User id.
+        :param chunk:Number of tasks deleted per transaction.
+        :returns:number of deleted tasks.
+        """
+        batch = select(Task.id).where(Task.user_id == ids)
+        statement = (
+            delete(Task)
+            .where(Task.id.in_(batch.limit(chunk).scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        total = 0
+        while True:  # noqa: WPS457
+            deleted = await db.execute(statement)
+            if deleted.rowcount:  # type: ignore
+                await self._commit_write(db, ids)
+            total += deleted.rowcount  # type: ignore
+            if deleted.rowcount < chunk:  # type: ignore
+                return total
+
+    async def task_version(self, db: AsyncSession, ids: int) -> int:
+        """
+        Version of the tasks of a user.
+
+        The version changes whenever a task of the user is created, edited
+        or deleted.
+
+        :param db:The session.
+        :param ids:User id.
+        :returns:the version.
+        """
+        version = await db.scalar(
+            select(UserDet.tasks_version).where(UserDet.id == ids),
+        )
+        return version or 0
+
+    async def _commit_write(self, db: AsyncSession, ids: Any) -> None:
+        """
+        Commit a change of the tasks of a user.
+
+        The version of the tasks is bumped in the same transaction, which
+        moves the cached listings to new keys. Once the change is visible,
+        the reads of the user in flight are no longer joined.
+
+        :param db:The session.
+        :param ids:User id.
+        """
+        await db.execute(
+            update(UserDet)
+            .where(UserDet.id == ids)
+            .values(tasks_version=UserDet.tasks_version + 1),
+        )
+        await db.commit()
+        coalescer.forget(ids)
+
+    async def _insert_tasks(
+        self,
+        rows: List[Dict[str, Any]],
+        db: AsyncSession,
+    ) -> List[int]:
+        if len(rows) >= settings.task_bulk_copy_threshold:
+            return await self._copy_tasks(rows, db)
+        statement = insert(Task).values(rows).returning(Task.id)
+        return list((await db.scalars(statement)).all())
+
+    async def _copy_tasks(
+        self,
+        rows: List[Dict[str, Any]],
+        db: AsyncSession,
+    ) -> List[int]:
+        """
+        Load tasks with COPY.
+
+        COPY cannot return generated ids, so they are taken from the
+        sequence of the table first.
+
+        :param rows:Values of the tasks.
+        :param db:The session.
+
+        :returns:ids of the new tasks.
+        """
+        reserved = await db.scalars(
+            text(
+                "SELECT nextval(pg_get_serial_sequence('tasks', 'id')) "
+                "FROM generate_series(1, :count)",
+            ),
+            {"count": len(rows)},
+        )
+        new_ids = list(reserved.all())
+        connection = await (await db.connection()).get_raw_connection()
+        await connection.driver_connection.copy_records_to_table(  # type: ignore
+            Task.__tablename__,
+            records=_with_ids(new_ids, rows),
+            columns=["id", *rows[0].keys()],
+        )
+        return new_ids
+
+
+def _with_ids(
+    ids: List[int],
+    rows: List[Dict[str, Any]],
+) -> List[Tuple[Any, ...]]:
+    records = []
+    for task_id, row in zip(ids, rows):
+        records.append((task_id, *row.values()))
+    return records
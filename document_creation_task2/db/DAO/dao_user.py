@@ -1,17 +1,31 @@
-from typing import Any, Dict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
 
 from fastapi import HTTPException, status
-from passlib.context import CryptContext
+from sqlalchemy import Insert, delete, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from document_creation_task2.db.models.users import RevokedToken, UserDet
+from document_creation_task2.authentication.password import password_hasher
+from document_creation_task2.db.models.users import RevokedToken, Token, UserDet
+from document_creation_task2.settings import settings
 
-hashing = CryptContext(schemes=["bcrypt"])
+
+async def _insert_batches(
+    db: AsyncSession,
+    statement: Insert,
+    rows: List[Dict[str, Any]],
+) -> None:
+    size = settings.write_behind_batch
+    for start in range(0, len(rows), size):
+        batch = rows[start : start + size]
+        await db.execute(statement.values(batch))
 
 
 class UserDb:
     """Class for user database methods."""
 
-    def create_users(self, request: Any, db: Any) -> Dict[str, Any]:
+    async def create_users(self, request: Any, db: AsyncSession) -> Dict[str, Any]:
         """Create user account.
 
         :param request:The user details.
@@ -19,13 +33,11 @@ class UserDb:
         :returns:The response status.
         :raises HTTPException:Not created.
         """
+        hashed = await password_hasher.hash_password(request.password)
         try:
-            new_user = UserDet(
-                name=request.name,
-                password=hashing.hash(request.password),
-            )
+            new_user = UserDet(name=request.name, password=hashed)
             db.add(new_user)
-            db.commit()
+            await db.commit()
             return {
                 "status": "success",
                 "message": "successfully created a new user",
@@ -33,27 +45,135 @@ class UserDb:
                 "error": False,
             }
         except Exception:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Not Created",
             )
 
-    def revoked_token(self, token: Any, db: Any) -> None:
+    async def get_user(self, name: str, db: AsyncSession) -> Optional[UserDet]:
+        """
+        Find a user by name.
+
+        :param name:Name of the user.
+        :param db:The session db.
+        :returns:The user or None.
+        """
+        query = select(UserDet).where(UserDet.name == name).limit(1)
+        return await db.scalar(query)
+
+    async def add_token(self, token: str, user_id: Any, db: AsyncSession) -> None:
+        """
+        Store an issued access token.
+
+        :param token:The access token.
+        :param user_id:The owner of the token.
+        :param db:The session db.
+        """
+        db.add(Token(accesstype=token, user_id=user_id))
+        await db.commit()
+
+    async def revoke_token(
+        self,
+        jti: str,
+        expires_at: datetime,
+        db: AsyncSession,
+    ) -> None:
+        """
+        Revoke a token.
+
+        Revocations stored meanwhile, for instance by a batch of the
+        write-behind queue, are reported instead of failing the insert.
+
+        :param jti:The id of the token to revoke.
+        :param expires_at:The expiration of the token.
+        :param db:The session db.
+
+        :raises HTTPException: Token already revoked.
+        """
+        revoked = await db.scalar(
+            pg_insert(RevokedToken)
+            .values(jti=jti, expires_at=expires_at)
+            .on_conflict_do_nothing()
+            .returning(RevokedToken.jti),
+        )
+        await db.commit()
+        if revoked is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has already been revoked",
+            )
+
+    async def write_batch(
+        self,
+        tokens: List[Dict[str, Any]],
+        revocations: Dict[str, datetime],
+        db: AsyncSession,
+    ) -> None:
+        """
+        Store issued tokens and revocations in one transaction.
+
+        Rows are inserted with multi-row INSERTs of at most
+        ``write_behind_batch`` rows. Revocations stored already are skipped.
+
+        :param tokens:Columns of the issued tokens.
+        :param revocations:Expirations of the revoked token ids.
+        :param db:The session db.
+        """
+        revoked = [
+            {"jti": jti, "expires_at": expires_at}
+            for jti, expires_at in revocations.items()
+        ]
+        await _insert_batches(db, insert(Token), tokens)
+        await _insert_batches(
+            db,
+            pg_insert(RevokedToken).on_conflict_do_nothing(),
+            revoked,
+        )
+        await db.commit()
+
+    async def revoked_token(self, jti: str, db: AsyncSession) -> None:
         """
          To find the user id of current active user.
 
-        :param token: The token of the current user.
+        :param jti: The id of the token of the current user.
 
         :param db:The session db.
 
         :raises HTTPException: Unauthorized User.
         """
-        revoked_token = (
-            db.query(RevokedToken).filter(RevokedToken.token == token).first()
+        revoked_token = await db.scalar(
+            select(RevokedToken.jti).where(RevokedToken.jti == jti),
         )
-        if revoked_token:
+        if revoked_token is not None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token has been revoked",
             )
+
+    async def revoked_ids(self, db: AsyncSession) -> Sequence[str]:
+        """
+        Ids of the revoked tokens that did not expire yet.
+
+        :param db:The session db.
+        :returns:The token ids.
+        """
+        revoked = await db.scalars(
+            select(RevokedToken.jti).where(
+                RevokedToken.expires_at >= datetime.utcnow(),
+            ),
+        )
+        return revoked.all()
+
+    async def purge_revoked(self, db: AsyncSession) -> int:
+        """
+        Delete revocations of expired tokens.
+
+        :param db:The session db.
+        :returns:The number of deleted revocations.
+        """
+        purged = await db.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at < datetime.utcnow()),
+        )
+        await db.commit()
+        return purged.rowcount  # type: ignore
@@ -1,16 +1,45 @@
-from typing import AsyncGenerator
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Any, AsyncContextManager, AsyncGenerator, AsyncIterator, Callable
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
+from starlette.responses import Response
 
+from document_creation_task2.services.cache import cache, primary_key
+from document_creation_task2.settings import settings
 
-async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+PRIMARY_PIN_COOKIE = "db-primary-until"
+READ_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+# Opens a database session, closed when the context exits.
+SessionOpener = Callable[[], AsyncContextManager[AsyncSession]]
+
+
+async def get_db_session(
+    request: Request,
+    response: Response,
+) -> AsyncGenerator[AsyncSession, None]:
     """
     Create and get database session.
 
+    Requests that may write pin the client to the primary for
+    ``db_primary_pin_seconds`` with a cookie, a hint for clients keeping
+    cookies. Authenticated ones also pin their user, see ``pin_to_primary``.
+
     :param request: current request.
+    :param response: response of the request.
     :yield: database session.
     """
+    if request.method not in READ_METHODS and settings.db_replica_urls:
+        pinned_until = time.time() + settings.db_primary_pin_seconds
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE,
+            str(pinned_until),
+            max_age=int(settings.db_primary_pin_seconds) + 1,
+            httponly=True,
+        )
     session: AsyncSession = request.app.state.db_session_factory()
 
     try:  # noqa: WPS501
@@ -18,3 +47,70 @@ async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]
     finally:
         await session.commit()
         await session.close()
+
+
+async def pin_to_primary(request: Request, user_id: Any) -> None:
+    """
+    Remember the user of a request.
+
+    Reads of a user who sent a request that may write go to the primary
+    for ``db_primary_pin_seconds``, so they see the write whether or not
+    the client keeps cookies. Users are marked in the cache, which must be
+    shared for the reads served by other workers.
+
+    :param request: current request.
+    :param user_id: id of the authenticated user.
+    """
+    request.state.user_id = user_id
+    if request.method not in READ_METHODS and settings.db_replica_urls:
+        await cache.set(primary_key(user_id), 1, settings.db_primary_pin_seconds)
+
+
+def get_read_sessions(request: Request) -> SessionOpener:
+    """
+    Get an opener of read-only database sessions.
+
+    Reads shared between requests may outlive the request that started
+    them, so they open and close their own session instead of using one
+    closed when that request ends. Sessions are opened once the user of the
+    request is known.
+
+    :param request: current request.
+    :returns: function opening sessions with ``read_session``.
+    """
+    return partial(read_session, request)
+
+
+@asynccontextmanager
+async def read_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Open a read-only database session for a request.
+
+    The session is opened on a read replica unless the user or the client
+    wrote recently or no replica is available.
+
+    :param request: current request.
+    :yields: session on a replica, or on the primary.
+    """
+    if await _pinned_to_primary(request):
+        session: AsyncSession = request.app.state.db_session_factory()
+    else:
+        session = await request.app.state.db_read_router.session()
+
+    try:  # noqa: WPS501
+        yield session
+    finally:
+        await session.close()
+
+
+async def _pinned_to_primary(request: Request) -> bool:
+    if not settings.db_replica_urls:
+        return False
+    user_id = getattr(request.state, "user_id", None)
+    if user_id is not None and await cache.get(primary_key(user_id)):
+        return True
+    pinned_until = request.cookies.get(PRIMARY_PIN_COOKIE)
+    try:
+        return pinned_until is not None and float(pinned_until) > time.time()
+    except ValueError:
+        return False
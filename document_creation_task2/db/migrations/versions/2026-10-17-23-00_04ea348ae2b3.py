@@ -0,0 +1,68 @@
+"""Create base tables.
+
+The initial migration was empty, so databases were created from the models.
+Tables that already exist are left untouched.
+
+Revision ID: 04ea348ae2b3
+Revises: 819cbf6e030b
+Create Date: 2026-10-17 23:00:12.381520
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "04ea348ae2b3"
+down_revision = "819cbf6e030b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if "user_det" not in existing:
+        op.create_table(
+            "user_det",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("password", sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    if "token" not in existing:
+        op.create_table(
+            "token",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("accesstype", sa.String(), nullable=True),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["user_det.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+    if "tasks" not in existing:
+        op.create_table(
+            "tasks",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("task_name", sa.String(), nullable=True),
+            sa.Column("task_date", sa.Date(), nullable=True),
+            sa.Column("task_time", sa.Time(timezone=True), nullable=True),
+            sa.Column("priority", sa.String(), nullable=True),
+            sa.Column("created_time", sa.DateTime(), nullable=True),
+            sa.Column("is_complete", sa.String(), nullable=True),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["user_det.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_tasks_id", "tasks", ["id"])
+    if "revoked_tokens" not in existing:
+        op.create_table(
+            "revoked_tokens",
+            sa.Column("token", sa.String(), nullable=False),
+            sa.PrimaryKeyConstraint("token"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("revoked_tokens")
+    op.drop_index("ix_tasks_id", table_name="tasks")
+    op.drop_table("tasks")
+    op.drop_table("token")
+    op.drop_table("user_det")
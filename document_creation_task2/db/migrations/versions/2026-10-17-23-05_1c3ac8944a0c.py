@@ -0,0 +1,52 @@
+"""Identify revoked tokens by jti and expiry.
+
+Existing rows are keyed by the SHA-256 of the token, which is the id used
+for tokens issued without a jti claim, and kept for the longest token
+lifetime.
+
+Revision ID: 1c3ac8944a0c
+Revises: 04ea348ae2b3
+Create Date: 2026-10-17 23:05:41.906214
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "1c3ac8944a0c"
+down_revision = "04ea348ae2b3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("revoked_tokens", sa.Column("jti", sa.String(), nullable=True))
+    op.add_column(
+        "revoked_tokens",
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+    )
+    op.execute(
+        "UPDATE revoked_tokens SET "
+        "jti = encode(sha256(convert_to(token, 'UTF8')), 'hex'), "
+        "expires_at = timezone('utc', now()) + interval '30 minutes'",
+    )
+    op.drop_constraint("revoked_tokens_pkey", "revoked_tokens", type_="primary")
+    op.drop_column("revoked_tokens", "token")
+    op.alter_column("revoked_tokens", "jti", nullable=False)
+    op.alter_column("revoked_tokens", "expires_at", nullable=False)
+    op.create_primary_key("revoked_tokens_pkey", "revoked_tokens", ["jti"])
+    op.create_index(
+        "ix_revoked_tokens_expires_at",
+        "revoked_tokens",
+        ["expires_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_revoked_tokens_expires_at", table_name="revoked_tokens")
+    op.drop_table("revoked_tokens")
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("token", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("token"),
+    )
@@ -0,0 +1,35 @@
+"""Index tasks of a user in keyset order.
+
+Revision ID: be18fcb1eb58
+Revises: 1c3ac8944a0c
+Create Date: 2026-10-17 23:20:37.114092
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "be18fcb1eb58"
+down_revision = "1c3ac8944a0c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_user_id_sort",
+            "tasks",
+            ["user_id", "task_date", "task_time", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tasks_user_id_sort",
+            table_name="tasks",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
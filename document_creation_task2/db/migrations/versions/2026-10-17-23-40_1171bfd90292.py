@@ -0,0 +1,50 @@
+"""Index pending tasks and user names.
+
+Revision ID: 1171bfd90292
+Revises: be18fcb1eb58
+Create Date: 2026-10-17 23:40:12.538207
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "1171bfd90292"
+down_revision = "be18fcb1eb58"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tasks_user_id_pending",
+            "tasks",
+            ["user_id", "task_date", "task_time", "id"],
+            postgresql_where=sa.text("is_complete <> 'Completed'"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_user_det_name",
+            "user_det",
+            ["name"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_user_det_name",
+            table_name="user_det",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_tasks_user_id_pending",
+            table_name="tasks",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,31 @@
+"""Add a version of the tasks of each user.
+
+Revision ID: 709d1958f4b1
+Revises: 1171bfd90292
+Create Date: 2026-10-17 23:55:03.416720
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "709d1958f4b1"
+down_revision = "1171bfd90292"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "user_det",
+        sa.Column(
+            "tasks_version",
+            sa.BigInteger(),
+            nullable=False,
+            server_default="0",
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("user_det", "tasks_version")
@@ -1,5 +1,16 @@
-from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, Time
+from sqlalchemy import (  # noqa: WPS235
+    BigInteger,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Time,
+)
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import text
 
 from document_creation_task2.db.base import Base as Bases
 
@@ -12,9 +23,12 @@ class UserDet(Bases):
     """
 
     __tablename__ = "user_det"
+    __table_args__ = (Index("ix_user_det_name", "name"),)
+
     id = Column(Integer, primary_key=True)
     name = Column(String)
     password = Column(String)
+    tasks_version = Column(BigInteger, nullable=False, default=0, server_default="0")
     tok = relationship("Token", back_populates="user_det")
     tasks = relationship("Task", back_populates="user_dets")
 
@@ -41,6 +55,17 @@ class Task(Bases):
     """
 
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_user_id_sort", "user_id", "task_date", "task_time", "id"),
+        Index(
+            "ix_tasks_user_id_pending",
+            "user_id",
+            "task_date",
+            "task_time",
+            "id",
+            postgresql_where=text("is_complete <> 'Completed'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     task_name = Column(String)
@@ -61,4 +86,5 @@ class RevokedToken(Bases):
     """
 
     __tablename__ = "revoked_tokens"
-    token = Column(String, primary_key=True)
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
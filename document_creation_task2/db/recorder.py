@@ -0,0 +1,115 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from document_creation_task2.settings import settings
+
+
+class QueryRecorder:
+    """
+    Statements run while a recorder is active.
+
+    Recorders nest: a statement is recorded by the active recorder and by
+    every recorder it was started in.
+    """
+
+    def __init__(self, parent: Optional["QueryRecorder"] = None) -> None:
+        self.parent = parent
+        self.statements: List[Tuple[str, Any, float]] = []
+
+    @property
+    def count(self) -> int:
+        """
+        Number of recorded statements.
+
+        :returns: the number.
+        """
+        return len(self.statements)
+
+    def add(self, statement: str, parameters: Any, elapsed: float) -> None:
+        """
+        Record a statement.
+
+        :param statement: the SQL statement.
+        :param parameters: parameters of the statement.
+        :param elapsed: duration in seconds.
+        """
+        recorder: Optional[QueryRecorder] = self
+        while recorder is not None:
+            recorder.statements.append((statement, parameters, elapsed))
+            recorder = recorder.parent
+
+    def repeated(self) -> Dict[str, int]:
+        """
+        Statements run several times with the same parameters.
+
+        :returns: number of runs of each statement run at least
+            ``query_repeat_threshold`` times.
+        """
+        runs = Counter(
+            (statement, repr(parameters))
+            for statement, parameters, _ in self.statements
+        )
+        return {
+            statement: count
+            for (statement, _), count in runs.items()
+            if count >= settings.query_repeat_threshold
+        }
+
+
+_recorder: ContextVar[Optional[QueryRecorder]] = ContextVar(
+    "query_recorder",
+    default=None,
+)
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryRecorder]:
+    """
+    Record the statements run in the current context.
+
+    :yields: the recorder.
+    """
+    recorder = QueryRecorder(_recorder.get())
+    token = _recorder.set(recorder)
+    try:  # noqa: WPS501
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+def watch_engine(engine: AsyncEngine) -> None:
+    """
+    Record statements of an engine and log the slow ones.
+
+    :param engine: the engine.
+    """
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_execute)
+
+
+def _before_execute(*args: Any) -> None:
+    context = args[4]
+    context.recorder_start = time.perf_counter()
+
+
+def _after_execute(*args: Any) -> None:
+    statement, parameters, context = args[2:5]
+    elapsed = time.perf_counter() - context.recorder_start
+    recorder = _recorder.get()
+    if recorder is not None:
+        recorder.add(statement, parameters, elapsed)
+    if elapsed * 1000 >= settings.slow_query_ms:
+        _log_slow(statement, elapsed)
+
+
+def _log_slow(statement: str, elapsed: float) -> None:
+    elapsed_ms = elapsed * 1000
+    logger.warning(f"Slow query ({elapsed_ms:.1f} ms): {statement}")
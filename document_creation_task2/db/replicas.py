@@ -0,0 +1,55 @@
+import asyncio
+import time
+from typing import Dict, List
+
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from document_creation_task2.settings import settings
+
+
+class ReplicaRouter:
+    """
+    Hands out sessions on read replicas.
+
+    Replicas are used in turn. A replica that cannot be reached is skipped
+    for ``db_replica_retry_interval`` seconds, and the primary is used when
+    no replica is available.
+    """
+
+    def __init__(
+        self,
+        primary: "async_sessionmaker[AsyncSession]",
+        replicas: List["async_sessionmaker[AsyncSession]"],
+    ) -> None:
+        self.primary = primary
+        self.replicas = replicas
+        self._next = 0
+        self._down_until: Dict[int, float] = {}
+
+    async def session(self) -> AsyncSession:
+        """
+        Open a session on the next available replica.
+
+        :returns: session connected to a replica, or to the primary.
+        """
+        for _ in self.replicas:
+            index = self._next
+            self._next = (index + 1) % len(self.replicas)
+            if self._down_until.get(index, 0) > time.monotonic():
+                continue
+            session = self.replicas[index]()
+            try:
+                await session.connection()
+            except (OSError, asyncio.TimeoutError, SQLAlchemyError):
+                await session.close()
+                self._mark_down(index)
+                continue
+            return session
+        return self.primary()
+
+    def _mark_down(self, index: int) -> None:
+        logger.warning(f"Read replica {index} is unavailable")
+        retry_at = time.monotonic() + settings.db_replica_retry_interval
+        self._down_until[index] = retry_at
@@ -1,6 +1,10 @@
+import asyncio
+from typing import Dict, Optional
+
 from sqlalchemy import text
 from sqlalchemy.engine import make_url
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import QueuePool
 
 from document_creation_task2.settings import settings
 
@@ -42,3 +46,57 @@ async def drop_database() -> None:
         )
         await conn.execute(text(disc_users))
         await conn.execute(text(f'DROP DATABASE "{settings.db_base}"'))
+
+
+def create_engine(url: Optional[str] = None) -> AsyncEngine:
+    """
+    Create an engine of the application.
+
+    :param url: URL of the database, the primary by default.
+    :returns: engine with the pool configured in the settings.
+    """
+    return create_async_engine(
+        url or str(settings.db_url),
+        echo=settings.db_echo,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args={
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            "statement_cache_size": settings.db_statement_cache_size,
+            "timeout": settings.db_connect_timeout,
+        },
+    )
+
+
+async def warm_up_pool(engine: AsyncEngine, size: int) -> None:
+    """
+    Open connections of the pool ahead of the first requests.
+
+    :param engine: the engine.
+    :param size: number of connections to open.
+    """
+    connections = [engine.connect() for _ in range(size)]
+    await asyncio.gather(*[connection.start() for connection in connections])
+    for connection in connections:
+        await connection.close()
+
+
+def pool_stats(engine: AsyncEngine) -> Dict[str, int]:
+    """
+    Live state of the pool of an engine.
+
+    :param engine: the engine.
+    :returns: size of the pool and connections in use, idle and in overflow.
+    """
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
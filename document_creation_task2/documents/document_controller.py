@@ -1,27 +1,58 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from document_creation_task2.authentication.authenticate import token_authenticate
 from document_creation_task2.db.DAO.dao_documents import DocumentDb
+from document_creation_task2.db.dependencies import SessionOpener
 from document_creation_task2.db.dependencies import get_db_session as get_db
-from document_creation_task2.db.models.users import Task
+from document_creation_task2.db.dependencies import get_read_sessions
 from document_creation_task2.documents.document_schema import (
+    ExportFormat,
+    TaskBatchUpdate,
     TaskCreate,
     TaskDetail,
+    TaskIds,
     TaskUpdate,
 )
-from document_creation_task2.services.document_service import delete_rows, sort_tasks
+from document_creation_task2.services.document_service import (  # noqa: WPS235
+    batch_update,
+    bulk_create,
+    delete_rows,
+    encoded_task,
+    encoded_tasks,
+    etag_matches,
+    export_tasks,
+    tasks_etag,
+    tasks_version,
+)
+from document_creation_task2.settings import settings
+from document_creation_task2.web.admission import WRITE_ROUTE
 
 document_func = APIRouter()
 
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
 
-@document_func.put("/task/create_task")
+@document_func.put("/task/create_task", dependencies=[WRITE_ROUTE])
 async def create_tasks(
     request: TaskCreate,
     ids: int = Depends(token_authenticate),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Dict[str, Any]:
     """
     Create documents for the current authorized user.
@@ -35,20 +66,51 @@ async def create_tasks(
     if not ids:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
     documentdbs = DocumentDb()
-    return documentdbs.create_task(request, db, ids)
+    return await documentdbs.create_task(request, db, ids)
+
+
+@document_func.post("/task/bulk_create", dependencies=[WRITE_ROUTE])
+async def bulk_create_tasks(
+    request: List[Any] = Body(...),
+    ids: int = Depends(token_authenticate),
+    db: AsyncSession = Depends(get_db),
+) -> Dict[str, Any]:
+    """
+    Create many documents for the current authorized user.
+
+    Items that fail validation are reported by index and skipped, the
+    others are created together.
+
+    :param request: List of documents, each in the create schema.
+    :param ids: ID of the current user.
+    :param db: Session of the database.
+    :return: ids of the created documents and per item errors.
+    :raises HTTPException: If the user is not authorized or the batch is too large.
+    """
+    if not ids:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    if len(request) > settings.task_bulk_max:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.task_bulk_max} tasks per request",
+        )
+    return await bulk_create(request, db, ids)
 
 
 @document_func.get("/task/access_task", response_model=None)
 async def access_document(
     id_value: int,
-    db: Session = Depends(get_db),
+    sessions: SessionOpener = Depends(get_read_sessions),
     ids: int = Depends(token_authenticate),
-) -> List[Task]:
+) -> Response:
     """
     Return documents of a given user.
 
+    Identical requests of the user served at once share the query and the
+    encoded body.
+
     :param id_value: User ID.
-    :param db: Database session. From Depends(get_db).
+    :param sessions: Opens read-only database sessions.
     :param ids: User ID obtained from token authentication.
     :return: The data of the user with the given task ID.
 
@@ -56,44 +118,94 @@ async def access_document(
     """
     if not ids:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-    data = (
-        db.query(Task)
-        .filter(
-            Task.user_id == ids,
-            Task.id == id_value,
-        )
-        .all()
-    )
-    if not data:
+    body = await encoded_task(sessions, ids, id_value)
+    if body is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Documents for user with ID {id_value} not found",
         )
-    return data
+    return Response(body, media_type="application/json")
 
 
-@document_func.get("/task/sorting")
-async def access_task(
-    db: Session = Depends(get_db),
+@document_func.get("/task/sorting", response_model=None)
+async def access_task(  # noqa: WPS211
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.task_page_max),
+    cursor: Optional[str] = None,
+    pending: bool = False,
+    sessions: SessionOpener = Depends(get_read_sessions),
     ids: int = Depends(token_authenticate),
-) -> List[Dict[str, Any]]:
+) -> Response:
     """
     Return sorted tasks for a given user.
 
-    :param db: Database session. From Depends(get_db).
+    With a limit, tasks are returned one page at a time. The cursor of the
+    next page is sent in the X-Next-Cursor header, which is missing on the
+    last page.
+
+    Listings carry an ETag. When If-None-Match holds the current one, 304 is
+    returned without loading any task. Identical listings of the user served
+    at once share the queries and the encoded body.
+
+    :param request: The request.
+    :param limit: Maximum number of tasks to return.
+    :param cursor: Cursor of the page returned with the previous page.
+    :param pending: Only return tasks that are not completed.
+    :param sessions: Opens read-only database sessions.
     :param ids: User ID obtained from token authentication.
     :return: Sorted tasks for the specified user.
     :raises HTTPException: 401 Unauthorized if authentication fails.
     """
     if not ids:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-    return sort_tasks(db, ids)
+    version = await tasks_version(sessions, ids)
+    etag = tasks_etag(ids, version, request.url.query)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    body, next_cursor = await encoded_tasks(
+        sessions,
+        ids,
+        version,
+        limit,
+        cursor,
+        pending,
+    )
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return Response(body, media_type="application/json", headers=headers)
+
 
+@document_func.get("/task/export")
+async def export_task(
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    sessions: SessionOpener = Depends(get_read_sessions),
+    ids: int = Depends(token_authenticate),
+) -> StreamingResponse:
+    """
+    Stream all tasks of the current user as NDJSON or CSV.
+
+    :param export_format: Format of the export.
+    :param sessions: Opens read-only database sessions.
+    :param ids: User ID obtained from token authentication.
+    :return: Streamed export of the tasks.
+    :raises HTTPException: 401 Unauthorized if authentication fails.
+    """
+    if not ids:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    return StreamingResponse(
+        export_tasks(sessions, ids, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f"attachment; filename=tasks.{export_format.value}",
+        },
+    )
 
-@document_func.put("/task/update_completion/{id}")
+
+@document_func.put("/task/update_completion/{id}", dependencies=[WRITE_ROUTE])
 async def updated_value(
     id_values: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     ids: int = Depends(token_authenticate),
 ) -> Dict[str, Any]:
     """
@@ -107,21 +219,25 @@ async def updated_value(
     """
     if not ids:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-    data = db.query(Task).filter(Task.id == id_values).all()
+    documentdbs = DocumentDb()
+    data = await documentdbs.get_task(db, id_values)
     if not data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Documents for user with ID {id_values} not found",
         )
-    documentdbs = DocumentDb()
-    return documentdbs.update_func(id_values, db)
+    return await documentdbs.update_func(id_values, db)
 
 
-@document_func.put("/tasks/update/{task_id}", response_model=TaskDetail)
+@document_func.put(
+    "/tasks/update/{task_id}",
+    response_model=TaskDetail,
+    dependencies=[WRITE_ROUTE],
+)
 async def update_task(
     task_id: int,
     task_data: TaskUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     ids: int = Depends(token_authenticate),
 ) -> TaskDetail:
     """
@@ -136,20 +252,68 @@ async def update_task(
     """
     if not ids:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-    task = db.query(Task).filter(Task.id == task_id).first()
+    documentdbs = DocumentDb()
+    task = await documentdbs.get_task(db, task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found",
         )
-    documentdbs = DocumentDb()
-    return documentdbs.update_det(task, task_data, db)
+    return await documentdbs.update_det(task, task_data, db)
+
+
+@document_func.put("/task/batch_completion", dependencies=[WRITE_ROUTE])
+async def batch_completion(
+    request: TaskIds,
+    db: AsyncSession = Depends(get_db),
+    ids: int = Depends(token_authenticate),
+) -> Dict[str, Any]:
+    """
+    Mark many tasks complete.
+
+    :param request: ids of the tasks.
+    :param db: Database session. From Depends(get_db).
+    :param ids: User ID obtained from token authentication.
+    :return: ids of the updated tasks and of the ones not found.
+    :raises HTTPException: If the user is not authenticated.
+    """
+    if not ids:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    _check_batch(request.ids)
+    return await batch_update(db, ids, request.ids, {"is_complete": "Completed"})
 
 
-@document_func.delete("/Documents/delete/{id}")
+@document_func.put("/tasks/batch_update", dependencies=[WRITE_ROUTE])
+async def batch_update_tasks(
+    request: TaskBatchUpdate,
+    db: AsyncSession = Depends(get_db),
+    ids: int = Depends(token_authenticate),
+) -> Dict[str, Any]:
+    """
+    Apply the same changes to many tasks.
+
+    :param request: ids of the tasks and the fields to change.
+    :param db: Database session. From Depends(get_db).
+    :param ids: User ID obtained from token authentication.
+    :return: ids of the updated tasks and of the ones not found.
+    :raises HTTPException: If the user is not authenticated or nothing changes.
+    """
+    if not ids:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    _check_batch(request.ids)
+    changes = request.model_dump(exclude={"ids"}, exclude_none=True)
+    if not changes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields to update",
+        )
+    return await batch_update(db, ids, request.ids, changes)
+
+
+@document_func.delete("/Documents/delete/{id}", dependencies=[WRITE_ROUTE])
 async def delete_row(
     id_value: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     ids: int = Depends(token_authenticate),
 ) -> Dict[str, Any]:
     """
@@ -164,30 +328,35 @@ async def delete_row(
     """
     if not ids:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-    return delete_rows(id_value, db)
+    return await delete_rows(id_value, db)
 
 
-@document_func.delete("/tasks/clear")
+@document_func.delete("/tasks/clear", dependencies=[WRITE_ROUTE])
 async def clear_all_tasks(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     ids: int = Depends(token_authenticate),
 ) -> Dict[str, Any]:
-    """To delete all the task.
+    """To delete all the task of the current user.
 
     :param db:Session.
     :param ids: Id of user.Default to Depends.
-    :returns:The status message.
+    :returns:The status message and the number of deleted tasks.
     :raises HTTPException: Unauthorized User.
     """
     if not ids:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
-    tasks_to_delete = db.query(Task).all()
-    if not tasks_to_delete:
+    deleted = await DocumentDb().clear_tasks(db, ids, settings.task_clear_chunk)
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No tasks to clear",
         )
-    for task in tasks_to_delete:
-        db.delete(task)
-    db.commit()
-    return {"message": "All tasks cleared successfully"}
+    return {"message": "All tasks cleared successfully", "deleted": deleted}
+
+
+def _check_batch(task_ids: List[int]) -> None:
+    if len(task_ids) > settings.task_bulk_max:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.task_bulk_max} tasks per request",
+        )
@@ -1,12 +1,16 @@
-from datetime import date, time
+import enum
+from datetime import date, time, timezone
+from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 
 class TaskCreate(BaseModel):
     """
     Model for creating document.
 
+    Times without an offset are taken as UTC, as the column stores one.
+
     :param BaseModel:Pydantic model.
     """
 
@@ -15,6 +19,19 @@ class TaskCreate(BaseModel):
     task_time: time
     priority: str
 
+    @field_validator("task_time")
+    @classmethod
+    def utc_if_naive(cls, task_time: time) -> time:
+        """
+        Give naive times the UTC offset.
+
+        :param task_time: the validated time.
+        :returns: the time with an offset.
+        """
+        if task_time.tzinfo is None:
+            return task_time.replace(tzinfo=timezone.utc)
+        return task_time
+
 
 class TaskDetail(BaseModel):
     """
@@ -40,3 +57,34 @@ class TaskUpdate(BaseModel):
     task_name: str
     task_date: date
     priority: str
+
+
+class TaskIds(BaseModel):
+    """
+    Model for selecting many documents.
+
+    :param BaseModel:Pydantic model.
+    """
+
+    ids: List[int]
+
+
+class TaskBatchUpdate(TaskIds):
+    """
+    Model for updating many documents at once.
+
+    Only the fields that are set are updated.
+
+    :param TaskIds:Model with the ids of the documents.
+    """
+
+    task_name: Optional[str] = None
+    task_date: Optional[date] = None
+    priority: Optional[str] = None
+
+
+class ExportFormat(str, enum.Enum):  # noqa: WPS600
+    """Formats of task exports."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
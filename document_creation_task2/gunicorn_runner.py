@@ -0,0 +1,159 @@
+import os
+import resource
+import shutil
+import signal
+import sys
+import tempfile
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Dict
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.util import import_app
+from uvicorn.workers import UvicornWorker as BaseUvicornWorker
+
+from document_creation_task2.logging import configure_logging
+from document_creation_task2.settings import settings
+
+APP = "document_creation_task2.web.application:get_app()"
+METRICS_DIR = "PROMETHEUS_MULTIPROC_DIR"
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+MIB = 1024 * 1024
+
+
+def peak_memory_mb() -> float:
+    """
+    Peak resident memory of the current process.
+
+    :returns: the peak in MiB.
+    """
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss * MAXRSS_UNIT / MIB
+
+
+class UvicornWorker(BaseUvicornWorker):
+    """
+    Worker running the application with uvicorn.
+
+    The worker stops itself once its peak memory goes above
+    ``worker_max_memory_mb``, the arbiter then forks a fresh one.
+    In-flight requests are given ``graceful_timeout`` seconds to finish
+    before the application shuts down.
+    """
+
+    CONFIG_KWARGS: Dict[str, Any] = {
+        "loop": "uvloop" if find_spec("uvloop") else "asyncio",
+        "http": "httptools",
+        "lifespan": "on",
+        "timeout_graceful_shutdown": settings.graceful_timeout,
+    }
+
+    def init_process(self) -> None:
+        """Restore logging lost with the threads of the preloading process."""
+        configure_logging()
+        self.recycling = False
+        super().init_process()
+
+    def notify(self) -> None:
+        """Tell the arbiter the worker is alive and check its memory."""
+        super().notify()
+        limit = settings.worker_max_memory_mb
+        if limit and not self.recycling and peak_memory_mb() > limit:
+            self.log.info(
+                f"Worker {self.pid} is above {limit} MiB, restarting it",
+            )
+            self.recycling = True
+            os.kill(self.pid, signal.SIGTERM)
+
+
+class GunicornApplication(BaseApplication):  # type: ignore
+    """
+    Gunicorn application running uvicorn workers.
+
+    :param app: import path of the application.
+    :param options: settings of gunicorn.
+    """
+
+    def __init__(self, app: str, **options: Any) -> None:
+        self.app = app
+        self.options = {
+            "worker_class": "document_creation_task2.gunicorn_runner.UvicornWorker",
+            **options,
+        }
+        super().__init__()
+
+    def load_config(self) -> None:
+        """Copy the options to the config of gunicorn."""
+        for key, setting in self.options.items():
+            if key in self.cfg.settings and setting is not None:
+                self.cfg.set(key, setting)
+
+    def load(self) -> Any:
+        """
+        Import the application.
+
+        :returns: the application.
+        """
+        return import_app(self.app)
+
+
+def worker_count() -> int:
+    """
+    Number of workers to run.
+
+    :returns: ``workers_count`` or one worker per available CPU.
+    """
+    if settings.workers_count:
+        return settings.workers_count
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover
+        return os.cpu_count() or 1
+
+
+def prepare_metrics_dir() -> Path:
+    """
+    Empty the directory the workers write their metrics to.
+
+    prometheus_client switches to multiprocess mode when
+    ``PROMETHEUS_MULTIPROC_DIR`` is set as it is imported, so this runs
+    before the application is loaded. A temporary directory is used when
+    the variable is not set.
+
+    :returns: the directory.
+    """
+    default = Path(tempfile.gettempdir()) / "document_creation_task2_metrics"
+    directory = Path(os.environ.setdefault(METRICS_DIR, str(default)))
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True)
+    return directory
+
+
+def child_exit(server: Any, worker: Any) -> None:
+    """
+    Drop the live gauges of a worker that exited.
+
+    :param server: the arbiter.
+    :param worker: the worker.
+    """
+    from prometheus_client import multiprocess  # noqa: WPS433
+
+    multiprocess.mark_process_dead(worker.pid)  # type: ignore
+
+
+def run_production() -> None:  # pragma: no cover
+    """Serve the application with gunicorn."""
+    prepare_metrics_dir()
+    GunicornApplication(
+        APP,
+        bind=f"{settings.host}:{settings.port}",
+        workers=worker_count(),
+        max_requests=settings.worker_max_requests,
+        max_requests_jitter=settings.worker_max_requests_jitter,
+        preload_app=settings.preload_app,
+        graceful_timeout=settings.graceful_timeout,
+        timeout=settings.worker_timeout,
+        loglevel=settings.log_level.value.lower(),
+        child_exit=child_exit,
+    ).run()
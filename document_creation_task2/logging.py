@@ -1,11 +1,20 @@
+import json
 import logging
+import random
 import sys
-from typing import Union
+import traceback
+from typing import TYPE_CHECKING, Any, Dict, Union
 
 from loguru import logger
 
 from document_creation_task2.settings import settings
 
+if TYPE_CHECKING:
+    from loguru import Record
+
+SERVER_ERROR = 500
+ACCESS_STATUS_ARG = 4
+
 
 class InterceptHandler(logging.Handler):
     """
@@ -14,11 +23,14 @@ class InterceptHandler(logging.Handler):
     This handler intercepts all log requests and
     passes them to loguru.
 
+    The caller is taken from the record of the standard library instead of
+    walking the frames of the call stack.
+
     For more info see:
     https://loguru.readthedocs.io/en/stable/overview.html#entirely-compatible-with-standard-logging
     """
 
-    def emit(self, record: logging.LogRecord) -> None:  # pragma: no cover
+    def emit(self, record: logging.LogRecord) -> None:
         """
         Propagates logs to loguru.
 
@@ -29,16 +41,66 @@ class InterceptHandler(logging.Handler):
         except ValueError:
             level = record.levelno
 
-        # Find caller from where originated the logged message
-        frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back  # type: ignore
-            depth += 1
+        caller = {
+            "name": record.name,
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+        }
+        logger.patch(
+            lambda loguru_record: loguru_record.update(caller),  # type: ignore
+        ).opt(exception=record.exc_info).log(level, record.getMessage())
+
+
+class AccessLogSampler(logging.Filter):
+    """
+    Keeps a share of the access logs of uvicorn.
+
+    Access logs of responses with a status of 500 or more are always kept.
+    """
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
 
-        logger.opt(depth=depth, exception=record.exc_info).log(
-            level,
-            record.getMessage(),
+    def filter(self, record: logging.LogRecord) -> bool:  # noqa: WPS125
+        """
+        Decide whether an access log is written.
+
+        :param record: the access log.
+        :returns: whether the record is kept.
+        """
+        if self.rate >= 1:
+            return True
+        args = record.args if isinstance(record.args, tuple) else ()
+        status_code = args[ACCESS_STATUS_ARG] if len(args) > ACCESS_STATUS_ARG else 0
+        if isinstance(status_code, int) and status_code >= SERVER_ERROR:
+            return True
+        return random.random() < self.rate  # noqa: S311
+
+
+def json_format(record: "Record") -> str:
+    """
+    Format a record as a JSON object on one line.
+
+    :param record: the record.
+    :returns: format string of the record.
+    """
+    entry: Dict[str, Any] = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+        **record["extra"],
+    }
+    if record["exception"] is not None:
+        entry["exception"] = "".join(
+            traceback.format_exception(*record["exception"]),
         )
+    record["extra"]["json"] = json.dumps(entry, default=str)
+    return "{extra[json]}\n"
 
 
 def configure_logging() -> None:  # pragma: no cover
@@ -53,11 +115,16 @@ def configure_logging() -> None:  # pragma: no cover
 
     # change handler for default uvicorn logger
     logging.getLogger("uvicorn").handlers = [intercept_handler]
-    logging.getLogger("uvicorn.access").handlers = [intercept_handler]
+    access_logger = logging.getLogger("uvicorn.access")
+    access_logger.handlers = [intercept_handler]
+    access_logger.filters = [AccessLogSampler(settings.log_access_sample_rate)]
 
     # set logs output, level and format
     logger.remove()
+    options: Dict[str, Any] = {"format": json_format} if settings.log_json else {}
     logger.add(
         sys.stdout,
         level=settings.log_level.value,
+        enqueue=settings.log_enqueue,
+        **options,
     )
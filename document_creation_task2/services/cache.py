@@ -0,0 +1,523 @@
+import abc
+import asyncio
+import functools
+import hashlib
+import heapq
+import json
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import (  # noqa: WPS235
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from loguru import logger
+from yarl import URL
+
+from document_creation_task2.settings import settings
+from document_creation_task2.web.metrics import CACHE_HITS, CACHE_MISSES
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+LOCK_SUFFIX = ":lock"
+
+
+class CacheError(Exception):
+    """Error of a cache server."""
+
+
+class CacheBackend(abc.ABC):
+    """Storage of a cache, values are bytes with a time to live."""
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Get a value.
+
+        :param key: key of the value.
+        """
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Store a value.
+
+        :param key: key of the value.
+        :param value: the value.
+        :param ttl: seconds the value is kept.
+        """
+
+    @abc.abstractmethod
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """
+        Store a value unless the key is already set.
+
+        :param key: key of the value.
+        :param value: the value.
+        :param ttl: seconds the value is kept.
+        """
+
+    @abc.abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """
+        Remove values.
+
+        :param keys: keys of the values.
+        """
+
+    async def close(self) -> None:  # noqa: B027
+        """Release the resources of the backend."""
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Cache kept in the memory of the worker.
+
+    Keys and values take at most ``cache_max_bytes``, the least recently
+    used values are dropped first. Expired values are dropped when they are
+    read and whenever a value is stored.
+    """
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._expiries: List[Tuple[float, str]] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Get a value.
+
+        :param key: key of the value.
+        :returns: the value or None if it is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Store a value.
+
+        Values larger than ``cache_max_bytes`` are not stored.
+
+        :param key: key of the value.
+        :param value: the value.
+        :param ttl: seconds the value is kept.
+        """
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        self._purge(now)
+        self._drop(key)
+        size = _entry_size(key, value)
+        if size > settings.cache_max_bytes:
+            return
+        self._entries[key] = (value, now + ttl)
+        self._size += size
+        heapq.heappush(self._expiries, (now + ttl, key))
+        while self._size > settings.cache_max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """
+        Store a value unless the key is already set.
+
+        :param key: key of the value.
+        :param value: the value.
+        :param ttl: seconds the value is kept.
+        :returns: whether the value was stored.
+        """
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        """
+        Remove values.
+
+        :param keys: keys of the values.
+        """
+        for key in keys:
+            self._drop(key)
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= _entry_size(key, entry[0])
+
+    def _purge(self, now: float) -> None:
+        while self._expiries and self._expiries[0][0] <= now:
+            _, key = heapq.heappop(self._expiries)
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                self._drop(key)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Cache kept in a server speaking the Redis protocol.
+
+    The server is shared by all the workers.
+    """
+
+    def __init__(self, client: "Redis") -> None:
+        self.client = client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Get a value.
+
+        :param key: key of the value.
+        :returns: the value or None if it is missing.
+        """
+        with server_errors():
+            return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Store a value.
+
+        :param key: key of the value.
+        :param value: the value.
+        :param ttl: seconds the value is kept.
+        """
+        if ttl > 0:
+            with server_errors():
+                await self.client.set(key, value, px=_milliseconds(ttl))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """
+        Store a value unless the key is already set.
+
+        :param key: key of the value.
+        :param value: the value.
+        :param ttl: seconds the value is kept.
+        :returns: whether the value was stored.
+        """
+        milliseconds = _milliseconds(ttl)
+        with server_errors():
+            added = await self.client.set(key, value, px=milliseconds, nx=True)
+        return bool(added)
+
+    async def delete(self, *keys: str) -> None:
+        """
+        Remove values.
+
+        :param keys: keys of the values.
+        """
+        if keys:
+            with server_errors():
+                await self.client.delete(*keys)
+
+    async def close(self) -> None:
+        """Close the connections to the server."""
+        await self.client.aclose()
+
+
+class Cache:
+    """
+    Cache of JSON values and encoded bytes shared by the workers.
+
+    Values live in a backend chosen by ``cache_url``. Errors of the backend
+    are logged and make the cache behave as empty, so requests still work
+    when the cache server is down. Hits and misses are counted by kind of
+    key, the part of the key before the first colon.
+    """
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+        self.hits: "Counter[str]" = Counter()
+        self.misses: "Counter[str]" = Counter()
+        self._loading: Dict[str, "asyncio.Future[bytes]"] = {}
+
+    def use(self, backend: CacheBackend) -> None:
+        """
+        Switch to another backend and reset the counters.
+
+        :param backend: the new backend.
+        """
+        self.backend = backend
+        self.hits.clear()
+        self.misses.clear()
+        self._loading.clear()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value.
+
+        :param key: key of the value.
+        :returns: the value or None if it is not cached.
+        """
+        raw = await self.get_bytes(key)
+        return None if raw is None else json.loads(raw)
+
+    async def get_bytes(self, key: str) -> Optional[bytes]:
+        """
+        Get an encoded value as it is stored.
+
+        :param key: key of the value.
+        :returns: the value or None if it is not cached.
+        """
+        try:
+            raw = await self.backend.get(key)
+        except (OSError, asyncio.TimeoutError, CacheError) as error:
+            logger.warning(f"Cannot read {key} from the cache: {error!r}")
+            raw = None
+        kind = key.partition(":")[0]
+        if raw is None:
+            self.misses[kind] += 1
+            CACHE_MISSES.labels(kind).inc()
+            return None
+        self.hits[kind] += 1
+        CACHE_HITS.labels(kind).inc()
+        return raw
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Store a value.
+
+        :param key: key of the value.
+        :param value: the value, it must be serializable to JSON.
+        :param ttl: seconds the value is kept.
+        """
+        await self.set_bytes(key, json.dumps(value).encode(), ttl)
+
+    async def set_bytes(self, key: str, raw: bytes, ttl: float) -> None:
+        """
+        Store an encoded value as it is.
+
+        :param key: key of the value.
+        :param raw: the value.
+        :param ttl: seconds the value is kept.
+        """
+        try:
+            await self.backend.set(key, raw, ttl)
+        except (OSError, asyncio.TimeoutError, CacheError) as error:
+            logger.warning(f"Cannot write {key} to the cache: {error!r}")
+
+    async def add(self, key: str, value: Any, ttl: float) -> bool:
+        """
+        Store a value unless the key is already set.
+
+        :param key: key of the value.
+        :param value: the value, it must be serializable to JSON.
+        :param ttl: seconds the value is kept.
+        :returns: whether the value was stored.
+        """
+        try:
+            return await self.backend.add(key, json.dumps(value).encode(), ttl)
+        except (OSError, asyncio.TimeoutError, CacheError) as error:
+            logger.warning(f"Cannot write {key} to the cache: {error!r}")
+            return False
+
+    async def delete(self, *keys: str) -> None:
+        """
+        Remove values.
+
+        :param keys: keys of the values.
+        """
+        try:
+            await self.backend.delete(*keys)
+        except (OSError, asyncio.TimeoutError, CacheError) as error:
+            logger.warning(f"Cannot remove {keys} from the cache: {error!r}")
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[bytes]],
+        ttl: float,
+    ) -> bytes:
+        """
+        Get an encoded value, loading and storing it when it is missing.
+
+        Values are stored and returned as they are, without being decoded.
+        Concurrent misses of a key load it once: in the worker, callers wait
+        for a load running in its own task, so that a cancelled caller does
+        not fail the others, and across workers a lock entry lets a single
+        worker load while the others wait for the value to be stored.
+
+        :param key: key of the value.
+        :param loader: function loading the encoded value.
+        :param ttl: seconds the value is kept.
+        :returns: the value.
+        """
+        cached = await self.get_bytes(key)
+        if cached is not None:
+            return cached
+        loading = self._loading.get(key)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load_once(key, loader, ttl))
+            self._loading[key] = loading
+            loading.add_done_callback(functools.partial(self._loaded, key))
+        return await asyncio.shield(loading)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Counters of the cache.
+
+        :returns: hits and misses by kind of key.
+        """
+        return {
+            kind: {"hits": self.hits[kind], "misses": self.misses[kind]}
+            for kind in sorted(self.hits.keys() | self.misses.keys())
+        }
+
+    async def close(self) -> None:
+        """Release the backend."""
+        await self.backend.close()
+
+    async def _load_once(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[bytes]],
+        ttl: float,
+    ) -> bytes:
+        lock = key + LOCK_SUFFIX
+        locked = await self._lock(lock)
+        if not locked:
+            stored = await self._wait_for(key)
+            if stored is not None:
+                return stored
+        try:  # noqa: WPS501
+            loaded = await loader()
+            await self.set_bytes(key, loaded, ttl)
+        finally:
+            if locked:
+                await self.delete(lock)
+        return loaded
+
+    def _loaded(self, key: str, loading: "asyncio.Future[bytes]") -> None:
+        if self._loading.get(key) is loading:
+            self._loading.pop(key)
+        if not loading.cancelled():
+            loading.exception()
+
+    async def _lock(self, lock: str) -> bool:
+        try:
+            return await self.backend.add(lock, b"1", settings.cache_lock_ttl)
+        except (OSError, asyncio.TimeoutError, CacheError):
+            return True
+
+    async def _wait_for(self, key: str) -> Optional[bytes]:
+        deadline = time.monotonic() + settings.cache_lock_ttl
+        while time.monotonic() < deadline:
+            await asyncio.sleep(settings.cache_lock_poll)
+            stored = await self.get_bytes(key)
+            if stored is not None:
+                return stored
+        return None
+
+
+def connect_redis(url: str) -> "Redis":
+    """
+    Client of a server speaking the Redis protocol.
+
+    Each worker opens at most ``cache_pool_size`` connections to the server
+    and waits up to ``cache_connect_timeout`` seconds for one of them.
+
+    :param url: ``redis://[:password@]host[:port][/db]``.
+    :returns: the client.
+    """
+    from redis.asyncio import BlockingConnectionPool  # noqa: WPS433
+    from redis.asyncio import Redis as Client  # noqa: WPS433
+
+    pool = BlockingConnectionPool.from_url(
+        url,
+        max_connections=settings.cache_pool_size,
+        timeout=settings.cache_connect_timeout,
+        socket_connect_timeout=settings.cache_connect_timeout,
+    )
+    return Client.from_pool(pool)
+
+
+@contextmanager
+def server_errors() -> Iterator[None]:
+    """
+    Raise the errors of a cache server as CacheError.
+
+    :yields: nothing.
+    :raises CacheError: error of the server.
+    """
+    from redis.exceptions import RedisError  # noqa: WPS433
+
+    try:
+        yield
+    except RedisError as error:
+        raise CacheError(str(error)) from error
+
+
+def create_backend(url: str) -> CacheBackend:
+    """
+    Create the backend of a cache URL.
+
+    :param url: ``memory://`` or ``redis://[:password@]host[:port][/db]``.
+    :returns: the backend.
+    :raises ValueError: unknown scheme.
+    """
+    scheme = URL(url).scheme
+    if scheme == "memory":
+        return MemoryBackend()
+    if scheme == "redis":
+        return RedisBackend(connect_redis(url))
+    raise ValueError(f"Unknown cache backend {url}")
+
+
+def auth_key(token: str) -> str:
+    """
+    Key of the user of a verified token.
+
+    :param token: the token.
+    :returns: the key.
+    """
+    digest = hashlib.sha256(token.encode()).hexdigest()
+    return f"auth:{digest}"
+
+
+def tasks_key(ids: Any, version: int) -> str:
+    """
+    Prefix of the keys of the cached task listings of a user.
+
+    :param ids: id of the user.
+    :param version: version of the tasks of the user.
+    :returns: the prefix.
+    """
+    return f"tasks:{ids}:{version}"
+
+
+def primary_key(ids: Any) -> str:
+    """
+    Key marking a user who wrote recently.
+
+    :param ids: id of the user.
+    :returns: the key.
+    """
+    return f"primary:{ids}"
+
+
+def _entry_size(key: str, value: bytes) -> int:
+    return len(key) + len(value)
+
+
+def _milliseconds(seconds: float) -> int:
+    return max(1, int(seconds * 1000))
+
+
+cache = Cache(MemoryBackend())
@@ -0,0 +1,84 @@
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict
+
+from document_creation_task2.settings import settings
+
+# Reads of a user in flight, by parameters.
+Flights = Dict[str, "asyncio.Future[Any]"]
+
+
+class Coalescer:
+    """
+    Single flight of identical reads of a user.
+
+    A read started while an identical one of the same user is running waits
+    for it and gets its result, so that both share one query. Reads run in
+    their own task, so a caller cancelled while waiting does not fail the
+    others. A write of the user breaks the reads in flight: they still finish
+    for their callers, but later reads start their own instead of getting
+    data older than the write.
+    Reads are not shared when ``coalescing_enabled`` is off.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[str, Flights] = {}
+
+    async def run(
+        self,
+        user: Any,
+        key: str,
+        read: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Run a read, or join the identical read in flight.
+
+        :param user: id of the user.
+        :param key: parameters of the read.
+        :param read: function running the read.
+        :returns: the result of the read.
+        """
+        if not settings.coalescing_enabled:
+            return await read()
+        flights = self._flights.setdefault(str(user), {})
+        flight = flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(read())
+            flights[key] = flight
+            flight.add_done_callback(
+                functools.partial(self._land, str(user), flights, key),
+            )
+        return await asyncio.shield(flight)
+
+    def forget(self, user: Any) -> None:
+        """
+        Break the reads of a user in flight.
+
+        :param user: id of the user.
+        """
+        self._flights.pop(str(user), None)
+
+    def in_flight(self) -> int:
+        """
+        Count the reads in flight.
+
+        :returns: the number of reads.
+        """
+        return sum(len(flights) for flights in self._flights.values())
+
+    def _land(
+        self,
+        user: str,
+        flights: Flights,
+        key: str,
+        flight: "asyncio.Future[Any]",
+    ) -> None:
+        if flights.get(key) is flight:
+            flights.pop(key)
+        if not flights and self._flights.get(user) is flights:
+            self._flights.pop(user)
+        if not flight.cancelled():
+            flight.exception()
+
+
+coalescer = Coalescer()
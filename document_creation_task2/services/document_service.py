@@ -1,9 +1,35 @@
-from typing import Any, Dict, List
+import base64
+import csv
+import hashlib
+import io
+import json
+from datetime import date, time
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
-from document_creation_task2.db.DAO.dao_documents import DocumentDb
+import ujson  # type: ignore
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from document_creation_task2.db.DAO.dao_documents import (
+    EXPORT_COLUMNS,
+    LISTING_COLUMNS,
+    TASK_COLUMNS,
+    DocumentDb,
+)
+from document_creation_task2.db.dependencies import SessionOpener
+from document_creation_task2.documents.document_schema import ExportFormat, TaskCreate
+from document_creation_task2.services.cache import cache, tasks_key
+from document_creation_task2.services.coalescing import coalescer
+from document_creation_task2.settings import settings
 
-def delete_rows(ids: int, db: Any) -> Dict[str, Any]:
+ETAG_DIGEST_SIZE = 8
+LISTING_FIELDS = [column.key for column in LISTING_COLUMNS]
+TASK_FIELDS = [column.key for column in TASK_COLUMNS]
+
+
+async def delete_rows(ids: int, db: AsyncSession) -> Dict[str, Any]:
     """Delete rows.
 
     :param ids:id of the document
@@ -11,7 +37,7 @@ def delete_rows(ids: int, db: Any) -> Dict[str, Any]:
     :returns:The status of the operation.
     """
     documentdb = DocumentDb()
-    documentdb.delete_rows_db(ids, db)
+    await documentdb.delete_rows_db(ids, db)
     return {
         "status": "success",
         "message": "successfully deleted these rows",
@@ -20,25 +46,424 @@ def delete_rows(ids: int, db: Any) -> Dict[str, Any]:
     }
 
 
-def sort_tasks(db: Any, ids: Any) -> List[Dict[str, Any]]:
-    """Sort documents.
+async def bulk_create(
+    items: List[Any],
+    db: AsyncSession,
+    ids: int,
+) -> Dict[str, Any]:
+    """Create many documents at once.
+
+    Every item is validated first. Valid items are created in one
+    transaction, invalid ones are reported with their index.
+
+    :param items:Raw details of the documents.
+    :param db:The session
+    :param ids:The id of the user.
+    :returns:ids of the created documents and errors of the invalid ones.
+    """
+    tasks = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            tasks.append(TaskCreate.model_validate(item))
+        except ValidationError as error:
+            errors.append({"index": index, "errors": _item_errors(error)})
+    created = await DocumentDb().bulk_create_tasks(tasks, db, ids)
+    return {
+        "status": "success",
+        "message": "successfully created these tasks",
+        "data": {"ids": created, "errors": errors},
+        "error": bool(errors),
+    }
+
+
+def _item_errors(error: ValidationError) -> List[Dict[str, Any]]:
+    return [
+        {key: detail[key] for key in ("loc", "msg", "type")}  # type: ignore
+        for detail in error.errors()
+    ]
+
+
+async def batch_update(
+    db: AsyncSession,
+    ids: int,
+    task_ids: List[int],
+    changes: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Update many documents at once.
 
     :param db:The session
     :param ids:The id of the user.
-    :returns:The sorted documents.
-    """
-    documentdbs = DocumentDb()
-    tasks = documentdbs.tasks_db(db, ids)
-    sorted_tasks = []
-    for task in tasks:
-        sorted_tasks.append(
-            {
-                "task_name": task.task_name,
-                "task_date": task.task_date,
-                "task_time": task.task_time,
-                "priority": task.priority,
-                "created_time": task.created_time,
-                "is_complete": task.is_complete,
-            },
+    :param task_ids:ids of the documents.
+    :param changes:New values of the columns.
+    :returns:ids of the updated documents and of the ones not found.
+    """
+    updated = await DocumentDb().update_tasks(db, ids, task_ids, changes)
+    found = set(updated)
+    missing = [task_id for task_id in dict.fromkeys(task_ids) if task_id not in found]
+    return {
+        "status": "success",
+        "message": "successfully updated these tasks",
+        "data": {"updated": updated, "not_found": missing},
+        "error": bool(missing),
+    }
+
+
+async def tasks_version(sessions: SessionOpener, ids: int) -> int:
+    """Version of the documents of a user.
+
+    Concurrent listings of a user share one read of the version.
+
+    :param sessions:Opens the session of the read.
+    :param ids:The id of the user.
+    :returns:The version.
+    """
+    return await coalescer.run(ids, "version", partial(_tasks_version, sessions, ids))
+
+
+def tasks_etag(ids: int, version: int, query: str) -> str:
+    """Entity tag of a listing of documents.
+
+    The tag is built from the version of the documents of the user, so it
+    is computed without loading any document.
+
+    :param ids:The id of the user.
+    :param version:Version of the documents of the user.
+    :param query:Query string of the listing.
+    :returns:The entity tag.
+    """
+    listing = f"{ids}?{query}".encode()
+    digest = hashlib.blake2b(listing, digest_size=ETAG_DIGEST_SIZE).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an entity tag.
+
+    :param if_none_match:Value of the header.
+    :param etag:Current entity tag.
+    :returns:Whether the client has the current version.
+    """
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    tags |= {tag[2:] for tag in tags if tag.startswith("W/")}
+    return "*" in tags or etag in tags
+
+
+class EncodedPage(NamedTuple):
+    """A page of sorted tasks, encoded as JSON."""
+
+    body: bytes
+    next_cursor: Optional[str]
+
+
+async def sort_tasks(  # noqa: WPS211
+    sessions: SessionOpener,
+    ids: Any,
+    version: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    pending: bool = False,
+) -> EncodedPage:
+    """Sort documents and encode them as JSON.
+
+    Pages are cached encoded for ``cache_tasks_ttl`` seconds under the
+    version of the documents of the user, the one their entity tag is built
+    from, so a write makes every worker load them again. Listings of all
+    documents, the default poll, are cached the same way unless they are
+    larger than ``cache_listing_max_bytes``. Loads shared between requests
+    open their own session, so that they outlive the request that started
+    them.
+
+    :param sessions:Opens the sessions of the loads.
+    :param ids:The id of the user.
+    :param version:Version of the documents of the user.
+    :param limit:Size of the page, all documents if None.
+    :param cursor:Cursor of the page returned with the previous page.
+    :param pending:Only return documents that are not completed.
+    :returns:The encoded documents and the cursor of the next page.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    listings = tasks_key(ids, version)
+    key = f"{listings}:{pending}:{limit}:{cursor}"
+    if limit is None:
+        return EncodedPage(await _all_tasks(sessions, ids, key, after, pending), None)
+    return await _page_of_tasks(sessions, ids, key, limit, after, pending)
+
+
+async def encoded_tasks(  # noqa: WPS211
+    sessions: SessionOpener,
+    ids: Any,
+    version: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    pending: bool = False,
+) -> EncodedPage:
+    """Sort documents and encode them as JSON.
+
+    Identical listings of a user requested at once share one load and one
+    encoding, until a document of the user is written.
+
+    :param sessions:Opens the sessions of the loads.
+    :param ids:The id of the user.
+    :param version:Version of the documents of the user.
+    :param limit:Size of the page, all documents if None.
+    :param cursor:Cursor of the page returned with the previous page.
+    :param pending:Only return documents that are not completed.
+    :returns:The encoded documents and the cursor of the next page.
+    """
+    return await coalescer.run(
+        ids,
+        f"sorting:{version}:{pending}:{limit}:{cursor}",
+        partial(sort_tasks, sessions, ids, version, limit, cursor, pending),
+    )
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode content the way ``UJSONResponse`` does.
+
+    :param content:The content.
+    :returns:The encoded content.
+    """
+    return ujson.dumps(content, ensure_ascii=False).encode("utf-8")
+
+
+def encode_cursor(task: Any) -> str:
+    """Build an opaque cursor pointing after a task.
+
+    :param task:The last task of a page.
+    :returns:The cursor.
+    """
+    sort_key = [task.task_date.isoformat(), task.task_time.isoformat(), task.id]
+    encoded = base64.urlsafe_b64encode(json.dumps(sort_key).encode())
+    return encoded.decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, time, int]:
+    """Read the sort key stored in a cursor.
+
+    :param cursor:The cursor.
+    :returns:The sort key of the last task of the previous page.
+    :raises HTTPException:Invalid cursor.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        task_date, task_time, task_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (
+            date.fromisoformat(task_date),
+            time.fromisoformat(task_time),
+            int(task_id),
         )
-    return sorted_tasks
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+def task_dicts(
+    rows: Sequence[Any],
+    fields: List[str],
+) -> List[Dict[str, Any]]:
+    """Turn rows of task columns into documents ready for JSON.
+
+    Dates and times are formatted as ISO 8601, columns of the rows beyond
+    ``fields`` are left out.
+
+    :param rows:The rows.
+    :param fields:Names of the leading columns of the rows.
+    :returns:The documents.
+    """
+    width = len(fields)
+    documents = []
+    for row in rows:
+        values = _export_values(row[:width])
+        documents.append(dict(zip(fields, values)))
+    return documents
+
+
+async def user_task(
+    db: AsyncSession,
+    ids: Any,
+    task_id: int,
+) -> List[Dict[str, Any]]:
+    """Get a single document of a user.
+
+    :param db:The session
+    :param ids:The id of the user.
+    :param task_id:The document id.
+    :returns:The matching documents.
+    """
+    rows = await DocumentDb().user_task(db, ids, task_id)
+    return task_dicts(rows, TASK_FIELDS)
+
+
+async def encoded_task(
+    sessions: SessionOpener,
+    ids: Any,
+    task_id: int,
+) -> Optional[bytes]:
+    """Get a single document of a user, encoded as JSON.
+
+    Identical reads of a user requested at once share one query and one
+    encoding, until a document of the user is written.
+
+    :param sessions:Opens the session of the read.
+    :param ids:The id of the user.
+    :param task_id:The document id.
+    :returns:The encoded matching documents, None when there are none.
+    """
+    return await coalescer.run(
+        ids,
+        f"task:{task_id}",
+        partial(_encode_task, sessions, ids, task_id),
+    )
+
+
+async def export_tasks(
+    sessions: SessionOpener,
+    ids: Any,
+    export_format: ExportFormat,
+) -> AsyncIterator[str]:
+    """Serialize all documents of a user, one batch at a time.
+
+    The session is opened when the export starts and closed once it ends.
+
+    :param sessions:Opens the session of the export.
+    :param ids:The id of the user.
+    :param export_format:NDJSON or CSV.
+    :yields:Chunks of the export.
+    """
+    columns = [column.key for column in EXPORT_COLUMNS]
+    if export_format == ExportFormat.CSV:
+        yield _csv_chunk([columns])
+    async with sessions() as db:
+        batches = DocumentDb().stream_tasks(db, ids, settings.task_export_batch)
+        async for batch in batches:
+            yield _export_chunk(export_format, columns, batch)
+
+
+def _export_values(row: Sequence[Any]) -> List[Any]:
+    return [
+        cell.isoformat() if isinstance(cell, (date, time)) else cell for cell in row
+    ]
+
+
+def _export_chunk(
+    export_format: ExportFormat,
+    columns: List[str],
+    batch: Sequence[Any],
+) -> str:
+    rows = [_export_values(row) for row in batch]
+    if export_format == ExportFormat.CSV:
+        return _csv_chunk(rows)
+    return _ndjson_chunk(columns, rows)
+
+
+def _ndjson_chunk(columns: List[str], rows: List[List[Any]]) -> str:
+    lines = [json.dumps(dict(zip(columns, row))) for row in rows]
+    return "".join(f"{line}\n" for line in lines)
+
+
+def _csv_chunk(rows: List[List[Any]]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def _tasks_version(sessions: SessionOpener, ids: int) -> int:
+    async with sessions() as db:
+        return await DocumentDb().task_version(db, ids)
+
+
+async def _encode_task(
+    sessions: SessionOpener,
+    ids: Any,
+    task_id: int,
+) -> Optional[bytes]:
+    async with sessions() as db:
+        documents = await user_task(db, ids, task_id)
+    return encode_json(documents) if documents else None
+
+
+async def _load_tasks(
+    db: AsyncSession,
+    ids: Any,
+    limit: Optional[int],
+    after: Optional[Tuple[date, time, int]],
+    pending: bool,
+) -> EncodedPage:
+    tasks = await DocumentDb().tasks_db(
+        db,
+        ids,
+        None if limit is None else limit + 1,
+        after,
+        pending,
+    )
+    next_cursor = None
+    if limit is not None and len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = encode_cursor(tasks[-1])
+    return EncodedPage(encode_json(task_dicts(tasks, LISTING_FIELDS)), next_cursor)
+
+
+async def _open_and_load_tasks(
+    sessions: SessionOpener,
+    ids: Any,
+    limit: Optional[int],
+    after: Optional[Tuple[date, time, int]],
+    pending: bool,
+) -> EncodedPage:
+    async with sessions() as db:
+        return await _load_tasks(db, ids, limit, after, pending)
+
+
+async def _page_of_tasks(  # noqa: WPS211
+    sessions: SessionOpener,
+    ids: Any,
+    key: str,
+    limit: int,
+    after: Optional[Tuple[date, time, int]],
+    pending: bool,
+) -> EncodedPage:
+    page = await cache.get_or_load(
+        key,
+        partial(_load_packed_tasks, sessions, ids, limit, after, pending),
+        settings.cache_tasks_ttl,
+    )
+    next_cursor, _, body = page.partition(b"\n")
+    return EncodedPage(body, next_cursor.decode() or None)
+
+
+async def _all_tasks(
+    sessions: SessionOpener,
+    ids: Any,
+    key: str,
+    after: Optional[Tuple[date, time, int]],
+    pending: bool,
+) -> bytes:
+    cached = await cache.get_bytes(key)
+    if cached is not None:
+        return cached
+    body, _ = await _open_and_load_tasks(sessions, ids, None, after, pending)
+    if len(body) <= settings.cache_listing_max_bytes:
+        await cache.set_bytes(key, body, settings.cache_tasks_ttl)
+    return body
+
+
+async def _load_packed_tasks(
+    sessions: SessionOpener,
+    ids: Any,
+    limit: Optional[int],
+    after: Optional[Tuple[date, time, int]],
+    pending: bool,
+) -> bytes:
+    body, next_cursor = await _open_and_load_tasks(
+        sessions,
+        ids,
+        limit,
+        after,
+        pending,
+    )
+    return b"\n".join(((next_cursor or "").encode(), body))
@@ -0,0 +1,270 @@
+import abc
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from loguru import logger
+from yarl import URL
+
+from document_creation_task2.services.cache import (
+    CacheError,
+    connect_redis,
+    server_errors,
+)
+from document_creation_task2.settings import settings
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+# Refills a bucket kept in a hash and takes a token from it.
+# KEYS[1] is the bucket, ARGV holds the rate, the burst and the current time.
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "stamp")
+local tokens = tonumber(bucket[1]) or burst
+local stamp = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - stamp) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "stamp", ARGV[3])
+redis.call("PEXPIRE", KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RateLimit(NamedTuple):
+    """Requests allowed to one user on one route."""
+
+    rate: float
+    burst: int
+
+
+class Decision(NamedTuple):
+    """Outcome of taking a token from a bucket."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float
+    retry_after: float
+
+
+class Buckets(abc.ABC):
+    """Storage of token buckets."""
+
+    @abc.abstractmethod
+    async def take(self, key: str, limit: RateLimit, now: float) -> Tuple[bool, float]:
+        """
+        Refill a bucket and take a token from it.
+
+        :param key: key of the bucket.
+        :param limit: rate and size of the bucket.
+        :param now: current time in seconds.
+        """
+
+    async def close(self) -> None:  # noqa: B027
+        """Release the resources of the storage."""
+
+
+class MemoryBuckets(Buckets):
+    """
+    Buckets kept in the memory of the worker.
+
+    At most ``rate_limit_max_keys`` buckets are kept, the least recently
+    used is dropped first, which only refills it.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, limit: RateLimit, now: float) -> Tuple[bool, float]:
+        """
+        Refill a bucket and take a token from it.
+
+        :param key: key of the bucket.
+        :param limit: rate and size of the bucket.
+        :param now: current time in seconds.
+        :returns: whether a token was taken and the tokens left.
+        """
+        tokens, stamp = self._buckets.pop(key, (limit.burst, now))
+        refill = max(0, now - stamp) * limit.rate
+        tokens = min(limit.burst, tokens + refill)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > settings.rate_limit_max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, tokens
+
+
+class RedisBuckets(Buckets):
+    """
+    Buckets kept in a server speaking the Redis protocol.
+
+    The buckets are shared by all the workers, a script refills them and
+    takes tokens atomically.
+    """
+
+    def __init__(self, client: "Redis") -> None:
+        self.client = client
+        self.script = client.register_script(TAKE_SCRIPT)
+
+    async def take(self, key: str, limit: RateLimit, now: float) -> Tuple[bool, float]:
+        """
+        Refill a bucket and take a token from it.
+
+        :param key: key of the bucket.
+        :param limit: rate and size of the bucket.
+        :param now: current time in seconds.
+        :returns: whether a token was taken and the tokens left.
+        """
+        arguments = (repr(limit.rate), limit.burst, repr(now))
+        with server_errors():
+            allowed, tokens = await self.script(keys=[key], args=arguments)
+        return bool(allowed), float(tokens)
+
+    async def close(self) -> None:
+        """Close the connections to the server."""
+        await self.client.aclose()
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter of authenticated users.
+
+    Each user has a bucket per route, refilled at ``rate`` tokens per second
+    up to ``burst`` tokens, and every request takes a token. Errors of the
+    storage are logged and let requests through.
+    """
+
+    def __init__(self, buckets: Buckets) -> None:
+        self.buckets = buckets
+
+    def use(self, buckets: Buckets) -> None:
+        """
+        Replace the storage of the buckets.
+
+        :param buckets: the new storage.
+        """
+        self.buckets = buckets
+
+    async def hit(self, key: str, limit: RateLimit) -> Decision:
+        """
+        Count a request.
+
+        :param key: key of the bucket.
+        :param limit: rate and size of the bucket.
+        :returns: whether the request is allowed, with the state of the bucket.
+        """
+        try:
+            allowed, tokens = await self.buckets.take(key, limit, time.time())
+        except (OSError, asyncio.TimeoutError, CacheError) as error:
+            logger.warning(f"Rate limiter unavailable: {error!r}")
+            allowed, tokens = True, float(limit.burst)
+        return Decision(
+            allowed=allowed,
+            limit=limit.burst,
+            remaining=int(tokens),
+            reset=(limit.burst - tokens) / limit.rate,
+            retry_after=0 if allowed else (1 - tokens) / limit.rate,
+        )
+
+    async def close(self) -> None:
+        """Close the storage."""
+        await self.buckets.close()
+
+
+def create_buckets(url: str) -> Buckets:
+    """
+    Create the storage of a rate limiter URL.
+
+    :param url: ``memory://`` or ``redis://[:password@]host[:port][/db]``.
+    :returns: the storage.
+    :raises ValueError: unknown scheme.
+    """
+    scheme = URL(url).scheme
+    if scheme == "memory":
+        return MemoryBuckets()
+    if scheme == "redis":
+        return RedisBuckets(connect_redis(url))
+    raise ValueError(f"Unknown rate limiter backend {url}")
+
+
+@lru_cache(maxsize=None)
+def parse_limit(limit: str) -> Optional[RateLimit]:
+    """
+    Parse a limit written as ``rate/burst``.
+
+    :param limit: the limit, a rate of 0 disables it.
+    :returns: the limit, None when disabled.
+    """
+    rate_text, _, burst = limit.partition("/")
+    rate = float(rate_text)
+    if not rate:
+        return None
+    return RateLimit(rate, int(burst) if burst else math.ceil(rate))
+
+
+def route_limit(route: str) -> Optional[RateLimit]:
+    """
+    Limit of a route.
+
+    :param route: template of the route.
+    :returns: the limit, None when the route is not limited.
+    """
+    configured = settings.rate_limit_routes.get(route)
+    if configured is not None:
+        return parse_limit(configured)
+    return parse_limit(f"{settings.rate_limit_rate}/{settings.rate_limit_burst}")
+
+
+def rate_limit_headers(decision: Decision) -> Dict[str, str]:
+    """
+    Rate limit headers of a response.
+
+    :param decision: outcome for the request.
+    :returns: the headers.
+    """
+    return {
+        "RateLimit-Limit": str(decision.limit),
+        "RateLimit-Remaining": str(decision.remaining),
+        "RateLimit-Reset": str(math.ceil(decision.reset)),
+    }
+
+
+async def enforce_rate_limit(request: Request, user_id: object) -> None:
+    """
+    Count a request of a user against the limit of its route.
+
+    The outcome is kept in ``request.state.rate_limit`` for the headers of
+    the response.
+
+    :param request: the request.
+    :param user_id: id of the authenticated user.
+    :raises HTTPException: 429 when the user is over the limit.
+    """
+    route = getattr(request.scope.get("route"), "path_format", request.url.path)
+    limit = route_limit(route)
+    if limit is None:
+        return
+    decision = await rate_limiter.hit(f"ratelimit:{route}:{user_id}", limit)
+    request.state.rate_limit = decision
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(decision.retry_after))},
+        )
+
+
+rate_limiter = RateLimiter(MemoryBuckets())
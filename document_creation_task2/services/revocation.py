@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Set
+
+from fastapi import HTTPException, status
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from document_creation_task2.db.DAO.dao_user import UserDb
+from document_creation_task2.settings import settings
+
+DIGEST_SIZE = 16
+HALF_DIGEST = DIGEST_SIZE // 2
+
+
+class BloomFilter:
+    """Fixed size bloom filter of strings."""
+
+    def __init__(self, bits: int, hashes: int) -> None:
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray((bits + 7) // 8)
+
+    def add(self, key: str) -> None:
+        """
+        Add a key.
+
+        :param key: key to add.
+        """
+        for position in self._positions(key):
+            self._array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: object) -> bool:
+        return all(
+            self._array[position >> 3] & (1 << (position & 7))
+            for position in self._positions(str(key))
+        )
+
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=DIGEST_SIZE).digest()
+        first = int.from_bytes(digest[:HALF_DIGEST], "little")
+        second = int.from_bytes(digest[HALF_DIGEST:], "little") | 1
+        return [
+            (first + index * second) % self.bits  # noqa: WPS221
+            for index in range(self.hashes)
+        ]
+
+
+class RevocationIndex:
+    """
+    In-memory index of revoked token ids.
+
+    The index is a bloom filter rebuilt from the ``revoked_tokens`` table.
+    Ids missing from the filter are surely not revoked, so the table is only
+    queried for revoked tokens and the rare false positive. Until the first
+    load every id is checked against the table.
+
+    Ids revoked by this worker are rejected without a query until a refresh
+    finds them in the table, as their rows may still wait to be written, or
+    until their tokens expire.
+    """
+
+    def __init__(self) -> None:
+        self._filter: Optional[BloomFilter] = None
+        self._added: Optional[Set[str]] = None
+        self._unconfirmed: Dict[str, datetime] = {}
+
+    def might_be_revoked(self, jti: str) -> bool:
+        """
+        Check whether a token id may be revoked.
+
+        :param jti: id of the token.
+        :returns: False if the token is surely not revoked.
+        """
+        return self._filter is None or jti in self._filter
+
+    @property
+    def unconfirmed(self) -> int:
+        """
+        Number of ids revoked by this worker not found in the table yet.
+
+        :returns: the number of ids.
+        """
+        return len(self._unconfirmed)
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        """
+        Add a revoked token id.
+
+        :param jti: id of the token.
+        :param expires_at: expiration of the token.
+        """
+        if self._filter is not None:
+            self._filter.add(jti)
+        if self._added is not None:
+            self._added.add(jti)
+        self._unconfirmed[jti] = expires_at
+
+    async def check(self, jti: str, db: AsyncSession) -> None:
+        """
+        Reject revoked tokens.
+
+        :param jti: id of the token.
+        :param db: the session.
+
+        :raises HTTPException: Token revoked by this worker.
+        """
+        if jti in self._unconfirmed:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+            )
+        if self.might_be_revoked(jti):
+            await UserDb().revoked_token(jti, db)
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """
+        Rebuild the index from the table.
+
+        Ids added while the table is read are kept. Ids revoked by this
+        worker are forgotten once found in the table or expired, as expired
+        revocations are not read from it.
+
+        :param db: the session.
+        """
+        self._added = set()
+        try:  # noqa: WPS501
+            revoked = await UserDb().revoked_ids(db)
+            bloom = BloomFilter(
+                settings.revocation_filter_bits,
+                settings.revocation_filter_hashes,
+            )
+            for jti in (*revoked, *self._added):
+                bloom.add(jti)
+            self._filter = bloom
+            self._confirm(revoked)
+        finally:
+            self._added = None
+
+    def reset(self) -> None:
+        """Forget the index until the next refresh."""
+        self._filter = None
+
+    def _confirm(self, revoked: Sequence[str]) -> None:
+        now = datetime.utcnow()
+        stored = set(revoked)
+        self._unconfirmed = {
+            jti: expires_at
+            for jti, expires_at in self._unconfirmed.items()
+            if expires_at >= now and jti not in stored
+        }
+
+
+revocation_index = RevocationIndex()
+
+
+async def maintain_revocations(
+    session_factory: "async_sessionmaker[AsyncSession]",
+) -> None:  # pragma: no cover
+    """
+    Keep the revocation index fresh and purge expired revocations.
+
+    Runs until cancelled.
+
+    :param session_factory: factory of database sessions.
+    """
+    last_purge = float("-inf")
+    while True:  # noqa: WPS457
+        try:
+            async with session_factory() as session:
+                if time.monotonic() - last_purge >= settings.revocation_purge_interval:
+                    purged = await UserDb().purge_revoked(session)
+                    last_purge = time.monotonic()
+                    logger.debug(f"Purged {purged} expired revocations")
+                await revocation_index.refresh(session)
+        except Exception:
+            logger.exception("Cannot refresh revoked tokens")
+        await asyncio.sleep(settings.revocation_refresh_interval)
@@ -1,16 +1,76 @@
-import os
+import hashlib
 from datetime import datetime
-from typing import Any
+from types import ModuleType
+from typing import Any, Dict, NamedTuple, Optional
+from uuid import uuid4
 
-from dotenv import load_dotenv
 from fastapi import HTTPException, status
-from jose import JWTError, jwt
+from jose.exceptions import JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from document_creation_task2.db.DAO.dao_user import UserDb
+from document_creation_task2.services.cache import auth_key, cache
+from document_creation_task2.services.revocation import revocation_index
+from document_creation_task2.services.write_behind import write_behind
+from document_creation_task2.settings import settings
 
-load_dotenv()
-secret_key = os.getenv("secret_key")
-algorithm = os.getenv("algorithm")
+# Cached in place of the user of a revoked token.
+REVOKED_TOKEN = {"revoked": True}
+
+
+class VerifiedToken(NamedTuple):
+    """Claims of a token that passed verification."""
+
+    user_id: str
+    jti: str
+    expiration: datetime
+
+
+def _jwt() -> ModuleType:
+    """
+    Import jose on first use.
+
+    jose loads cryptography, which slows down the start of every worker.
+
+    :returns: the jwt module of jose.
+    """
+    from jose import jwt  # noqa: WPS433
+
+    return jwt
+
+
+def signing_key() -> str:
+    """
+    Key signing the tokens.
+
+    Without a key anyone could sign tokens, so nothing is signed or
+    accepted until one is configured.
+
+    :returns: the key.
+    :raises RuntimeError: no key is configured.
+    """
+    if not settings.secret_key:
+        raise RuntimeError("DOCUMENT_CREATION_TASK2_SECRET_KEY is not set")
+    return settings.secret_key
+
+
+def encode_token(payload: Dict[str, Any]) -> str:
+    """
+    Sign a token.
+
+    :param payload: claims of the token.
+    :returns: the token.
+    """
+    return _jwt().encode(payload, signing_key(), algorithm=settings.algorithm)
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """
+    Check the signature of a token and read its claims.
+
+    :param token: the token.
+    :returns: claims of the token.
+    """
+    return _jwt().decode(token, signing_key(), algorithms=[settings.algorithm])
 
 
 def refresh_tok(name: Any, ids: Any, time: Any, refresh: bool) -> str:
@@ -24,10 +84,10 @@ def refresh_tok(name: Any, ids: Any, time: Any, refresh: bool) -> str:
 
     :returns:The generated refresh token.
     """
-    payload = {"id": ids, "name": name, "ref_token": refresh}
+    payload = {"id": ids, "name": name, "ref_token": refresh, "jti": uuid4().hex}
     expiration = datetime.utcnow() + time
     payload["expiration"] = expiration.isoformat()
-    return jwt.encode(payload, secret_key, algorithm=algorithm)
+    return encode_token(payload)
 
 
 def token_gen(name: Any, ids: Any, time: Any) -> str:
@@ -38,34 +98,122 @@ def token_gen(name: Any, ids: Any, time: Any) -> str:
     :param time: accesstoken active time.
     :returns:access token.
     """
-    payload = {"name": name, "id": ids}
+    payload = {"name": name, "id": ids, "jti": uuid4().hex}
     expiration = datetime.utcnow() + time
     payload["expiration"] = expiration.isoformat()
-    return jwt.encode(payload, secret_key, algorithm=algorithm)
+    return encode_token(payload)
+
 
+def token_id(payload: Dict[str, Any], token: str) -> str:
+    """Returns the id of a token used to revoke it.
 
-def get_current_user(token: Any, db: Any) -> str:
+    Tokens issued without a ``jti`` claim are identified by their hash.
+
+    :param payload: The decoded token.
+    :param token: The token.
+
+    :returns: The token id.
+    """
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+
+async def revoke_token(token: str, db: AsyncSession) -> None:
+    """Revoke a token until it expires.
+
+    The cached user of the token is replaced by a tombstone kept until the
+    token expires, so that no worker caches the token again.
+
+    :param token: The token to revoke.
+    :param db: The session.
+
+    :raises HTTPException: Invalid token.
+    """
+    try:
+        payload = decode_token(token)
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token",
+        )
+    jti = token_id(payload, token)
+    expiration = datetime.fromisoformat(payload["expiration"])
+    await write_behind.revoke(jti, expiration, db)
+    revocation_index.add(jti, expiration)
+    await cache.set(auth_key(token), REVOKED_TOKEN, _seconds_left(expiration))
+
+
+async def get_current_user(token: Any, db: AsyncSession) -> str:
     """Returns the user id of the current active user.
 
+    Tokens verified before are answered from the cache shared by the
+    workers, for at most ``token_cache_ttl`` seconds and never after the
+    token expires. Cached tokens are still checked against the revocation
+    index, so a worker caching in its own memory rejects a token revoked by
+    another one after its next refresh. A verified token is only cached when
+    the cache holds nothing for it, so the tombstone of a revoked token is
+    never replaced by a worker that has not seen the revocation yet.
+
     :param token: The token of the current user.
     :param db: The session.
 
     :returns: User ID of the current active user.
+    """
+    key = auth_key(token)
+    cached_token = await _cached_token(key)
+    if cached_token is not None:
+        await revocation_index.check(cached_token["jti"], db)
+        return cached_token["id"]
+    verified = await _verify_token(token, db)
+    ttl = min(settings.token_cache_ttl, _seconds_left(verified.expiration))
+    cached_token = {"id": verified.user_id, "jti": verified.jti}
+    if not await cache.add(key, cached_token, ttl):
+        await _cached_token(key)
+    return verified.user_id
+
+
+def _seconds_left(expiration: datetime) -> float:
+    return (expiration - datetime.utcnow()).total_seconds()
+
+
+async def _cached_token(key: str) -> Optional[Dict[str, Any]]:
+    """Read the cached user and id of a token.
+
+    :param key: The key of the token.
+
+    :returns: User ID and token id, None when the token is not cached.
+    :raises HTTPException: Token revoked.
+    """
+    cached_token = await cache.get(key)
+    if cached_token == REVOKED_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+        )
+    return cached_token
+
+
+async def _verify_token(token: Any, db: AsyncSession) -> VerifiedToken:
+    """Verify a token against the revocations and its expiration.
+
+    :param token: The token of the current user.
+    :param db: The session.
+
+    :returns: User ID, id and expiration of the token.
     :raises HTTPException: Unauthorized user, token revoked, or expired.
     """
     try:
-        UserDb().revoked_token(token, db)
-        payload = jwt.decode(token, secret_key, algorithms=[algorithm])
+        payload = decode_token(token)
+        await revocation_index.check(token_id(payload, token), db)
         expiration = datetime.fromisoformat(payload["expiration"])
 
         if datetime.utcnow() > expiration:
             error_det = "Token has expired"
         else:
-            user_id: str = payload.get("id")
+            user_id: Optional[str] = payload.get("id")
             if user_id is None:
                 error_det = "User ID not found in token"
             else:
-                return user_id
+                return VerifiedToken(user_id, token_id(payload, token), expiration)
 
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=error_det)
 
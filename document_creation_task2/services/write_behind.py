@@ -0,0 +1,142 @@
+import asyncio
+from contextlib import suppress
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from document_creation_task2.db.DAO.dao_user import UserDb
+from document_creation_task2.services.revocation import revocation_index
+from document_creation_task2.settings import settings
+
+
+class WriteBehind:
+    """
+    Buffers inserts of issued tokens and revocations.
+
+    Buffered rows are written together every ``write_behind_interval``
+    seconds, or as soon as ``write_behind_batch`` of them wait. Requests
+    write their own rows while the queue is not started or once
+    ``write_behind_buffer`` rows wait. Revocations the revocation index
+    cannot rule out are checked against the table and written right away.
+    """
+
+    def __init__(self) -> None:
+        self._tokens: List[Dict[str, Any]] = []
+        self._revocations: Dict[str, datetime] = {}
+        self._session_factory: Optional["async_sessionmaker[AsyncSession]"] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of rows waiting to be written.
+
+        :returns: the number of rows.
+        """
+        return len(self._tokens) + len(self._revocations)
+
+    def start(self, session_factory: "async_sessionmaker[AsyncSession]") -> None:
+        """
+        Start writing buffered rows in the background.
+
+        :param session_factory: factory of database sessions.
+        """
+        self._session_factory = session_factory
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background writes once the rows left are written."""
+        task = self._task
+        self._task = None
+        if task is None:
+            return
+        if self._wakeup is not None:
+            self._wakeup.set()
+        await task
+        await self.flush()
+
+    async def add_token(self, token: str, user_id: Any, db: AsyncSession) -> None:
+        """
+        Store an issued access token.
+
+        :param token: the access token.
+        :param user_id: owner of the token.
+        :param db: session used when the row is written right away.
+        """
+        if not self._accepting():
+            await UserDb().add_token(token, user_id, db)
+            return
+        self._tokens.append({"accesstype": token, "user_id": user_id})
+        self._added()
+
+    async def revoke(self, jti: str, expires_at: datetime, db: AsyncSession) -> None:
+        """
+        Revoke a token.
+
+        :param jti: id of the token.
+        :param expires_at: expiration of the token.
+        :param db: session used when the row is written right away.
+
+        :raises HTTPException: Token already revoked.
+        """
+        if jti in self._revocations:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has already been revoked",
+            )
+        if not self._accepting() or revocation_index.might_be_revoked(jti):
+            await UserDb().revoke_token(jti, expires_at, db)
+            return
+        self._revocations[jti] = expires_at
+        self._added()
+
+    async def flush(self) -> None:
+        """
+        Write the buffered rows.
+
+        Rows are put back in the buffer when they cannot be written.
+        """
+        if not self.pending or self._session_factory is None:
+            return
+        tokens = self._tokens
+        revocations = self._revocations
+        self._tokens = []
+        self._revocations = {}
+        try:
+            async with self._session_factory() as session:
+                await UserDb().write_batch(tokens, revocations, session)
+        except Exception:
+            failed = len(tokens) + len(revocations)
+            logger.exception(f"Cannot write {failed} buffered rows")
+            self._tokens = tokens + self._tokens
+            self._revocations = {**revocations, **self._revocations}
+
+    def _accepting(self) -> bool:
+        return self._task is not None and self.pending < settings.write_behind_buffer
+
+    def _added(self) -> None:
+        if self._wakeup is not None and self.pending >= settings.write_behind_batch:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while self._task is not None:
+            await self._wait()
+            await self.flush()
+
+    async def _wait(self) -> None:
+        if self._wakeup is None:
+            return
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                self._wakeup.wait(),
+                timeout=settings.write_behind_interval,
+            )
+        self._wakeup.clear()
+
+
+write_behind = WriteBehind()
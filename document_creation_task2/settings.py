@@ -1,7 +1,9 @@
 import enum
 from pathlib import Path
 from tempfile import gettempdir
+from typing import Dict, List, Optional
 
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from yarl import URL
 
@@ -19,6 +21,13 @@ class LogLevel(str, enum.Enum):  # noqa: WPS600
     FATAL = "FATAL"
 
 
+class ServerMode(str, enum.Enum):  # noqa: WPS600
+    """Ways to run the server."""
+
+    DEV = "dev"
+    PRODUCTION = "production"
+
+
 class Settings(BaseSettings):
     """
     Application settings.
@@ -29,15 +38,35 @@ class Settings(BaseSettings):
 
     host: str = "127.0.0.1"
     port: int = 8000
-    # quantity of workers for uvicorn
-    workers_count: int = 1
+    # quantity of workers, when unset one in dev and one per available CPU in production
+    workers_count: Optional[int] = None
     # Enable uvicorn reloading
     reload: bool = False
+    # dev runs uvicorn, production runs uvicorn workers under gunicorn
+    server_mode: ServerMode = ServerMode.DEV
+    # Requests served by a worker before it is replaced, 0 never replaces it
+    worker_max_requests: int = 0
+    # Up to this many requests are added at random to worker_max_requests
+    worker_max_requests_jitter: int = 0
+    # Peak memory in MiB above which a worker is replaced, 0 disables the check
+    worker_max_memory_mb: int = 0
+    # Seconds without a heartbeat after which a worker is killed and replaced
+    worker_timeout: int = 30
+    # Build the application once in the master process before forking workers
+    preload_app: bool = True
+    # Seconds given to in-flight requests to finish on shutdown
+    graceful_timeout: int = 30
 
     # Current environment
     environment: str = "dev"
 
     log_level: LogLevel = LogLevel.INFO
+    # Write logs from a background thread instead of the event loop
+    log_enqueue: bool = False
+    # Write logs as one JSON object per line
+    log_json: bool = False
+    # Share of uvicorn access logs written, server errors are always written
+    log_access_sample_rate: float = 1
     # Variables for the database
     db_host: str = "localhost"
     db_port: int = 5432
@@ -45,6 +74,126 @@ class Settings(BaseSettings):
     db_pass: str = "document_creation_task2"
     db_base: str = "document_creation_task2"
     db_echo: bool = False
+    # Connections kept open by the pool of each worker
+    db_pool_size: int = 5
+    # Connections opened above db_pool_size under load
+    db_max_overflow: int = 10
+    # Seconds to wait for a free connection before failing
+    db_pool_timeout: float = 30
+    # Shed requests with 503 once the pool is saturated
+    admission_enabled: bool = True
+    # Requests using or waiting for each connection before new ones are shed
+    admission_queue_factor: float = 2
+    # Share of the admitted requests open to reads, the rest is kept for writes
+    admission_read_share: float = 0.75
+    # Seconds shed clients are told to wait before retrying
+    admission_retry_after: int = 1
+    # Seconds after which connections are replaced, -1 keeps them forever
+    db_pool_recycle: int = -1
+    # Check connections with a ping before handing them out
+    db_pool_pre_ping: bool = False
+    # Prepared statements cached per connection, 0 for pgbouncer in transaction mode
+    db_statement_cache_size: int = 100
+    # Open db_pool_size connections at startup
+    db_pool_warmup: bool = True
+    # Seconds to wait for a new database connection
+    db_connect_timeout: float = 5
+    # URLs of read replicas serving read-only endpoints
+    db_replica_urls: List[str] = []
+    # Seconds an unreachable replica is skipped
+    db_replica_retry_interval: float = 30
+    # Seconds a client reads from the primary after it writes
+    db_primary_pin_seconds: float = 5
+    # Statements taking at least this many milliseconds are logged
+    slow_query_ms: float = 200
+    # Identical statements run this many times by one request are logged
+    query_repeat_threshold: int = 2
+
+    # Collect Prometheus metrics of requests and database statements
+    metrics_enabled: bool = True
+
+    # Largest page of tasks a client may ask for
+    task_page_max: int = 1000
+    # Tasks fetched from the server-side cursor at once during exports
+    task_export_batch: int = 1000
+    # Number of tasks deleted per transaction when clearing tasks
+    task_clear_chunk: int = 5000
+    # Largest number of tasks created by one bulk request
+    task_bulk_max: int = 10000
+    # Bulk creations of at least this many tasks use COPY instead of INSERT
+    task_bulk_copy_threshold: int = 1000
+
+    # Workers hashing and verifying passwords at the same time
+    password_hash_workers: int = 4
+    # Password checks allowed to wait for a worker before answering 503
+    password_hash_queue: int = 64
+    # Use a process pool instead of a thread pool for password hashing
+    password_hash_processes: bool = False
+
+    # Key signing the tokens, required to build the application.
+    # The unprefixed name of older .env files is read too
+    secret_key: str = Field(
+        default="",
+        validation_alias=AliasChoices(
+            "document_creation_task2_secret_key",
+            "secret_key",
+        ),
+    )
+    # Algorithm signing the tokens
+    algorithm: str = Field(
+        default="HS256",
+        validation_alias=AliasChoices("document_creation_task2_algorithm", "algorithm"),
+    )
+    # Seconds a verified token is trusted without checking revocations again
+    token_cache_ttl: float = 60
+
+    # Cache backend: memory:// for a cache in each worker, or
+    # redis://[:password@]host[:port][/db] for a cache shared by the workers
+    cache_url: str = "memory://"
+    # Bytes of keys and values kept by the memory backend
+    cache_max_bytes: int = 67108864
+    # Connections to the cache server opened by each worker
+    cache_pool_size: int = 10
+    # Seconds to wait for a connection to the cache server
+    cache_connect_timeout: float = 1
+    # Seconds a loader holds the lock of a missing value before others load it
+    cache_lock_ttl: float = 5
+    # Seconds between checks for a value being loaded by another worker
+    cache_lock_poll: float = 0.02
+    # Seconds task listings are kept in the cache
+    cache_tasks_ttl: float = 30
+    # Bytes above which a listing of all tasks is loaded again on every read
+    cache_listing_max_bytes: int = 1048576
+    # Share one read between identical reads of a user served at once
+    coalescing_enabled: bool = True
+
+    # Requests per second each user may make to a route, 0 disables the limit
+    rate_limit_rate: float = 10
+    # Requests a user may make to a route at once above the rate
+    rate_limit_burst: int = 20
+    # Limits of single routes as "rate/burst", keyed by route path
+    rate_limit_routes: Dict[str, str] = {}
+    # Rate limiter backend: memory:// for buckets in each worker, or
+    # redis://[:password@]host[:port][/db] for buckets shared by the workers
+    rate_limit_url: str = "memory://"
+    # Buckets kept by the memory backend
+    rate_limit_max_keys: int = 100000
+
+    # Seconds between writes of buffered token and revocation rows
+    write_behind_interval: float = 0.5
+    # Buffered rows written before the interval ends, and rows per INSERT
+    write_behind_batch: int = 500
+    # Buffered rows above which requests write their own, 0 disables buffering
+    write_behind_buffer: int = 10000
+
+    # Size in bits of the in-memory filter of revoked token ids
+    revocation_filter_bits: int = 1048576
+    # Hash functions of the filter of revoked token ids
+    revocation_filter_hashes: int = 7
+    # Seconds between reloads of revoked token ids from the database
+    revocation_refresh_interval: float = 5
+    # Seconds between purges of expired revocations
+    revocation_purge_interval: float = 300
 
     @property
     def db_url(self) -> URL:
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from starlette import status
+
+from document_creation_task2.settings import settings
+from document_creation_task2.web.admission import (
+    WRITE_ROUTE,
+    AdmissionMiddleware,
+    Priority,
+    is_write_route,
+    request_priority,
+)
+
+
+def _saturable_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware)
+    release = asyncio.Event()
+    app.state.release = release
+
+    @app.get("/api/health")
+    async def health() -> None:  # noqa: WPS430
+        """Health check."""
+
+    @app.api_route("/api/slow", methods=["GET", "POST"])
+    async def slow() -> None:  # noqa: WPS430
+        await release.wait()
+
+    @app.post("/api/write", dependencies=[WRITE_ROUTE])
+    async def write() -> None:  # noqa: WPS430
+        await release.wait()
+
+    @app.post("/api/login")
+    async def login() -> None:  # noqa: WPS430
+        await release.wait()
+
+    return app
+
+
+def _saturate(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "db_pool_size", 1)
+    monkeypatch.setattr(settings, "db_max_overflow", 0)
+    monkeypatch.setattr(settings, "admission_queue_factor", 2)
+    monkeypatch.setattr(settings, "admission_read_share", 0.5)
+
+
+@pytest.mark.anyio
+async def test_reads_are_shed_before_writes(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Over the limit reads get 503, write routes and health checks pass."""
+    _saturate(monkeypatch)
+    app = _saturable_app()
+    labels = {"priority": "read"}
+    before = REGISTRY.get_sample_value("http_requests_shed_total", labels) or 0
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        first = asyncio.create_task(client.get("/api/slow"))
+        await asyncio.sleep(0.05)
+        shed = await client.get("/api/slow")
+        forged = await client.post("/api/slow", headers={"Authorization": "x"})
+        health = await client.get("/api/health")
+        write = asyncio.create_task(client.post("/api/write"))
+        await asyncio.sleep(0.05)
+        app.state.release.set()
+        served = [(await request).status_code for request in (first, write)]
+
+    shed_codes = {shed.status_code, forged.status_code}
+    assert shed_codes == {status.HTTP_503_SERVICE_UNAVAILABLE}
+    assert shed.headers["Retry-After"] == str(settings.admission_retry_after)
+    assert health.status_code == status.HTTP_200_OK
+    assert served == [status.HTTP_200_OK, status.HTTP_200_OK]
+    assert REGISTRY.get_sample_value("http_requests_shed_total", labels) == before + 2
+
+
+@pytest.mark.anyio
+async def test_login_flood_leaves_writes_in(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Anonymous logins over the read limit are shed, writes still get in."""
+    _saturate(monkeypatch)
+    app = _saturable_app()
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        logins = [asyncio.create_task(client.post("/api/login")) for _ in range(10)]
+        await asyncio.sleep(0.05)
+        write = asyncio.create_task(client.post("/api/write"))
+        await asyncio.sleep(0.05)
+        app.state.release.set()
+        written = await write
+        answered = [(await login).status_code for login in logins]
+
+    assert written.status_code == status.HTTP_200_OK
+    assert answered.count(status.HTTP_200_OK) == 1
+    assert answered.count(status.HTTP_503_SERVICE_UNAVAILABLE) == 9
+
+
+@pytest.mark.anyio
+async def test_priority_comes_from_the_route(fastapi_app: FastAPI) -> None:
+    """Signouts and task writes are writes, anonymous requests are not."""
+    writes = [route for route in fastapi_app.routes if is_write_route(route)]
+    request = {"type": "http", "method": "POST"}
+    priorities = {
+        path: request_priority({**request, "path": path}, writes)
+        for path in (
+            "/api/User/user_signout",
+            "/api/document/task/bulk_create",
+            "/api/User/user_login",
+            "/api/User/create_user",
+            "/api/User/token/refresh",
+        )
+    }
+    forged = {**request, "path": "/api/nowhere", "headers": [(b"authorization", b"x")]}
+
+    writes_of = {
+        path for path, priority in priorities.items() if priority == Priority.WRITE
+    }
+    assert writes_of == {"/api/User/user_signout", "/api/document/task/bulk_create"}
+    assert request_priority(forged, writes) == Priority.READ
@@ -0,0 +1,152 @@
+import asyncio
+from typing import AsyncGenerator
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from document_creation_task2.services.cache import (
+    Cache,
+    CacheBackend,
+    MemoryBackend,
+    RedisBackend,
+    connect_redis,
+)
+from document_creation_task2.settings import settings
+
+
+@pytest.fixture
+def redis_server() -> FakeServer:
+    """
+    Stand-in for a Redis server keeping values in memory.
+
+    :returns: the server.
+    """
+    return FakeServer()
+
+
+@pytest.fixture(params=["memory", "redis"])
+async def backend(
+    request: pytest.FixtureRequest,
+    redis_server: FakeServer,
+) -> AsyncGenerator[CacheBackend, None]:
+    """
+    Each backend of the cache.
+
+    :param request: the parameter of the fixture.
+    :param redis_server: the stand-in server.
+    :yields: the backend.
+    """
+    created: CacheBackend = MemoryBackend()
+    if request.param == "redis":
+        created = RedisBackend(FakeAsyncRedis(server=redis_server))
+    try:  # noqa: WPS501
+        yield created
+    finally:
+        await created.close()
+
+
+@pytest.mark.anyio
+async def test_backend_operations(backend: CacheBackend) -> None:
+    """Values are stored, added only once, deleted and expired."""
+    await backend.set("key", b"value", 60)
+    added = await backend.add("key", b"other", 60)
+    assert await backend.get("key") == b"value"
+    await backend.delete("key")
+    assert await backend.get("key") is None
+
+    await backend.add("short", b"value", 0.01)
+    await asyncio.sleep(0.05)
+
+    assert not added
+    assert await backend.get("short") is None
+
+
+@pytest.mark.anyio
+async def test_least_recently_used_is_dropped(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The memory backend keeps at most ``cache_max_bytes`` of values."""
+    monkeypatch.setattr(settings, "cache_max_bytes", 13)
+    memory = MemoryBackend()
+    await memory.set("first", b"1", 60)
+    await memory.set("second", b"2", 60)
+    await memory.get("first")
+    await memory.set("third", b"3", 60)
+
+    assert await memory.get("second") is None
+    assert await memory.get("first") == b"1"
+    assert await memory.get("third") == b"3"
+
+
+@pytest.mark.anyio
+async def test_expired_values_are_purged_on_set() -> None:
+    """Expired values are dropped without being read again."""
+    memory = MemoryBackend()
+    await memory.set("short", b"1", 0.01)
+    await memory.set("long", b"2", 60)
+    await asyncio.sleep(0.05)
+
+    await memory.set("other", b"3", 60)
+
+    assert len(memory) == 2
+    assert await memory.get("long") == b"2"
+
+
+@pytest.mark.anyio
+async def test_concurrent_misses_load_once(redis_server: FakeServer) -> None:
+    """Workers sharing a server load a missing value once."""
+    workers = [
+        Cache(RedisBackend(FakeAsyncRedis(server=redis_server))) for _ in range(2)
+    ]
+    loads = []
+    calls = [workers[index % 2] for index in range(10)]
+
+    async def load() -> bytes:  # noqa: WPS430
+        loads.append(1)
+        await asyncio.sleep(0.05)
+        return b"value"
+
+    try:  # noqa: WPS501
+        loaded = await asyncio.gather(
+            *(worker.get_or_load("key", load, 60) for worker in calls),
+        )
+    finally:
+        for worker in workers:
+            await worker.close()
+
+    assert set(loaded) == {b"value"}
+    assert len(loads) == 1
+
+
+@pytest.mark.anyio
+async def test_cancelled_caller_does_not_fail_others() -> None:
+    """Callers waiting for a load get the value when the first one is cancelled."""
+    cache = Cache(MemoryBackend())
+    release = asyncio.Event()
+
+    async def load() -> bytes:  # noqa: WPS430
+        await release.wait()
+        return b"value"
+
+    first = asyncio.create_task(cache.get_or_load("key", load, 60))
+    await asyncio.sleep(0)
+    joined = asyncio.create_task(cache.get_or_load("key", load, 60))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await joined == b"value"
+    assert first.cancelled()
+    assert await cache.get_bytes("key") == b"value"
+
+
+@pytest.mark.anyio
+async def test_unreachable_server_is_a_miss(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Values are loaded when the cache server cannot be reached."""
+    monkeypatch.setattr(settings, "cache_connect_timeout", 0.5)
+    unreachable = Cache(RedisBackend(connect_redis("redis://127.0.0.1:1")))
+
+    async def load() -> bytes:  # noqa: WPS430
+        return b"value"
+
+    assert await unreachable.get_or_load("key", load, 60) == b"value"
+    assert unreachable.stats() == {"key": {"hits": 0, "misses": 1}}
@@ -0,0 +1,129 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from starlette import status
+
+from document_creation_task2.db.models.users import UserDet
+from document_creation_task2.services.coalescing import Coalescer, coalescer
+from document_creation_task2.services.document_service import tasks_version
+
+TASK = {
+    "task_name": "write report",
+    "task_date": "2023-01-02",
+    "task_time": "10:00:00+00:00",
+    "priority": "high",
+}
+
+
+class GatedRead:
+    """Read counting its runs and blocked until released."""
+
+    def __init__(self) -> None:
+        self.runs = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> List[int]:
+        """
+        Run the read.
+
+        :returns: the number of the run.
+        """
+        self.runs += 1
+        run = self.runs
+        await self.release.wait()
+        return [run]
+
+
+@pytest.mark.anyio
+async def test_identical_reads_share_one_read() -> None:
+    """Identical reads of a user share a read, others run their own."""
+    flights = Coalescer()
+    read = GatedRead()
+
+    joined = [flights.run(1, "task:1", read) for _ in range(3)]
+    joined_tasks = [asyncio.create_task(joined_read) for joined_read in joined]
+    other = asyncio.create_task(flights.run(2, "task:1", read))
+    await asyncio.sleep(0)
+    read.release.set()
+    results = await asyncio.gather(*joined_tasks)
+
+    assert read.runs == 2
+    assert results == [[1], [1], [1]]
+    assert results[0] is results[1]
+    assert await other == [2]
+    assert not flights.in_flight()
+
+
+@pytest.mark.anyio
+async def test_cancelled_caller_does_not_fail_others() -> None:
+    """Callers joining a read get its result when the first one is cancelled."""
+    flights = Coalescer()
+    read = GatedRead()
+    first = asyncio.create_task(flights.run(1, "task:1", read))
+    await asyncio.sleep(0)
+    joined = asyncio.create_task(flights.run(1, "task:1", read))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    read.release.set()
+
+    assert await joined == [1]
+    assert first.cancelled()
+    assert read.runs == 1
+    assert not flights.in_flight()
+
+
+@pytest.mark.anyio
+async def test_shared_read_owns_its_session(
+    _engine: AsyncEngine,
+) -> None:
+    """A shared read owns its session, the first caller may go away."""
+    factory = async_sessionmaker(_engine)
+
+    @asynccontextmanager
+    async def slow_sessions() -> AsyncIterator[AsyncSession]:  # noqa: WPS430
+        async with factory() as session:
+            await session.execute(text("SELECT pg_sleep(0.1)"))
+            yield session
+
+    first = asyncio.create_task(tasks_version(slow_sessions, -1))
+    await asyncio.sleep(0.02)
+    joined = asyncio.create_task(tasks_version(slow_sessions, -1))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await joined == 0
+    assert first.cancelled()
+    assert _engine.pool.checkedout() == 0  # type: ignore
+
+
+@pytest.mark.anyio
+async def test_writes_break_reads_in_flight(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    dbsession: AsyncSession,
+) -> None:
+    """Reads started after a task of the user is written are not joined."""
+    user_id = await dbsession.scalar(select(UserDet.id))
+    read = GatedRead()
+    before = asyncio.create_task(coalescer.run(user_id, "version", read))
+    await asyncio.sleep(0)
+
+    response = await client.put(
+        "/api/document/task/create_task",
+        json=TASK,
+        headers=auth_headers,
+    )
+    after = asyncio.create_task(coalescer.run(user_id, "version", read))
+    await asyncio.sleep(0)
+    read.release.set()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert (await before, await after) == ([1], [2])
+    assert not coalescer.in_flight()
@@ -3,6 +3,9 @@ from fastapi import FastAPI
 from httpx import AsyncClient
 from starlette import status
 
+from document_creation_task2.db.utils import create_engine, warm_up_pool
+from document_creation_task2.settings import settings
+
 
 @pytest.mark.anyio
 async def test_health(client: AsyncClient, fastapi_app: FastAPI) -> None:
@@ -15,3 +18,25 @@ async def test_health(client: AsyncClient, fastapi_app: FastAPI) -> None:
     url = fastapi_app.url_path_for("health_check")
     response = await client.get(url)
     assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.anyio
+async def test_health_reports_pool(client: AsyncClient, fastapi_app: FastAPI) -> None:
+    """
+    The health endpoint reports the pool warmed up at startup.
+
+    :param client: client for the app.
+    :param fastapi_app: current FastAPI application.
+    """
+    engine = create_engine()
+    fastapi_app.state.db_engine = engine
+    try:  # noqa: WPS501
+        await warm_up_pool(engine, 2)
+        response = await client.get(fastapi_app.url_path_for("health_check"))
+    finally:
+        await engine.dispose()
+
+    pool = response.json()["pool"]
+    assert pool["checked_in"] == 2
+    assert pool["checked_out"] == 0
+    assert pool["size"] == settings.db_pool_size
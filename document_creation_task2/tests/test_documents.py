@@ -0,0 +1,397 @@
+import json
+from typing import Any, Dict
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from document_creation_task2.db.DAO.dao_documents import DocumentDb
+from document_creation_task2.db.models.users import Task, UserDet
+from document_creation_task2.settings import settings
+
+TASK = {
+    "task_name": "write report",
+    "task_date": "2023-01-02",
+    "task_time": "10:00:00+00:00",
+    "priority": "high",
+}
+
+
+async def _create(client: AsyncClient, headers: Dict[str, str], **fields: Any) -> None:
+    response = await client.put(
+        "/api/document/task/create_task",
+        json={**TASK, **fields},
+        headers=headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.anyio
+async def test_create_and_sort(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+) -> None:
+    """Tasks are returned ordered by date and time."""
+    await _create(client, auth_headers, task_name="late", task_date="2023-01-03")
+    await _create(client, auth_headers, task_name="early")
+
+    response = await client.get("/api/document/task/sorting", headers=auth_headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [task["task_name"] for task in response.json()] == ["early", "late"]
+
+
+@pytest.mark.anyio
+async def test_update_and_delete(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    dbsession: AsyncSession,
+) -> None:
+    """A task can be completed, edited and deleted."""
+    await _create(client, auth_headers)
+    task_id = await dbsession.scalar(select(Task.id))
+
+    response = await client.put(
+        f"/api/document/task/update_completion/{task_id}",
+        params={"id_values": task_id},
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await client.put(
+        f"/api/document/tasks/update/{task_id}",
+        json={"task_name": "edited", "task_date": "2023-01-01", "priority": "low"},
+        headers=auth_headers,
+    )
+    assert response.json()["task_name"] == "edited"
+    assert response.json()["is_complete"] == "Completed"
+
+    response = await client.delete(
+        f"/api/document/Documents/delete/{task_id}",
+        params={"id_value": task_id},
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await client.get(
+        "/api/document/task/access_task",
+        params={"id_value": task_id},
+        headers=auth_headers,
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_clear_tasks(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Clearing removes the tasks of the user in chunks and keeps the others."""
+    monkeypatch.setattr(settings, "task_clear_chunk", 2)
+    for _ in range(3):
+        await _create(client, auth_headers)
+    credentials = {"name": "other-user", "password": "secret"}
+    await client.post("/api/User/create_user", json=credentials)
+    login = await client.post("/api/User/user_login", json=credentials)
+    await _create(client, {"Authorization": login.json()["access_token"]})
+
+    response = await client.delete("/api/document/tasks/clear", headers=auth_headers)
+    assert response.json()["deleted"] == 3
+    remaining = await dbsession.scalars(select(Task.id))
+    assert len(remaining.all()) == 1
+
+    response = await client.delete("/api/document/tasks/clear", headers=auth_headers)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.anyio
+async def test_sorting_pages(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+) -> None:
+    """Pages follow each other through the next cursor."""
+    for day in ("03", "01", "02"):
+        await _create(client, auth_headers, task_name=day, task_date=f"2023-01-{day}")
+    url = "/api/document/task/sorting"
+
+    first = await client.get(url, params={"limit": 2}, headers=auth_headers)
+    cursor = first.headers["X-Next-Cursor"]
+    last = await client.get(
+        url,
+        params={"limit": 2, "cursor": cursor},
+        headers=auth_headers,
+    )
+
+    assert [task["task_name"] for task in first.json()] == ["01", "02"]
+    assert [task["task_name"] for task in last.json()] == ["03"]
+    assert "X-Next-Cursor" not in last.headers
+
+
+@pytest.mark.anyio
+async def test_sorting_rejects_bad_cursor(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+) -> None:
+    """Cursors that were not issued by the API are rejected."""
+    response = await client.get(
+        "/api/document/task/sorting",
+        params={"limit": 2, "cursor": "not-a-cursor"},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.anyio
+async def test_export(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+) -> None:
+    """Exports stream every task as NDJSON or CSV."""
+    await _create(client, auth_headers, task_name="late", task_date="2023-01-03")
+    await _create(client, auth_headers, task_name="early")
+    url = "/api/document/task/export"
+
+    ndjson = await client.get(url, headers=auth_headers)
+    csv = await client.get(url, params={"format": "csv"}, headers=auth_headers)
+
+    lines = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert [line["task_name"] for line in lines] == ["early", "late"]
+    assert lines[0]["task_time"] == "10:00:00+00:00"
+    rows = csv.text.splitlines()
+    assert rows[0].startswith("id,task_name,task_date")
+    assert len(rows) == 3
+
+
+@pytest.mark.anyio
+async def test_bulk_create(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    dbsession: AsyncSession,
+) -> None:
+    """Valid tasks are created and invalid ones reported by index."""
+    tasks = [TASK, {**TASK, "task_date": "not a date"}, {**TASK, "task_name": "b"}]
+
+    response = await client.post(
+        "/api/document/task/bulk_create",
+        json=tasks,
+        headers=auth_headers,
+    )
+
+    body = response.json()
+    assert response.status_code == status.HTTP_200_OK
+    assert [error["index"] for error in body["data"]["errors"]] == [1]
+    created = Task.id.in_(body["data"]["ids"])
+    names = await dbsession.scalars(select(Task.task_name).where(created))
+    assert sorted(names) == ["b", "write report"]
+
+
+@pytest.mark.anyio
+async def test_bulk_create_with_copy(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Large batches are loaded with COPY and keep their order."""
+    monkeypatch.setattr(settings, "task_bulk_copy_threshold", 1)
+    tasks = [{**TASK, "task_name": str(index)} for index in range(3)]
+
+    response = await client.post(
+        "/api/document/task/bulk_create",
+        json=tasks,
+        headers=auth_headers,
+    )
+    created = response.json()["data"]["ids"]
+    sorted_tasks = await client.get(
+        "/api/document/task/sorting",
+        headers=auth_headers,
+    )
+
+    assert len(created) == 3
+    assert created == sorted(created)
+    assert [task["task_name"] for task in sorted_tasks.json()] == ["0", "1", "2"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("copy_threshold", [100, 1])
+async def test_bulk_create_naive_times(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+    copy_threshold: int,
+) -> None:
+    """Times without an offset are stored as UTC, by INSERT and by COPY."""
+    monkeypatch.setattr(settings, "task_bulk_copy_threshold", copy_threshold)
+    tasks = [{**TASK, "task_time": "10:00:00"}, {**TASK, "task_time": "11:00:00"}]
+
+    response = await client.post(
+        "/api/document/task/bulk_create",
+        json=tasks,
+        headers=auth_headers,
+    )
+    sorted_tasks = await client.get(
+        "/api/document/task/sorting",
+        headers=auth_headers,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [task["task_time"] for task in sorted_tasks.json()] == [
+        "10:00:00+00:00",
+        "11:00:00+00:00",
+    ]
+
+
+@pytest.mark.anyio
+async def test_bulk_create_failure_is_handled(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A batch the database rejects is answered with an error, not raised."""
+
+    async def rejected(*args: Any) -> None:  # noqa: WPS430
+        raise ValueError("rejected")
+
+    monkeypatch.setattr(DocumentDb, "_insert_tasks", rejected)
+    response = await client.post(
+        "/api/document/task/bulk_create",
+        json=[TASK],
+        headers=auth_headers,
+    )
+
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+    assert response.json() == {"detail": "Failed to create tasks"}
+
+
+@pytest.mark.anyio
+async def test_batch_updates(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    dbsession: AsyncSession,
+) -> None:
+    """Batch updates change the found tasks and report the others."""
+    for name in ("first", "second"):
+        await _create(client, auth_headers, task_name=name)
+    task_ids = list(await dbsession.scalars(select(Task.id)))
+    task_ids.sort()
+    missing = max(task_ids) + 1
+
+    completed = await client.put(
+        "/api/document/task/batch_completion",
+        json={"ids": [*task_ids, missing]},
+        headers=auth_headers,
+    )
+    renamed = await client.put(
+        "/api/document/tasks/batch_update",
+        json={"ids": task_ids[:1], "task_name": "renamed"},
+        headers=auth_headers,
+    )
+    response = await client.get("/api/document/task/sorting", headers=auth_headers)
+
+    assert sorted(completed.json()["data"]["updated"]) == task_ids
+    assert completed.json()["data"]["not_found"] == [missing]
+    assert renamed.json()["data"]["updated"] == task_ids[:1]
+    tasks = response.json()
+    assert [task["task_name"] for task in tasks] == ["renamed", "second"]
+    assert {task["is_complete"] for task in tasks} == {"Completed"}
+
+
+@pytest.mark.anyio
+async def test_sorting_pending(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    dbsession: AsyncSession,
+) -> None:
+    """Completed tasks can be left out of the listing."""
+    for name in ("done", "open"):
+        await _create(client, auth_headers, task_name=name)
+    done = await dbsession.scalar(select(Task.id).order_by(Task.id))
+    await client.put(
+        "/api/document/task/batch_completion",
+        json={"ids": [done]},
+        headers=auth_headers,
+    )
+
+    response = await client.get(
+        "/api/document/task/sorting",
+        params={"pending": True},
+        headers=auth_headers,
+    )
+
+    assert [task["task_name"] for task in response.json()] == ["open"]
+
+
+@pytest.mark.anyio
+async def test_sorting_etag(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+) -> None:
+    """Unchanged listings are answered with 304 until a task is written."""
+    url = "/api/document/task/sorting"
+    await _create(client, auth_headers)
+    etag = (await client.get(url, headers=auth_headers)).headers["ETag"]
+
+    cached = await client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    other_query = await client.get(
+        url,
+        params={"pending": True},
+        headers={**auth_headers, "If-None-Match": etag},
+    )
+    await _create(client, auth_headers, task_name="second")
+    changed = await client.get(url, headers={**auth_headers, "If-None-Match": etag})
+
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert (cached.headers["ETag"], cached.content) == (etag, b"")
+    assert other_query.status_code == status.HTTP_200_OK
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()) == 2
+
+
+@pytest.mark.anyio
+async def test_sorting_follows_writes_of_other_workers(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    dbsession: AsyncSession,
+) -> None:
+    """A listing cached by a worker is not served once another one writes."""
+    url = "/api/document/task/sorting"
+    await _create(client, auth_headers, task_name="first")
+    cached = await client.get(url, headers=auth_headers)
+    owner = await dbsession.scalar(select(Task.user_id))
+    await dbsession.execute(update(Task).values(task_name="renamed"))
+    await dbsession.execute(
+        update(UserDet)
+        .where(UserDet.id == owner)
+        .values(tasks_version=UserDet.tasks_version + 1),
+    )
+
+    response = await client.get(url, headers=auth_headers)
+
+    assert response.headers["ETag"] != cached.headers["ETag"]
+    assert [task["task_name"] for task in response.json()] == ["renamed"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(("max_bytes", "served"), [(1048576, "first"), (0, "renamed")])
+async def test_sorting_caches_small_full_listings(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    max_bytes: int,
+    served: str,
+) -> None:
+    """The default listing is cached unless it is larger than the limit."""
+    monkeypatch.setattr(settings, "cache_listing_max_bytes", max_bytes)
+    url = "/api/document/task/sorting"
+    await _create(client, auth_headers, task_name="first")
+    await client.get(url, headers=auth_headers)
+    await dbsession.execute(update(Task).values(task_name="renamed"))
+
+    response = await client.get(url, headers=auth_headers)
+
+    assert [task["task_name"] for task in response.json()] == [served]
@@ -0,0 +1,68 @@
+import json
+import logging
+from typing import Any, List
+
+from loguru import logger
+
+from document_creation_task2.logging import (
+    AccessLogSampler,
+    InterceptHandler,
+    json_format,
+)
+
+
+def _access_record(status_code: int) -> logging.LogRecord:
+    return logging.makeLogRecord(
+        {
+            "name": "uvicorn.access",
+            "msg": "access",
+            "args": ("127.0.0.1:1", "GET", "/", "1.1", status_code),
+        },
+    )
+
+
+def test_intercepted_records_keep_their_caller() -> None:
+    """Records of the standard library are attributed to their caller."""
+    records: List[Any] = []
+    sink = logger.add(lambda message: records.append(message.record))
+    std_logger = logging.getLogger("tests.intercept")
+    std_logger.addHandler(InterceptHandler())
+    std_logger.propagate = False
+
+    try:  # noqa: WPS501
+        std_logger.warning("intercepted message")
+    finally:
+        std_logger.handlers.clear()
+        logger.remove(sink)
+
+    record = records[-1]
+    assert record["message"] == "intercepted message"
+    assert record["name"] == "tests.intercept"
+    assert record["function"] == "test_intercepted_records_keep_their_caller"
+
+
+def test_json_format() -> None:
+    """Records are written as one JSON object per line."""
+    lines: List[str] = []
+    sink = logger.add(lines.append, format=json_format)
+
+    try:  # noqa: WPS501
+        logger.bind(request_id="abc").info("structured")
+    finally:
+        logger.remove(sink)
+
+    entry = json.loads(lines[-1])
+    assert lines[-1].endswith("}\n")
+    assert entry["message"] == "structured"
+    assert entry["level"] == "INFO"
+    assert entry["request_id"] == "abc"
+
+
+def test_access_log_sampling() -> None:
+    """Sampled out access logs are dropped, server errors are kept."""
+    dropping = AccessLogSampler(0)
+    keeping = AccessLogSampler(1)
+
+    assert not dropping.filter(_access_record(200))
+    assert dropping.filter(_access_record(503))
+    assert keeping.filter(_access_record(200))
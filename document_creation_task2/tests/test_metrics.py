@@ -0,0 +1,80 @@
+from typing import Dict
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette import status
+
+from document_creation_task2.settings import settings
+from document_creation_task2.web.metrics import instrument_engine
+
+
+@pytest.mark.anyio
+async def test_requests_by_route_template(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    auth_headers: Dict[str, str],
+) -> None:
+    """Requests are counted by route template and status."""
+    labels = {
+        "method": "GET",
+        "route": "/api/document/task/access_task",
+        "status": "404",
+    }
+    before = REGISTRY.get_sample_value("http_requests_total", labels) or 0
+
+    await client.get(
+        "/api/document/task/access_task",
+        params={"id_value": 1},
+        headers=auth_headers,
+    )
+    response = await client.get(fastapi_app.url_path_for("metrics"))
+
+    assert response.status_code == status.HTTP_200_OK
+    assert REGISTRY.get_sample_value("http_requests_total", labels) == before + 1
+    assert "http_request_duration_seconds_bucket" in response.text
+
+
+@pytest.mark.anyio
+async def test_cache_metrics(
+    client: AsyncClient,
+    fastapi_app: FastAPI,
+    auth_headers: Dict[str, str],
+) -> None:
+    """Hits and misses of the cache are exported by kind of key."""
+    labels = {"kind": "auth"}
+    names = ("cache_misses_total", "cache_hits_total")
+    before = [REGISTRY.get_sample_value(name, labels) or 0 for name in names]
+    await client.get("/api/document/task/sorting", headers=auth_headers)
+    await client.get("/api/document/task/sorting", headers=auth_headers)
+
+    response = await client.get(fastapi_app.url_path_for("metrics"))
+
+    after = [REGISTRY.get_sample_value(name, labels) for name in names]
+    assert after == [count + 1 for count in before]
+    assert 'cache_hits_total{kind="auth"}' in response.text
+
+
+@pytest.mark.anyio
+async def test_database_metrics() -> None:
+    """Statements of instrumented engines are timed and pools reported."""
+    engine = create_async_engine(str(settings.db_url))
+    instrument_engine(engine)
+    labels = {"operation": "SELECT"}
+    before = REGISTRY.get_sample_value("db_statement_duration_seconds_count", labels)
+    idle = REGISTRY.get_sample_value("db_pool_checked_out")
+
+    try:  # noqa: WPS501
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            checked_out = REGISTRY.get_sample_value("db_pool_checked_out")
+    finally:
+        await engine.dispose()
+
+    after = REGISTRY.get_sample_value("db_statement_duration_seconds_count", labels)
+    assert after == (before or 0) + 1
+    assert checked_out == (idle or 0) + 1
+    assert REGISTRY.get_sample_value("db_pool_checked_out") == idle
@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+from starlette import status
+
+from document_creation_task2.authentication.password import PasswordHasher
+from document_creation_task2.settings import settings
+
+
+@pytest.mark.anyio
+async def test_hash_and_verify() -> None:
+    """Hashes made in the pool verify in the pool."""
+    hasher = PasswordHasher()
+    try:
+        hashed = await hasher.hash_password("secret")
+        assert await hasher.verify_password("secret", hashed)
+        assert not await hasher.verify_password("other", hashed)
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_full_queue_is_rejected(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Calls above the worker and queue limits get 503."""
+    monkeypatch.setattr(settings, "password_hash_workers", 1)
+    monkeypatch.setattr(settings, "password_hash_queue", 0)
+    hasher = PasswordHasher()
+    release = threading.Event()
+    try:
+        busy = asyncio.create_task(hasher.run(release.wait))
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPException) as error:
+            await hasher.run(release.wait)
+
+        rejected = error.value.status_code  # noqa: WPS441
+        assert rejected == status.HTTP_503_SERVICE_UNAVAILABLE
+        release.set()
+        assert await busy
+    finally:
+        release.set()
+        hasher.shutdown()
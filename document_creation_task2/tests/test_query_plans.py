@@ -0,0 +1,133 @@
+from contextlib import contextmanager
+from datetime import date, time, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Tuple
+
+import pytest
+from sqlalchemy import event, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from document_creation_task2.db.DAO.dao_documents import DocumentDb
+from document_creation_task2.db.DAO.dao_user import UserDb
+from document_creation_task2.db.models.users import Task, UserDet
+from document_creation_task2.documents.document_schema import TaskUpdate
+
+SEED_TASKS = text(
+    "INSERT INTO tasks "
+    "(task_name, task_date, task_time, priority, created_time, is_complete, user_id) "
+    "SELECT 'task ' || n, DATE '2023-01-01' + n % 365, "
+    "TIME WITH TIME ZONE '00:00+00' + (n % 1440) * INTERVAL '1 minute', "
+    "'medium', now(), 'Not Completed', :user_id "
+    "FROM generate_series(1, 1000) AS n",
+)
+SEED_USERS = text(
+    "INSERT INTO user_det (name) "
+    "SELECT 'user ' || n FROM generate_series(1, 1000) AS n "
+    "UNION ALL SELECT 'plan-user'",
+)
+SEED_REVOKED = text(
+    "INSERT INTO revoked_tokens (jti, expires_at) "
+    "SELECT n::text, now() + INTERVAL '30 minutes' FROM generate_series(1, 1000) AS n",
+)
+PLANNED = ("SELECT", "UPDATE", "DELETE")
+
+DaoCall = Callable[[AsyncSession, int, int], Awaitable[Any]]
+Recorded = List[Tuple[str, Any]]
+
+
+async def _stream(db: AsyncSession, user_id: int, task_id: int) -> None:
+    async for _ in DocumentDb().stream_tasks(db, user_id, 100):  # noqa: WPS328
+        pass  # noqa: WPS420
+
+
+async def _after(db: AsyncSession, user_id: int, task_id: int) -> None:
+    after = (date(2023, 6, 1), time(tzinfo=timezone.utc), task_id)
+    await DocumentDb().tasks_db(db, user_id, 10, after)
+
+
+async def _pending(db: AsyncSession, user_id: int, task_id: int) -> None:
+    await DocumentDb().tasks_db(db, user_id, 10, pending=True)
+
+
+async def _update_tasks(db: AsyncSession, user_id: int, task_id: int) -> None:
+    changes = {"is_complete": "Completed"}
+    await DocumentDb().update_tasks(db, user_id, [task_id, task_id + 1], changes)
+
+
+async def _update_det(db: AsyncSession, user_id: int, task_id: int) -> None:
+    task = await DocumentDb().get_task(db, task_id)
+    changes = TaskUpdate(task_name="new", task_date=date(2023, 2, 1), priority="low")
+    await DocumentDb().update_det(task, changes, db)
+
+
+DAO_CALLS: Dict[str, DaoCall] = {
+    "tasks_db": lambda db, user, task: DocumentDb().tasks_db(db, user, 10),
+    "tasks_db_after": _after,
+    "tasks_db_pending": _pending,
+    "stream_tasks": _stream,
+    "task_version": lambda db, user, task: DocumentDb().task_version(db, user),
+    "user_task": lambda db, user, task: DocumentDb().user_task(db, user, task),
+    "get_task": lambda db, user, task: DocumentDb().get_task(db, task),
+    "update_func": lambda db, user, task: DocumentDb().update_func(task, db),
+    "update_tasks": _update_tasks,
+    "update_det": _update_det,
+    "delete_rows_db": lambda db, user, task: DocumentDb().delete_rows_db(task, db),
+    "clear_tasks": lambda db, user, task: DocumentDb().clear_tasks(db, user, 100),
+    "get_user": lambda db, user, task: UserDb().get_user("plan-user", db),
+    "revoked_token": lambda db, user, task: UserDb().revoked_token("unknown", db),
+    "revoked_ids": lambda db, user, task: UserDb().revoked_ids(db),
+    "purge_revoked": lambda db, user, task: UserDb().purge_revoked(db),
+}
+
+
+@contextmanager
+def _recorded(db: AsyncSession, statements: Recorded) -> Iterator[None]:
+    def record(*args: Any) -> None:  # noqa: WPS430
+        statement, parameters = args[2:4]
+        if statement.lstrip().upper().startswith(PLANNED):
+            statements.append((statement, parameters))
+
+    engine = db.bind.sync_engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:  # noqa: WPS501
+        yield
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def _scans(plan: Dict[str, Any]) -> Iterator[str]:
+    yield plan["Node Type"]
+    for child in plan.get("Plans", []):
+        yield from _scans(child)
+
+
+async def _seed(db: AsyncSession) -> Tuple[Any, Any]:
+    await db.execute(SEED_USERS)
+    await db.execute(SEED_REVOKED)
+    plan_user = UserDet.name == "plan-user"
+    user_id = await db.scalar(select(UserDet.id).where(plan_user))
+    await db.execute(SEED_TASKS, {"user_id": user_id})
+    task_id = await db.scalar(select(func.min(Task.id)))
+    await db.execute(text("ANALYZE"))
+    return user_id, task_id
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("name", DAO_CALLS.keys())
+async def test_dao_queries_use_indexes(name: str, dbsession: AsyncSession) -> None:
+    """Queries of the DAO never fall back to a sequential scan."""
+    user_id, task_id = await _seed(dbsession)
+
+    statements: Recorded = []
+    with _recorded(dbsession, statements):
+        await DAO_CALLS[name](dbsession, user_id, task_id)
+
+    assert statements
+    connection = await dbsession.connection()
+    await connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    for statement, parameters in statements:
+        explained = await connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}",
+            parameters,
+        )
+        plan = explained.scalar_one()[0]["Plan"]
+        assert "Seq Scan" not in set(_scans(plan)), statement
@@ -0,0 +1,89 @@
+from typing import Dict
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from httpx import AsyncClient
+from starlette import status
+
+from document_creation_task2.services.cache import connect_redis
+from document_creation_task2.services.rate_limit import (
+    MemoryBuckets,
+    RateLimit,
+    RateLimiter,
+    RedisBuckets,
+)
+from document_creation_task2.settings import settings
+
+URL = "/api/document/task/sorting"
+
+
+@pytest.mark.anyio
+async def test_bucket_refills_at_its_rate() -> None:
+    """A bucket allows its burst at once, then one request per refilled token."""
+    buckets = MemoryBuckets()
+    limit = RateLimit(rate=1, burst=2)
+
+    taken = []
+    for _ in range(3):
+        allowed, _tokens = await buckets.take("key", limit, now=0)
+        taken.append(allowed)
+    refilled = await buckets.take("key", limit, now=1)
+
+    assert taken == [True, True, False]
+    assert refilled == (True, 0)
+
+
+@pytest.mark.anyio
+async def test_workers_share_buckets() -> None:
+    """Workers using one server take tokens from the same bucket."""
+    server = FakeServer()
+    workers = [RedisBuckets(FakeAsyncRedis(server=server)) for _ in range(2)]
+    limit = RateLimit(rate=1, burst=2)
+
+    taken = []
+    for index in range(3):
+        buckets = workers[index % 2]
+        taken.append(await buckets.take("key", limit, now=0))
+    for worker in workers:
+        await worker.close()
+
+    assert taken == [(True, 1), (True, 0), (False, 0)]
+
+
+@pytest.mark.anyio
+async def test_requests_over_the_route_limit(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Requests over the limit of a route get 429, all carry the limit headers."""
+    monkeypatch.setattr(settings, "rate_limit_routes", {URL: "0.5/2"})
+
+    responses = [await client.get(URL, headers=auth_headers) for _ in range(3)]
+
+    assert [response.status_code for response in responses[:2]] == [
+        status.HTTP_204_NO_CONTENT,
+        status.HTTP_204_NO_CONTENT,
+    ]
+    assert [response.headers["RateLimit-Remaining"] for response in responses] == [
+        "1",
+        "0",
+        "0",
+    ]
+    assert responses[2].status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert responses[2].headers["RateLimit-Limit"] == "2"
+    assert responses[2].headers["Retry-After"] == "2"
+
+
+@pytest.mark.anyio
+async def test_unreachable_server_lets_requests_through(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Requests are allowed when the shared buckets cannot be reached."""
+    monkeypatch.setattr(settings, "cache_connect_timeout", 0.5)
+    limiter = RateLimiter(RedisBuckets(connect_redis("redis://127.0.0.1:1")))
+
+    decision = await limiter.hit("key", RateLimit(rate=1, burst=5))
+
+    assert decision.allowed
+    assert decision.remaining == 5
@@ -0,0 +1,76 @@
+from typing import Callable, ContextManager, Dict, List
+
+import pytest
+from httpx import AsyncClient
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from document_creation_task2.db.recorder import QueryRecorder, record_queries
+from document_creation_task2.services.revocation import revocation_index
+from document_creation_task2.settings import settings
+
+MaxQueries = Callable[[int], ContextManager[QueryRecorder]]
+
+
+@pytest.mark.anyio
+async def test_endpoint_query_counts(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    max_queries: MaxQueries,
+    dbsession: AsyncSession,
+) -> None:
+    """Hot endpoints stay within their statement budget once workers started."""
+    url = "/api/document/task/sorting?limit=10"
+    await client.put(
+        "/api/document/task/create_task",
+        json={
+            "task_name": "write report",
+            "task_date": "2023-01-02",
+            "task_time": "10:00:00+00:00",
+            "priority": "high",
+        },
+        headers=auth_headers,
+    )
+    etag = (await client.get(url, headers=auth_headers)).headers["ETag"]
+    await revocation_index.refresh(dbsession)
+
+    try:  # noqa: WPS501
+        with max_queries(1) as recorder:
+            await client.get(url, headers=auth_headers)
+            assert recorder.count == 1
+        with max_queries(1):
+            await client.get(url, headers={**auth_headers, "If-None-Match": etag})
+        with max_queries(1):
+            await client.delete(
+                "/api/document/Documents/delete/1",
+                params={"id_value": 1},
+                headers=auth_headers,
+            )
+    finally:
+        revocation_index.reset()
+
+
+@pytest.mark.anyio
+async def test_repeated_and_slow_statements(
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Identical statements are flagged and slow ones logged."""
+    monkeypatch.setattr(settings, "slow_query_ms", 0)
+    messages: List[str] = []
+    sink = logger.add(messages.append, level="WARNING", format="{message}")
+
+    try:  # noqa: WPS501
+        with record_queries() as outer:
+            with record_queries() as inner:
+                await dbsession.execute(text("SELECT 1"))
+                await dbsession.execute(text("SELECT 1"))
+            await dbsession.execute(text("SELECT 2"))
+    finally:
+        logger.remove(sink)
+
+    assert inner.count == 2  # noqa: WPS441
+    assert outer.count == 3  # noqa: WPS441
+    assert outer.repeated() == {"SELECT 1": 2}  # noqa: WPS441
+    assert any(message.startswith("Slow query") for message in messages)
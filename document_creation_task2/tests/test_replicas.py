@@ -0,0 +1,133 @@
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, List
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+from starlette.requests import Request
+from starlette.responses import Response
+
+from document_creation_task2.db.dependencies import (
+    PRIMARY_PIN_COOKIE,
+    get_db_session,
+    pin_to_primary,
+    read_session,
+)
+from document_creation_task2.db.replicas import ReplicaRouter
+from document_creation_task2.db.utils import create_engine
+from document_creation_task2.services.cache import MemoryBackend, cache
+from document_creation_task2.settings import settings
+
+UNREACHABLE = "postgresql+asyncpg://nobody@127.0.0.1:1/none"
+
+
+@pytest.fixture
+async def engines() -> AsyncGenerator[List[AsyncEngine], None]:
+    """
+    Engines of a primary and two replicas, all on the test database.
+
+    :yields: the engines, the primary first.
+    """
+    created = [create_engine() for _ in range(3)]
+    try:  # noqa: WPS501
+        yield created
+    finally:
+        for engine in created:
+            await engine.dispose()
+
+
+def _router(primary: AsyncEngine, replicas: List[AsyncEngine]) -> ReplicaRouter:
+    return ReplicaRouter(
+        async_sessionmaker(primary),
+        [async_sessionmaker(replica) for replica in replicas],
+    )
+
+
+def _request(app: FastAPI, method: str, cookie: str = "") -> Request:
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "method": method, "headers": headers, "app": app})
+
+
+@pytest.mark.anyio
+async def test_replicas_round_robin(engines: List[AsyncEngine]) -> None:
+    """Replicas are used in turn."""
+    primary, *replicas = engines
+    router = _router(primary, replicas)
+
+    used = []
+    for _ in range(4):
+        session = await router.session()
+        used.append(session.bind)
+        await session.close()
+
+    assert used == [*replicas, *replicas]
+
+
+@pytest.mark.anyio
+async def test_unavailable_replica_falls_back(
+    engines: List[AsyncEngine],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Unreachable replicas are skipped in favour of the primary."""
+    monkeypatch.setattr(settings, "db_connect_timeout", 1)
+    down = create_engine(UNREACHABLE)
+    router = _router(engines[0], [down])
+
+    try:  # noqa: WPS501
+        first = await router.session()
+        await first.close()
+        start = time.monotonic()
+        second = await router.session()
+        await second.close()
+    finally:
+        await down.dispose()
+
+    assert first.bind is engines[0]
+    assert second.bind is engines[0]
+    assert time.monotonic() - start < settings.db_connect_timeout
+
+
+@pytest.mark.anyio
+async def test_writes_pin_client_to_primary(
+    engines: List[AsyncEngine],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """After a write the client reads from the primary."""
+    monkeypatch.setattr(settings, "db_replica_urls", ["replica"])
+    primary, replica, _ = engines
+    app = FastAPI()
+    app.state.db_session_factory = async_sessionmaker(primary)
+    app.state.db_read_router = _router(primary, [replica])
+
+    response = Response()
+    async with asynccontextmanager(get_db_session)(_request(app, "POST"), response):
+        cookie = response.headers["set-cookie"].split(";")[0]
+
+    for request_cookie, expected in ((cookie, primary), ("", replica)):
+        request = _request(app, "GET", request_cookie)
+        async with read_session(request) as session:
+            assert session.bind is expected
+    assert cookie.startswith(PRIMARY_PIN_COOKIE)
+
+
+@pytest.mark.anyio
+async def test_writes_pin_user_to_primary(
+    engines: List[AsyncEngine],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """After a write the user reads from the primary, without any cookie."""
+    monkeypatch.setattr(settings, "db_replica_urls", ["replica"])
+    cache.use(MemoryBackend())
+    primary, replica, _ = engines
+    app = FastAPI()
+    app.state.db_session_factory = async_sessionmaker(primary)
+    app.state.db_read_router = _router(primary, [replica])
+
+    await pin_to_primary(_request(app, "POST"), 7)
+
+    for user_id, expected in ((7, primary), (8, replica)):
+        request = _request(app, "GET")
+        await pin_to_primary(request, user_id)
+        async with read_session(request) as session:
+            assert session.bind is expected
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from document_creation_task2.db.DAO.dao_user import UserDb
+from document_creation_task2.db.models.users import RevokedToken
+from document_creation_task2.services.revocation import BloomFilter, RevocationIndex
+
+
+def test_bloom_filter() -> None:
+    """Added keys are always found."""
+    bloom = BloomFilter(bits=1024, hashes=3)
+    keys = [f"jti-{index}" for index in range(50)]
+    for added in keys:
+        bloom.add(added)
+
+    assert all(key in bloom for key in keys)
+    assert "missing" not in bloom
+
+
+async def _revoke(dbsession: AsyncSession) -> None:
+    now = datetime.utcnow()
+    dbsession.add_all(
+        [
+            RevokedToken(jti="active", expires_at=now + timedelta(minutes=5)),
+            RevokedToken(jti="expired", expires_at=now - timedelta(minutes=5)),
+        ],
+    )
+    await dbsession.commit()
+
+
+@pytest.mark.anyio
+async def test_index_is_loaded_from_table(dbsession: AsyncSession) -> None:
+    """Only unexpired revocations are indexed."""
+    await _revoke(dbsession)
+    index = RevocationIndex()
+    assert index.might_be_revoked("anything")
+
+    await index.refresh(dbsession)
+    index.add("added", datetime.utcnow() + timedelta(minutes=5))
+
+    assert index.might_be_revoked("active")
+    assert index.might_be_revoked("added")
+    assert not index.might_be_revoked("expired")
+
+
+@pytest.mark.anyio
+async def test_expired_revocations_are_purged(dbsession: AsyncSession) -> None:
+    """Purging deletes only expired revocations."""
+    await _revoke(dbsession)
+
+    assert await UserDb().purge_revoked(dbsession) == 1
+    remaining = await dbsession.scalars(select(RevokedToken.jti))
+    assert remaining.all() == ["active"]
+
+
+@pytest.mark.anyio
+async def test_unconfirmed_ids_are_forgotten(dbsession: AsyncSession) -> None:
+    """Ids revoked by the worker are dropped once stored or expired."""
+    await _revoke(dbsession)
+    index = RevocationIndex()
+    index.add("active", datetime.utcnow() + timedelta(minutes=5))
+    index.add("lost", datetime.utcnow() - timedelta(seconds=1))
+    index.add("pending", datetime.utcnow() + timedelta(minutes=5))
+
+    await index.refresh(dbsession)
+
+    assert index.unconfirmed == 1
+    with pytest.raises(HTTPException):
+        await index.check("pending", dbsession)
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import subprocess  # noqa: S404
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from prometheus_client.parser import text_string_to_metric_families
+
+from document_creation_task2.gunicorn_runner import (
+    APP,
+    GunicornApplication,
+    child_exit,
+    prepare_metrics_dir,
+    worker_count,
+)
+from document_creation_task2.settings import settings
+from document_creation_task2.web.draining import DrainMiddleware, request_tracker
+
+
+def test_workers_follow_available_cpus(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Without ``workers_count`` one worker runs per available CPU."""
+    monkeypatch.setattr(settings, "workers_count", None)
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1, 2}, raising=False)
+
+    assert worker_count() == 3
+
+    monkeypatch.setattr(settings, "workers_count", 5)
+
+    assert worker_count() == 5
+
+
+def test_gunicorn_config() -> None:
+    """Options are passed to gunicorn with the uvicorn worker."""
+    application = GunicornApplication(
+        APP,
+        bind="127.0.0.1:8000",
+        workers=2,
+        max_requests=1000,
+        preload_app=True,
+        timeout=None,
+    )
+
+    assert application.cfg.workers == 2
+    assert application.cfg.max_requests == 1000
+    assert application.cfg.preload_app
+    assert application.cfg.worker_class_str.endswith("gunicorn_runner.UvicornWorker")
+
+
+WORKER = """
+from document_creation_task2.web.metrics import IN_FLIGHT, REQUESTS
+REQUESTS.labels("GET", "/api/health", "200").inc()
+IN_FLIGHT.inc()
+"""
+SCRAPE = """
+from document_creation_task2.web.metrics import latest_metrics
+print(latest_metrics().decode())
+"""
+
+
+def _run(code: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(  # noqa: S603
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+
+def _scrape() -> Dict[str, float]:
+    families = text_string_to_metric_families(_run(SCRAPE).stdout)
+    return {
+        sample.name: sample.value
+        for family in families
+        for sample in family.samples
+        if sample.name in {"http_requests_total", "http_requests_in_flight"}
+    }
+
+
+def test_metrics_add_up_across_workers(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A scrape sees the metrics of every worker, live gauges of live ones."""
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path / "metrics"))
+    prepare_metrics_dir()
+    command = [sys.executable, "-c", WORKER]
+    workers = [subprocess.Popen(command) for _ in range(2)]  # noqa: S603
+    for worker in workers:
+        worker.wait()
+
+    child_exit(None, SimpleNamespace(pid=workers[0].pid))
+
+    assert _scrape() == {"http_requests_total": 2, "http_requests_in_flight": 1}
+
+
+@pytest.mark.anyio
+async def test_drain_waits_for_requests_in_flight() -> None:
+    """Draining returns once the requests being served are done."""
+    app = FastAPI()
+    app.add_middleware(DrainMiddleware)
+
+    @app.get("/slow")
+    async def slow() -> None:  # noqa: WPS430
+        await asyncio.sleep(0.2)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        request = asyncio.create_task(client.get("/slow"))
+        await asyncio.sleep(0.05)
+        assert await request_tracker.drain(0.01) == 1
+        assert await request_tracker.drain(5) == 0
+        assert (await request).status_code == 200
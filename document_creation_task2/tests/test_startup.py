@@ -0,0 +1,37 @@
+import json
+import subprocess  # noqa: S404
+import sys
+from typing import Any, Dict
+
+# Seconds importing the application may take in a fresh interpreter.
+IMPORT_BUDGET = 3
+# Modules loaded on first use only.
+LAZY_MODULES = ("jose.jwt", "passlib.context", "cryptography", "gunicorn", "redis")
+
+PROBE = f"""
+import json, sys, time
+
+start = time.perf_counter()
+import document_creation_task2.web.application
+seconds = time.perf_counter() - start
+loaded = [module for module in {LAZY_MODULES!r} if module in sys.modules]
+print(json.dumps({{"seconds": seconds, "loaded": loaded}}))
+"""
+
+
+def _import_application() -> Dict[str, Any]:
+    completed = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", PROBE],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(completed.stdout)  # type: ignore
+
+
+def test_import_time_budget() -> None:
+    """The application is imported within the budget, heavy modules left out."""
+    probes = [_import_application() for _ in range(3)]
+
+    assert min(probe["seconds"] for probe in probes) < IMPORT_BUDGET
+    assert not probes[0]["loaded"]
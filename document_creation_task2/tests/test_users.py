@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+from typing import Dict
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from document_creation_task2.db.models.users import RevokedToken
+from document_creation_task2.services import user_service
+from document_creation_task2.services.revocation import (
+    RevocationIndex,
+    revocation_index,
+)
+from document_creation_task2.settings import settings
+from document_creation_task2.web.application import get_app
+
+
+@pytest.mark.anyio
+async def test_login_rejects_wrong_password(client: AsyncClient) -> None:
+    """Login fails with a wrong password."""
+    credentials = {"name": "someone", "password": "secret"}
+    await client.post("/api/User/create_user", json=credentials)
+
+    response = await client.post(
+        "/api/User/user_login",
+        json={"name": "someone", "password": "wrong"},
+    )
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.anyio
+async def test_refresh_token(client: AsyncClient) -> None:
+    """A refresh token issues a new access token."""
+    credentials = {"name": "someone", "password": "secret"}
+    await client.post("/api/User/create_user", json=credentials)
+    tokens = (await client.post("/api/User/user_login", json=credentials)).json()
+
+    response = await client.post(
+        "/api/User/token/refresh",
+        headers={"refresh-token": tokens["refresh_token"]},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["access_token"]
+
+
+@pytest.mark.anyio
+async def test_signout_revokes_token(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+) -> None:
+    """A signed out token can no longer be used."""
+    response = await client.get("/api/document/task/sorting", headers=auth_headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = await client.post("/api/User/user_signout", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+
+    response = await client.get("/api/document/task/sorting", headers=auth_headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    response = await client.post("/api/User/user_signout", headers=auth_headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.anyio
+async def test_revoked_token_is_not_cached_again(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A worker that has not seen a signout yet still rejects the token."""
+    stale_index = RevocationIndex()
+    await stale_index.refresh(dbsession)
+    response = await client.post("/api/User/user_signout", headers=auth_headers)
+    assert response.status_code == status.HTTP_200_OK
+    monkeypatch.setattr(user_service, "revocation_index", stale_index)
+
+    response = await client.get("/api/document/task/sorting", headers=auth_headers)
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Token has been revoked"
+
+
+@pytest.mark.anyio
+async def test_cached_token_revoked_elsewhere(
+    client: AsyncClient,
+    auth_headers: Dict[str, str],
+    dbsession: AsyncSession,
+) -> None:
+    """A token cached by a worker is rejected once its index sees a signout."""
+    url = "/api/document/task/sorting"
+    cached = await client.get(url, headers=auth_headers)
+    assert cached.status_code != status.HTTP_401_UNAUTHORIZED
+    token = auth_headers["Authorization"]
+    jti = user_service.token_id(user_service.decode_token(token), token)
+    expires_at = datetime.utcnow() + timedelta(hours=1)
+    dbsession.add(RevokedToken(jti=jti, expires_at=expires_at))
+    await dbsession.commit()
+
+    await revocation_index.refresh(dbsession)
+    try:  # noqa: WPS501
+        response = await client.get(url, headers=auth_headers)
+    finally:
+        revocation_index.reset()
+
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_missing_secret_key_fails_closed(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Without a secret key the application does not start or sign tokens."""
+    monkeypatch.setattr(settings, "secret_key", "")
+
+    with pytest.raises(RuntimeError):
+        get_app()
+    with pytest.raises(RuntimeError):
+        user_service.encode_token({"id": 1})
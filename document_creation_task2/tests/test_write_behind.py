@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+from typing import Any, AsyncGenerator, List
+
+import pytest
+from fastapi import HTTPException, status
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from document_creation_task2.db.DAO.dao_user import UserDb
+from document_creation_task2.db.models.users import RevokedToken, Token, UserDet
+from document_creation_task2.services.revocation import revocation_index
+from document_creation_task2.services.write_behind import WriteBehind
+from document_creation_task2.settings import settings
+
+
+@pytest.fixture
+async def queue(
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> AsyncGenerator[WriteBehind, None]:
+    """
+    Started write-behind queue with a loaded revocation index.
+
+    Buffered rows are only written on stop.
+
+    :param dbsession: database session.
+    :param monkeypatch: patches the interval between writes.
+    :yields: the queue.
+    """
+    monkeypatch.setattr(settings, "write_behind_interval", 60)
+    await revocation_index.refresh(dbsession)
+    started = WriteBehind()
+    started.start(async_sessionmaker(dbsession.bind, expire_on_commit=False))
+    try:  # noqa: WPS501
+        yield started
+    finally:
+        await started.stop()
+        revocation_index.reset()
+
+
+async def _count(dbsession: AsyncSession, model: type) -> int:
+    counted = await dbsession.scalar(select(func.count()).select_from(model))
+    return counted or 0
+
+
+async def _user(dbsession: AsyncSession) -> int:
+    user = UserDet(name="write-behind", password="hashed")
+    dbsession.add(user)
+    await dbsession.commit()
+    return user.id  # type: ignore
+
+
+@pytest.mark.anyio
+async def test_rows_are_written_in_batches(
+    queue: WriteBehind,
+    dbsession: AsyncSession,
+) -> None:
+    """Tokens and revocations are written together on stop."""
+    user_id = await _user(dbsession)
+    expires_at = datetime.utcnow() + timedelta(minutes=5)
+    for index in range(3):
+        await queue.add_token(f"token-{index}", user_id, dbsession)
+    await queue.revoke("buffered", expires_at, dbsession)
+
+    assert queue.pending == 4
+    assert await _count(dbsession, Token) == 0
+
+    await queue.stop()
+
+    assert await _count(dbsession, Token) == 3
+    assert await _count(dbsession, RevokedToken) == 1
+
+
+@pytest.mark.anyio
+async def test_buffered_revocation_is_seen_at_once(
+    queue: WriteBehind,
+    dbsession: AsyncSession,
+) -> None:
+    """A revocation waiting to be written rejects the token right away."""
+    expires_at = datetime.utcnow() + timedelta(minutes=5)
+    await queue.revoke("buffered", expires_at, dbsession)
+    revocation_index.add("buffered", expires_at)
+
+    with pytest.raises(HTTPException):
+        await revocation_index.check("buffered", dbsession)
+    with pytest.raises(HTTPException):
+        await queue.revoke("buffered", datetime.utcnow(), dbsession)
+
+
+@pytest.mark.anyio
+async def test_full_buffer_writes_right_away(
+    queue: WriteBehind,
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Rows are written by the request once the buffer is full."""
+    monkeypatch.setattr(settings, "write_behind_buffer", 0)
+    user_id = await _user(dbsession)
+    await queue.add_token("token", user_id, dbsession)
+
+    assert not queue.pending
+    assert await _count(dbsession, Token) == 1
+
+
+@pytest.mark.anyio
+async def test_revocation_written_meanwhile_is_reported(
+    queue: WriteBehind,
+    dbsession: AsyncSession,
+) -> None:
+    """A token revoked again once its buffered row is written gets 401."""
+    expires_at = datetime.utcnow() + timedelta(minutes=5)
+    await queue.revoke("written", expires_at, dbsession)
+    revocation_index.add("written", expires_at)
+    await queue.flush()
+
+    with pytest.raises(HTTPException) as rejected:
+        await queue.revoke("written", expires_at, dbsession)
+
+    status_code = rejected.value.status_code  # noqa: WPS441
+    assert status_code == status.HTTP_401_UNAUTHORIZED
+    assert await _count(dbsession, RevokedToken) == 1
+
+
+@pytest.mark.anyio
+async def test_failed_write_is_logged_and_kept(
+    queue: WriteBehind,
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Rows that cannot be written are counted in the log and kept."""
+    user_id = await _user(dbsession)
+    for index in range(2):
+        await queue.add_token(f"token-{index}", user_id, dbsession)
+
+    async def failing(*args: Any) -> None:  # noqa: WPS430
+        raise OSError("database down")
+
+    monkeypatch.setattr(UserDb, "write_batch", failing)
+    messages: List[str] = []
+    sink = logger.add(messages.append, level="ERROR", format="{message}")
+    try:  # noqa: WPS501
+        await queue.flush()
+    finally:
+        logger.remove(sink)
+
+    assert messages[0].startswith("Cannot write 2 buffered rows")
+    assert queue.pending == 2
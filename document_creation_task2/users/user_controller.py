@@ -1,31 +1,33 @@
-import os
 from datetime import timedelta
 from typing import Any, Dict
 
-from dotenv import load_dotenv
 from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
-from jose import jwt
-from sqlalchemy.orm import Session
+from jose.exceptions import ExpiredSignatureError, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from document_creation_task2.authentication import authenticate
 from document_creation_task2.db.DAO.dao_user import UserDb
 from document_creation_task2.db.dependencies import get_db_session as get_db
-from document_creation_task2.db.models.users import RevokedToken, Token, UserDet
+from document_creation_task2.db.models.users import UserDet
 from document_creation_task2.services.user_service import (
+    decode_token,
     get_current_user,
     refresh_tok,
+    revoke_token,
     token_gen,
 )
+from document_creation_task2.services.write_behind import write_behind
 from document_creation_task2.users.user_schema import User
+from document_creation_task2.web.admission import WRITE_ROUTE
 
 users_func = APIRouter()
-load_dotenv()
-secret_key = os.getenv("secret_key")
-algorithm = os.getenv("algorithm")
 
 
 @users_func.post("/create_user")
-def create_user(request: User, db: Session = Depends(get_db)) -> Dict[str, Any]:
+async def create_user(
+    request: User,
+    db: AsyncSession = Depends(get_db),
+) -> Dict[str, Any]:
     """To create a new user.
 
     :param request:The user schema.
@@ -33,11 +35,14 @@ def create_user(request: User, db: Session = Depends(get_db)) -> Dict[str, Any]:
     :return: A dict containing the status of response
     """
     userdbs = UserDb()
-    return userdbs.create_users(request, db)
+    return await userdbs.create_users(request, db)
 
 
 @users_func.post("/user_login")
-async def user_login(formdata: User, db: Session = Depends(get_db)) -> Dict[str, str]:
+async def user_login(
+    formdata: User,
+    db: AsyncSession = Depends(get_db),
+) -> Dict[str, str]:
     """
     To login for the user.
 
@@ -48,21 +53,20 @@ async def user_login(formdata: User, db: Session = Depends(get_db)) -> Dict[str,
     :raises HTTPException: For unauthorized user.
     """
     mins = 30
-    user = authenticate.authentic(formdata.name, formdata.password, db)
+    user = await authenticate.authentic(formdata.name, formdata.password, db)
     if not isinstance(user, UserDet):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
     flag = True
     refresh_token = refresh_tok(user.name, user.id, timedelta(minutes=mins), flag)
     tokens = token_gen(user.name, user.id, timedelta(minutes=mins))
-    db.add(Token(accesstype=tokens, user_id=user.id))
-    db.commit()
+    await write_behind.add_token(tokens, user.id, db)
     return {"access_token": tokens, "refresh_token": refresh_token}
 
 
 @users_func.post("/token/refresh")
 async def refresh_access_token(
     refresh_token: str = Header(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Dict[str, Any]:
     """
     Create a new access token based on a refresh token.
@@ -74,19 +78,19 @@ async def refresh_access_token(
     :raises HTTPException: Raised for various authentication-related errors.
     """
     try:
-        userid = get_current_user(refresh_token, db)
-        payload = jwt.decode(refresh_token, secret_key, algorithms=algorithm)
+        userid = await get_current_user(refresh_token, db)
+        payload = decode_token(refresh_token)
         minute = 20
         if payload.get("ref_token"):
             username = payload.get("name")
             expiration = timedelta(minutes=minute)
             return {"access_token": token_gen(username, userid, expiration)}
-    except jwt.ExpiredSignatureError:
+    except ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Refresh token has expired",
         )
-    except jwt.DecodeError:
+    except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
@@ -97,8 +101,11 @@ async def refresh_access_token(
     )
 
 
-@users_func.post("/user_signout")
-async def user_signout(req: Request, db: Session = Depends(get_db)) -> Dict[str, Any]:
+@users_func.post("/user_signout", dependencies=[WRITE_ROUTE])
+async def user_signout(
+    req: Request,
+    db: AsyncSession = Depends(get_db),
+) -> Dict[str, Any]:
     """
     To sign out a user by invalidating the token and checking if it's revoked.
 
@@ -113,14 +120,6 @@ async def user_signout(req: Request, db: Session = Depends(get_db)) -> Dict[str,
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token not provided in headers",
         )
-    revoked_token = db.query(RevokedToken).filter(RevokedToken.token == token).first()
-    if revoked_token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has already been revoked",
-        )
-    revoked_token = RevokedToken(token=token)
-    db.add(revoked_token)
-    db.commit()
+    await revoke_token(token, db)
 
     return {"message": "User has been signed out."}
@@ -0,0 +1,135 @@
+import enum
+from typing import List, Optional
+
+from fastapi import Depends
+from fastapi.routing import APIRoute
+from starlette import status
+from starlette.responses import JSONResponse
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from document_creation_task2.db.dependencies import READ_METHODS
+from document_creation_task2.settings import settings
+from document_creation_task2.web.metrics import SHED_REQUESTS
+
+# Routes that never use the database.
+EXEMPT_PATHS = frozenset(
+    ("/api/health", "/api/metrics", "/api/docs", "/api/redoc", "/api/openapi.json"),
+)
+
+
+class Priority(str, enum.Enum):  # noqa: WPS600
+    """Classes of requests, in the order they are shed."""
+
+    READ = "read"
+    WRITE = "write"
+
+
+def write_route() -> None:
+    """Mark a route as a write, served while reads are shed."""
+
+
+# Dependency of the write routes, given as ``dependencies=[WRITE_ROUTE]``.
+WRITE_ROUTE = Depends(write_route)
+
+
+def is_write_route(route: BaseRoute) -> bool:
+    """
+    Tell whether a route is marked as a write.
+
+    :param route: route of the application.
+    :returns: True for routes depending on ``write_route``.
+    """
+    if not isinstance(route, APIRoute):
+        return False
+    return any(
+        dependency.call is write_route for dependency in route.dependant.dependencies
+    )
+
+
+def request_priority(scope: Scope, writes: List[BaseRoute]) -> Priority:
+    """
+    Class of a request.
+
+    The class comes from the route the request is for, not from what the
+    client sends, so that no header buys a read the priority of a write.
+
+    :param scope: scope of the request.
+    :param writes: routes marked as writes.
+    :returns: WRITE for requests to write routes, READ for everything else.
+    """
+    if scope["method"] in READ_METHODS:
+        return Priority.READ
+    for route in writes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return Priority.WRITE
+    return Priority.READ
+
+
+def admission_limit(priority: Priority) -> int:
+    """
+    Requests of a class that may use the database at once.
+
+    Every connection of the pool may have ``admission_queue_factor``
+    requests using or waiting for it. Reads get ``admission_read_share``
+    of them, the rest is kept for writes.
+
+    :param priority: class of the request.
+    :returns: the limit.
+    """
+    connections = settings.db_pool_size + settings.db_max_overflow
+    limit = connections * settings.admission_queue_factor
+    if priority == Priority.READ:
+        limit *= settings.admission_read_share
+    return max(1, int(limit))
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware shedding requests the connection pool cannot serve.
+
+    Requests using the database are counted, and new ones are answered
+    with 503 and ``Retry-After`` once their class is over its limit, instead
+    of waiting for a connection until clients time out. Requests to routes
+    marked with ``WRITE_ROUTE`` are writes, the others reads. Health checks
+    and metrics are always served.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.in_flight = 0
+        self._writes: Optional[List[BaseRoute]] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Serve or shed a request.
+
+        :param scope: scope of the request.
+        :param receive: receives messages of the request.
+        :param send: sends messages of the response.
+        """
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        priority = request_priority(scope, self._write_routes(scope))
+        if self.in_flight >= admission_limit(priority):
+            SHED_REQUESTS.labels(priority.value).inc()
+            response = JSONResponse(
+                {"detail": "Server is busy, retry later"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(settings.admission_retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        self.in_flight += 1
+        try:  # noqa: WPS501
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    def _write_routes(self, scope: Scope) -> List[BaseRoute]:
+        if self._writes is None:
+            routes = getattr(scope.get("app"), "routes", ())
+            self._writes = [route for route in routes if is_write_route(route)]
+        return self._writes
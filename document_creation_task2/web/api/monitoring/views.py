@@ -1,12 +1,34 @@
-from fastapi import APIRouter
+from typing import Any, Dict
+
+from fastapi import APIRouter, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from document_creation_task2.db.utils import pool_stats
+from document_creation_task2.web.metrics import latest_metrics
 
 router = APIRouter()
 
 
 @router.get("/health")
-def health_check() -> None:
+def health_check(request: Request) -> Dict[str, Any]:
     """
     Checks the health of a project.
 
-    It returns 200 if the project is healthy.
+    It returns 200 if the project is healthy, with the live state of the
+    database connection pool.
+
+    :param request: current request.
+    :returns: state of the pool, empty before the database is set up.
+    """
+    engine = getattr(request.app.state, "db_engine", None)
+    return {"pool": pool_stats(engine) if engine is not None else {}}
+
+
+@router.get("/metrics")
+def metrics() -> Response:
+    """
+    Expose metrics in the Prometheus text format.
+
+    :returns: current values of all metrics, of every worker.
     """
+    return Response(latest_metrics(), media_type=CONTENT_TYPE_LATEST)
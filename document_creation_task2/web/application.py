@@ -4,23 +4,32 @@ from fastapi import FastAPI
 from fastapi.responses import UJSONResponse
 
 from document_creation_task2.logging import configure_logging
+from document_creation_task2.services.user_service import signing_key
+from document_creation_task2.settings import settings
+from document_creation_task2.web.admission import AdmissionMiddleware
 from document_creation_task2.web.api.router import api_router
 from document_creation_task2.web.api.users.views import router
+from document_creation_task2.web.draining import DrainMiddleware
 from document_creation_task2.web.lifetime import (
     register_shutdown_event,
     register_startup_event,
 )
+from document_creation_task2.web.metrics import MetricsMiddleware
+from document_creation_task2.web.query_log import QueryLogMiddleware
+from document_creation_task2.web.rate_limit import RateLimitHeadersMiddleware
 
 
 def get_app() -> FastAPI:
     """
     Get FastAPI application.
 
-    This is the main constructor of an application.
+    This is the main constructor of an application. It fails when no key
+    signing the tokens is configured.
 
     :return: application.
     """
     configure_logging()
+    signing_key()
     app = FastAPI(
         title="document_creation_task2",
         version=metadata.version("document_creation_task2"),
@@ -30,6 +39,8 @@ def get_app() -> FastAPI:
         default_response_class=UJSONResponse,
     )
 
+    _add_middlewares(app)
+
     # Adds startup and shutdown events.
     register_startup_event(app)
     register_shutdown_event(app)
@@ -38,3 +49,18 @@ def get_app() -> FastAPI:
     app.include_router(router=api_router, prefix="/api")
     app.include_router(router=router, prefix="/api")
     return app
+
+
+def _add_middlewares(app: FastAPI) -> None:
+    """
+    Add the middlewares, the last added serves requests first.
+
+    :param app: fastAPI application.
+    """
+    app.add_middleware(QueryLogMiddleware)
+    app.add_middleware(RateLimitHeadersMiddleware)
+    if settings.admission_enabled:
+        app.add_middleware(AdmissionMiddleware)
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+    app.add_middleware(DrainMiddleware)
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+DRAIN_POLL = 0.05
+
+
+class RequestTracker:
+    """Counts the requests being served by the worker."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Wait for the requests being served to finish.
+
+        :param timeout: seconds to wait at most.
+        :returns: number of requests still in flight.
+        """
+        deadline = time.monotonic() + timeout
+        while self.in_flight and time.monotonic() < deadline:
+            await asyncio.sleep(DRAIN_POLL)
+        return self.in_flight
+
+
+request_tracker = RequestTracker()
+
+
+class DrainMiddleware:
+    """
+    ASGI middleware counting HTTP requests in flight.
+
+    The shutdown event waits for them before the engines are disposed.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Serve a request while counting it.
+
+        :param scope: scope of the request.
+        :param receive: receives messages of the request.
+        :param send: sends messages of the response.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_tracker.in_flight += 1
+        try:  # noqa: WPS501
+            await self.app(scope, receive, send)
+        finally:
+            request_tracker.in_flight -= 1
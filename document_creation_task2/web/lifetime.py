@@ -1,9 +1,25 @@
-from typing import Awaitable, Callable
+import asyncio
+from contextlib import suppress
+from typing import Awaitable, Callable, Optional
 
 from fastapi import FastAPI
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
-
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from document_creation_task2.authentication.password import password_hasher
+from document_creation_task2.db.recorder import watch_engine
+from document_creation_task2.db.replicas import ReplicaRouter
+from document_creation_task2.db.utils import create_engine, warm_up_pool
+from document_creation_task2.services.cache import cache, create_backend
+from document_creation_task2.services.rate_limit import create_buckets, rate_limiter
+from document_creation_task2.services.revocation import (
+    maintain_revocations,
+    revocation_index,
+)
+from document_creation_task2.services.write_behind import write_behind
 from document_creation_task2.settings import settings
+from document_creation_task2.web.draining import request_tracker
+from document_creation_task2.web.metrics import instrument_engine
 
 
 def _setup_db(app: FastAPI) -> None:  # pragma: no cover
@@ -13,16 +29,80 @@ def _setup_db(app: FastAPI) -> None:  # pragma: no cover
     This function creates SQLAlchemy engine instance,
     session_factory for creating sessions
     and stores them in the application's state property.
+    Engines of the read replicas are kept apart for read-only sessions.
 
     :param app: fastAPI application.
     """
-    engine = create_async_engine(str(settings.db_url), echo=settings.db_echo)
+    engine = _create_engine()
     session_factory = async_sessionmaker(
         engine,
         expire_on_commit=False,
     )
+    replica_engines = [_create_engine(url) for url in settings.db_replica_urls]
     app.state.db_engine = engine
     app.state.db_session_factory = session_factory
+    app.state.db_replica_engines = replica_engines
+    app.state.db_read_router = ReplicaRouter(
+        session_factory,
+        [async_sessionmaker(replica) for replica in replica_engines],
+    )
+
+
+def _create_engine(url: Optional[str] = None) -> AsyncEngine:  # pragma: no cover
+    engine = create_engine(url)
+    watch_engine(engine)
+    if settings.metrics_enabled:
+        instrument_engine(engine)
+    return engine
+
+
+def _start_background_tasks(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Starts tasks running for the whole lifetime of the application.
+
+    :param app: fastAPI application.
+    """
+    app.state.revocation_task = asyncio.create_task(
+        maintain_revocations(app.state.db_session_factory),
+    )
+    write_behind.start(app.state.db_session_factory)
+
+
+async def _stop_background_tasks(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops tasks started by _start_background_tasks.
+
+    :param app: fastAPI application.
+    """
+    await write_behind.stop()
+    app.state.revocation_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await app.state.revocation_task
+    revocation_index.reset()
+
+
+async def _dispose_engines(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Closes the connection pools of the primary and the replicas.
+
+    :param app: fastAPI application.
+    """
+    await app.state.db_engine.dispose()
+    for replica in app.state.db_replica_engines:
+        await replica.dispose()
+
+
+async def _close_backends() -> None:  # pragma: no cover
+    """Closes the connections of the cache and of the rate limiter."""
+    await cache.close()
+    await rate_limiter.close()
+
+
+async def _drain_requests() -> None:  # pragma: no cover
+    """Wait for the requests in flight to finish."""
+    remaining = await request_tracker.drain(settings.graceful_timeout)
+    if remaining:
+        logger.warning(f"Shutting down with {remaining} requests in flight")
 
 
 def register_startup_event(
@@ -40,9 +120,12 @@ def register_startup_event(
 
     @app.on_event("startup")
     async def _startup() -> None:  # noqa: WPS430
-        app.middleware_stack = None
         _setup_db(app)
-        app.middleware_stack = app.build_middleware_stack()
+        cache.use(create_backend(settings.cache_url))
+        rate_limiter.use(create_buckets(settings.rate_limit_url))
+        if settings.db_pool_warmup:
+            await warm_up_pool(app.state.db_engine, settings.db_pool_size)
+        _start_background_tasks(app)
         pass  # noqa: WPS420
 
     return _startup
@@ -54,13 +137,21 @@ def register_shutdown_event(
     """
     Actions to run on application's shutdown.
 
+    Requests in flight are given ``graceful_timeout`` seconds to finish
+    before the engines are disposed.
+
     :param app: fastAPI application.
     :return: function that actually performs actions.
     """
 
     @app.on_event("shutdown")
     async def _shutdown() -> None:  # noqa: WPS430
-        await app.state.db_engine.dispose()
+        await _drain_requests()
+        await _stop_background_tasks(app)
+        await _dispose_engines(app)
+        await _close_backends()
+        password_hasher.shutdown()
+        await logger.complete()
 
         pass  # noqa: WPS420
 
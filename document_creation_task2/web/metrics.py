@@ -0,0 +1,233 @@
+import os
+import time
+from functools import partial
+from typing import Any
+from weakref import WeakKeyDictionary
+
+from prometheus_client import (  # noqa: WPS235
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from document_creation_task2.db.utils import pool_stats
+
+UNMATCHED_ROUTE = "unmatched"
+DB_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+)
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status.",
+    ["method", "route", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latency of HTTP requests by route template and status.",
+    ["method", "route", "status"],
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being served.",
+    multiprocess_mode="livesum",
+)
+SHED_REQUESTS = Counter(
+    "http_requests_shed_total",
+    "Requests answered with 503 as the connection pool was saturated.",
+    ["priority"],
+)
+DB_LATENCY = Histogram(
+    "db_statement_duration_seconds",
+    "Duration of database statements by kind.",
+    ["operation"],
+    buckets=DB_BUCKETS,
+)
+DB_ERRORS = Counter(
+    "db_statement_errors_total",
+    "Database statements that raised an error.",
+    ["operation"],
+)
+POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Connections kept open by the pool.",
+    multiprocess_mode="livesum",
+)
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections of the pool in use.",
+    multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections in use above the size of the pool.",
+    multiprocess_mode="livesum",
+)
+CACHE_HITS = Counter(
+    "cache_hits",
+    "Cache lookups that found a value, by kind of key.",
+    ["kind"],
+)
+CACHE_MISSES = Counter(
+    "cache_misses",
+    "Cache lookups that found nothing, by kind of key.",
+    ["kind"],
+)
+
+
+def latest_metrics() -> bytes:
+    """
+    Current values of all metrics in the Prometheus text format.
+
+    Under gunicorn every worker writes its metrics to
+    ``PROMETHEUS_MULTIPROC_DIR``, and they are added up from there so that
+    a scrape sees all workers, whichever one serves it.
+
+    :returns: the metrics.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)  # type: ignore
+    return generate_latest(registry)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing HTTP requests.
+
+    Requests are labelled by the template of the matched route, so paths
+    with ids do not create new series.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Serve a request and record its metrics.
+
+        :param scope: scope of the request.
+        :param receive: receives messages of the request.
+        :param send: sends messages of the response.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        response_status = [500]
+
+        async def send_with_status(message: Message) -> None:  # noqa: WPS430
+            if message["type"] == "http.response.start":
+                response_status[0] = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:  # noqa: WPS501
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path_format", UNMATCHED_ROUTE)
+            labels = (scope["method"], route, str(response_status[0]))
+            REQUESTS.labels(*labels).inc()
+            REQUEST_LATENCY.labels(*labels).observe(elapsed)
+
+
+class PoolTracker:
+    """
+    Counts the connections in use of the pools of instrumented engines.
+
+    The pool gauges are set from these counts on every checkout and
+    checkin, so that the values of the workers of a server add up.
+    """
+
+    def __init__(self) -> None:
+        self._in_use: "WeakKeyDictionary[AsyncEngine, int]" = WeakKeyDictionary()
+
+    def add(self, engine: AsyncEngine) -> None:
+        """
+        Track the pool of an engine.
+
+        :param engine: the engine.
+        """
+        self._in_use.setdefault(engine, 0)
+        self._publish()
+
+    def moved(self, engine: AsyncEngine, change: int, *args: Any) -> None:
+        """
+        Count a connection checked out of or into a pool.
+
+        :param engine: engine of the pool.
+        :param change: 1 on checkout, -1 on checkin.
+        :param args: arguments of the pool event.
+        """
+        self._in_use[engine] = self._in_use.get(engine, 0) + change
+        self._publish()
+
+    def _publish(self) -> None:
+        sizes = {engine: pool_stats(engine).get("size", 0) for engine in self._in_use}
+        POOL_SIZE.set(sum(sizes.values()))
+        POOL_CHECKED_OUT.set(sum(self._in_use.values()))
+        POOL_OVERFLOW.set(
+            sum(
+                max(in_use - sizes[engine], 0)
+                for engine, in_use in self._in_use.items()
+            ),
+        )
+
+
+pool_tracker = PoolTracker()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Record statement timings and pool state of an engine.
+
+    :param engine: the engine.
+    """
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_execute)
+    event.listen(sync_engine, "handle_error", _on_error)
+    event.listen(sync_engine, "checkout", partial(pool_tracker.moved, engine, 1))
+    event.listen(sync_engine, "checkin", partial(pool_tracker.moved, engine, -1))
+    pool_tracker.add(engine)
+
+
+def _operation(statement: str) -> str:
+    words = statement.split(None, 1)
+    return words[0].upper() if words else ""
+
+
+def _before_execute(*args: Any) -> None:
+    context = args[4]
+    context.metrics_start = time.perf_counter()
+
+
+def _after_execute(*args: Any) -> None:
+    statement, context = args[2], args[4]
+    elapsed = time.perf_counter() - context.metrics_start
+    DB_LATENCY.labels(_operation(statement)).observe(elapsed)
+
+
+def _on_error(context: Any) -> None:
+    DB_ERRORS.labels(_operation(context.statement or "")).inc()
@@ -0,0 +1,39 @@
+from loguru import logger
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from document_creation_task2.db.recorder import record_queries
+
+
+class QueryLogMiddleware:
+    """
+    ASGI middleware logging the statements run by each request.
+
+    The number of statements is logged at debug level and statements run
+    several times with the same parameters, which usually point at an N+1
+    or a redundant fetch, are logged as warnings.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Serve a request while recording its statements.
+
+        :param scope: scope of the request.
+        :param receive: receives messages of the request.
+        :param send: sends messages of the response.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with record_queries() as recorder:
+            try:  # noqa: WPS501
+                await self.app(scope, receive, send)
+            finally:
+                route = getattr(scope.get("route"), "path_format", scope["path"])
+                endpoint = f"{scope['method']} {route}"
+                if recorder.count:
+                    logger.debug(f"{endpoint} ran {recorder.count} statements")
+                for statement, runs in recorder.repeated().items():
+                    logger.warning(f"{endpoint} ran {runs} times: {statement}")
@@ -0,0 +1,37 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from document_creation_task2.services.rate_limit import rate_limit_headers
+
+
+class RateLimitHeadersMiddleware:
+    """
+    ASGI middleware adding rate limit headers to responses.
+
+    The headers describe the bucket of the user on the route, left by the
+    rate limiter in the state of the request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Serve a request and add the headers to its response.
+
+        :param scope: scope of the request.
+        :param receive: receives messages of the request.
+        :param send: sends messages of the response.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:  # noqa: WPS430
+            decision = scope.get("state", {}).get("rate_limit")
+            if message["type"] == "http.response.start" and decision is not None:
+                headers = MutableHeaders(scope=message)
+                headers.update(rate_limit_headers(decision))
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)